@@ -0,0 +1,450 @@
+#!/usr/bin/env python3
+"""
+Benchmark Suite untuk PadiDoc
+Skenario bernama yang dijalankan terhadap server dan Postgres lokal:
+
+  single-write         latensi satu penulis POST /api/pembelian berurutan
+  production-fanout    POST /api/produksi (satu dokumen -> lima perubahan stok) paralel
+  dashboard-read       GET /api/dashboard/metrics paralel sambil pembelian masuk
+  list-scaling         halaman /api/pembelian pada 10k/100k/1M baris (butuh --dsn)
+  concurrent-oversell  penjualan dan produksi serentak pada satu jenisItem + cek ledger
+
+Hasil disimpan sebagai baseline JSON; run berikutnya gagal (exit 1) dengan diff yang
+mudah dibaca jika p95 naik atau throughput turun melewati ambang --threshold.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+import requests
+
+from latency_histogram import LatencyHistogram, LatencyRecorder
+from load_engine import AsyncHttpPool
+from stock_stress import StockRaceDetector
+from test_seed import PadiDocTester
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks", "baseline.json")
+LOCAL_HOSTS = {"", "localhost", "127.0.0.1", "::1"}
+LIST_MARKER = "benchmark-suite list-scaling"
+SCENARIOS = ("single-write", "production-fanout", "dashboard-read", "list-scaling", "concurrent-oversell")
+
+
+def p95_ms(histogram: LatencyHistogram) -> float:
+    return round(histogram.value_at_percentile(95.0) / 1000.0, 3)
+
+
+def parse_size(value: str) -> int:
+    """10k -> 10000, 1M -> 1000000"""
+    value = value.strip().lower()
+    multiplier = {"k": 1_000, "m": 1_000_000}.get(value[-1:], 1)
+    return int(float(value.rstrip("km")) * multiplier)
+
+
+def size_label(rows: int) -> str:
+    if rows >= 1_000_000 and rows % 1_000_000 == 0:
+        return f"{rows // 1_000_000}M"
+    if rows >= 1_000 and rows % 1_000 == 0:
+        return f"{rows // 1_000}k"
+    return str(rows)
+
+
+@dataclass
+class ScenarioResult:
+    """Hasil satu skenario (atau satu varian, mis. list-scaling/100k/deep-page)"""
+    name: str
+    requests: int = 0
+    errors: int = 0
+    elapsed: float = 0.0
+    latency: Dict[str, float] = field(default_factory=dict)
+    violations: List[str] = field(default_factory=list)
+    skipped: Optional[str] = None
+
+    @property
+    def throughput(self) -> float:
+        ok = self.requests - self.errors
+        return ok / self.elapsed if self.elapsed else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        data: Dict[str, Any] = {
+            "requests": self.requests,
+            "errors": self.errors,
+            "elapsed": round(self.elapsed, 3),
+            "throughput": round(self.throughput, 2),
+            "latencyMs": self.latency,
+        }
+        if self.violations:
+            data["violations"] = self.violations
+        if self.skipped:
+            data["skipped"] = self.skipped
+        return data
+
+
+def histogram_result(name: str, histogram: LatencyHistogram, requests_: int, errors: int,
+                     elapsed: float) -> ScenarioResult:
+    latency = histogram.summary()
+    latency["p95"] = p95_ms(histogram)
+    return ScenarioResult(name, requests_, errors, elapsed, latency)
+
+
+def connect(dsn: str):
+    """Koneksi autocommit ke Postgres (psycopg atau psycopg2)"""
+    try:
+        import psycopg
+        return psycopg.connect(dsn, autocommit=True)
+    except ImportError:
+        pass
+    try:
+        import psycopg2
+    except ImportError:
+        raise SystemExit('Driver PostgreSQL tidak ditemukan: pip install "psycopg[binary]" atau psycopg2-binary')
+    connection = psycopg2.connect(dsn)
+    connection.autocommit = True
+    return connection
+
+
+class BenchmarkSuite:
+    """Menjalankan skenario bernama lewat API publik dan mengumpulkan ScenarioResult"""
+
+    def __init__(self, tester: PadiDocTester, dsn: Optional[str] = None, scale: float = 1.0,
+                 list_sizes: Tuple[int, ...] = (10_000, 100_000, 1_000_000), keep_data: bool = False):
+        self.tester = tester
+        self.dsn = dsn
+        self.scale = scale
+        self.list_sizes = list_sizes
+        self.keep_data = keep_data
+
+    def log(self, message: str, level: str = "INFO"):
+        self.tester.log(message, level)
+
+    def count(self, base: int) -> int:
+        return max(1, int(base * self.scale))
+
+    def setup(self):
+        """Data referensi (supplier/customer contoh) dibuat idempoten sebelum skenario berjalan"""
+        self.tester.seed_sample_data()
+        self.tester.suppliers = self.tester.make_request("GET", "/api/suppliers?limit=50") or []
+        self.tester.customers = self.tester.make_request("GET", "/api/customers?limit=50") or []
+        if not self.tester.suppliers or not self.tester.customers:
+            raise RuntimeError("Supplier/customer contoh tidak tersedia, cek server")
+
+    async def _closed_loop(self, method: str, path: str, payload: Callable[[int], Optional[Dict]],
+                           count: int, concurrency: int) -> Tuple[LatencyHistogram, int, float]:
+        """N request dibagi ke `concurrency` pekerja yang masing-masing menunggu response sebelum kirim lagi"""
+        pool = AsyncHttpPool(self.tester.base_url, size=concurrency)
+        histogram = LatencyHistogram()
+        errors = 0
+        indexes = iter(range(count))
+
+        async def worker():
+            nonlocal errors
+            for index in indexes:
+                started = time.perf_counter()
+                try:
+                    response = await pool.request(method, path, payload(index))
+                    ok = response.ok
+                except (ConnectionError, OSError, asyncio.TimeoutError):
+                    ok = False
+                # Hanya response 2xx yang masuk histogram; kegagalan cepat tidak boleh menurunkan p95
+                if ok:
+                    histogram.record_seconds(time.perf_counter() - started)
+                else:
+                    errors += 1
+
+        started = time.perf_counter()
+        try:
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+        finally:
+            await pool.close()
+        return histogram, errors, time.perf_counter() - started
+
+    def _run_loop(self, name: str, method: str, path: str, payload: Callable[[int], Optional[Dict]],
+                  count: int, concurrency: int) -> ScenarioResult:
+        histogram, errors, elapsed = asyncio.run(self._closed_loop(method, path, payload, count, concurrency))
+        return histogram_result(name, histogram, count, errors, elapsed)
+
+    def _pembelian(self, index: int) -> Dict:
+        suppliers = self.tester.suppliers
+        return self.tester.build_pembelian_payload(suppliers[index % len(suppliers)], index)
+
+    def _prime_gabah(self, kg: Decimal):
+        stok = self.tester.make_request("GET", "/api/stok?all=1") or []
+        available = sum((Decimal(str(row["jumlah"])) for row in stok if row["jenisItem"] == "gabah"), Decimal(0))
+        if available >= kg:
+            return
+        payload = self._pembelian(0)
+        payload.update({
+            "jumlah": str(kg - available),
+            "totalHarga": str((kg - available) * Decimal(payload["hargaPerKg"])),
+            "catatan": "Priming stok gabah untuk benchmark",
+        })
+        self.tester.make_request("POST", "/api/pembelian", payload)
+
+    # Skenario
+
+    def single_write(self) -> List[ScenarioResult]:
+        return [self._run_loop("single-write", "POST", "/api/pembelian", self._pembelian, self.count(200), 1)]
+
+    def production_fanout(self) -> List[ScenarioResult]:
+        count = self.count(100)
+        self._prime_gabah(Decimal(1200) * count)
+        return [self._run_loop("production-fanout", "POST", "/api/produksi",
+                               lambda index: self.tester.build_produksi_payload(index), count, 8)]
+
+    def dashboard_read(self) -> List[ScenarioResult]:
+        """Baca dashboard paralel sementara pembelian masuk tiap 100 ms (cache terus diinvalidasi)"""
+        async def run() -> Tuple[LatencyHistogram, int, float]:
+            done = asyncio.Event()
+
+            async def writer():
+                pool = AsyncHttpPool(self.tester.base_url, size=1)
+                index = 0
+                try:
+                    while not done.is_set():
+                        index += 1
+                        await pool.request("POST", "/api/pembelian", self._pembelian(index))
+                        await asyncio.sleep(0.1)
+                finally:
+                    await pool.close()
+
+            background = asyncio.ensure_future(writer())
+            try:
+                return await self._closed_loop("GET", "/api/dashboard/metrics", lambda index: None,
+                                               self.count(2000), 16)
+            finally:
+                done.set()
+                await background
+
+        histogram, errors, elapsed = asyncio.run(run())
+        return [histogram_result("dashboard-read", histogram, self.count(2000), errors, elapsed)]
+
+    def _top_up_pembelian(self, connection, rows: int) -> Tuple[int, int]:
+        """Tambah baris pembelian bertanda LIST_MARKER sampai tabel berisi `rows` baris"""
+        cursor = connection.cursor()
+        cursor.execute("SELECT count(*) FROM pembelian")
+        current = cursor.fetchone()[0]
+        if current < rows:
+            self.log(f"Mengisi pembelian {current} -> {rows} baris...")
+            # Baris langsung ke tabel tanpa perubahan stok; dihapus lagi di akhir skenario
+            cursor.execute(
+                "INSERT INTO pembelian (supplier_id, tanggal, jenis_gabah, jenis_barang, jumlah, harga_per_kg, "
+                "total_harga, status, catatan, created_at) "
+                "SELECT %s, now() - (g %% 1095) * interval '1 day', 'Gabah Benchmark', 'gabah', 1000, 8000, "
+                "8000000, 'completed', %s, now() - (g %% 1095) * interval '1 day' "
+                "FROM generate_series(1, %s) AS g",
+                (self.tester.suppliers[0]["id"], LIST_MARKER, rows - current),
+            )
+            cursor.execute("ANALYZE pembelian")
+        cursor.execute("SELECT min(id), max(id) FROM pembelian")
+        return cursor.fetchone()
+
+    def list_scaling(self) -> List[ScenarioResult]:
+        if not self.dsn:
+            return [ScenarioResult("list-scaling", skipped="butuh --dsn / BENCH_DATABASE_URL untuk mengisi baris")]
+        connection = connect(self.dsn)
+        results: List[ScenarioResult] = []
+        try:
+            for rows in sorted(self.list_sizes):
+                low, high = self._top_up_pembelian(connection, rows)
+                middle = (low + high) // 2
+                since = (datetime.now() - timedelta(days=30)).date().isoformat()
+                pages = {
+                    "first-page": "/api/pembelian?limit=100",
+                    "deep-page": f"/api/pembelian?limit=100&after={middle}",
+                    "date-range": f"/api/pembelian?limit=100&from={since}",
+                }
+                for label, path in pages.items():
+                    results.append(self._run_loop(f"list-scaling/{size_label(rows)}/{label}", "GET", path,
+                                                  lambda index: None, self.count(200), 4))
+        finally:
+            if not self.keep_data:
+                cursor = connection.cursor()
+                cursor.execute("DELETE FROM pembelian WHERE catatan = %s", (LIST_MARKER,))
+                self.log(f"{cursor.rowcount} baris pembelian benchmark dihapus")
+            connection.close()
+        return results
+
+    def concurrent_oversell(self) -> List[ScenarioResult]:
+        previous, self.tester.latency = self.tester.latency, LatencyRecorder()
+        detector = StockRaceDetector(self.tester, concurrency=50, jenis_item="beras")
+        try:
+            stress = detector.run(self.count(100))
+        finally:
+            recorded, self.tester.latency = self.tester.latency, previous
+        detector.report(stress)
+
+        histogram = LatencyHistogram()
+        for item in recorded.histograms.values():
+            histogram.merge(item)
+        # Penolakan 400 (stok tidak cukup) adalah hasil yang benar; throughput dihitung dari yang diterima
+        result = histogram_result("concurrent-oversell", histogram, stress.requests,
+                                  stress.requests - sum(stress.accepted.values()), stress.elapsed)
+        result.violations = [f"[{v.kind}] {v.jenis_item}: {v.detail}" for v in stress.violations]
+        return [result]
+
+    def run(self, names: List[str]) -> List[ScenarioResult]:
+        runners = {
+            "single-write": self.single_write,
+            "production-fanout": self.production_fanout,
+            "dashboard-read": self.dashboard_read,
+            "list-scaling": self.list_scaling,
+            "concurrent-oversell": self.concurrent_oversell,
+        }
+        self.setup()
+        results: List[ScenarioResult] = []
+        for name in names:
+            self.log(f"=== Scenario {name} ===")
+            for result in runners[name]():
+                if result.skipped:
+                    self.log(f"{result.name}: dilewati ({result.skipped})", "WARNING")
+                else:
+                    self.log(f"{result.name}: {result.requests} request, p50 {result.latency['p50']} ms, "
+                             f"p95 {result.latency['p95']} ms, {result.throughput:.1f} req/s, {result.errors} error")
+                results.append(result)
+        return results
+
+
+@dataclass
+class Comparison:
+    """Satu baris diff terhadap baseline"""
+    scenario: str
+    metric: str
+    baseline: float
+    current: float
+    change: float  # persen, positif = lebih buruk
+    regressed: bool
+
+
+def compare(results: List[ScenarioResult], baseline: Dict[str, Any], p95_threshold: float,
+            throughput_threshold: float, min_delta_ms: float) -> List[Comparison]:
+    """p95 lebih tinggi dan throughput lebih rendah dari baseline melewati ambang dihitung regresi"""
+    rows: List[Comparison] = []
+    scenarios = baseline.get("scenarios", {})
+    for result in results:
+        old = scenarios.get(result.name)
+        if result.skipped or not old or old.get("skipped"):
+            continue
+        old_p95, new_p95 = old["latencyMs"].get("p95", 0.0), result.latency.get("p95", 0.0)
+        change = (new_p95 - old_p95) / old_p95 * 100 if old_p95 else 0.0
+        # Selisih absolut kecil (jitter sub-milidetik) tidak dihitung regresi
+        regressed = change > p95_threshold * 100 and new_p95 - old_p95 > min_delta_ms
+        rows.append(Comparison(result.name, "p95 ms", old_p95, new_p95, change, regressed))
+
+        old_rate, new_rate = old.get("throughput", 0.0), result.throughput
+        change = (old_rate - new_rate) / old_rate * 100 if old_rate else 0.0
+        rows.append(Comparison(result.name, "req/s", old_rate, new_rate, change,
+                               change > throughput_threshold * 100))
+    return rows
+
+
+def report_comparison(rows: List[Comparison], results: List[ScenarioResult], log) -> bool:
+    """Cetak diff; True jika tidak ada regresi maupun pelanggaran konsistensi"""
+    if rows:
+        log(f"{'scenario':<34}{'metric':<8}{'baseline':>11}{'current':>11}{'worse':>9}  status")
+    for row in rows:
+        status = "REGRESSION" if row.regressed else "ok"
+        log(f"{row.scenario:<34}{row.metric:<8}{row.baseline:>11.2f}{row.current:>11.2f}{row.change:>+8.1f}%  {status}",
+            "ERROR" if row.regressed else "INFO")
+    failures = [row for row in rows if row.regressed]
+    for result in results:
+        for violation in result.violations:
+            log(f"{result.name}: {violation}", "ERROR")
+    if failures:
+        log(f"{len(failures)} regresi: " + ", ".join(f"{row.scenario} {row.metric}" for row in failures), "ERROR")
+    return not failures and not any(result.violations for result in results)
+
+
+def write_results(path: str, results: List[ScenarioResult], label: str, extra: Optional[Dict] = None):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    data = {
+        "label": label,
+        "generatedAt": datetime.now().isoformat(timespec="seconds"),
+        "unit": "ms",
+        "scenarios": {result.name: result.to_dict() for result in results},
+    }
+    if extra:
+        data.update(extra)
+    with open(path, "w", encoding="utf-8") as handle:
+        json.dump(data, handle, indent=2, sort_keys=True)
+        handle.write("\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark regresi PadiDoc dengan baseline JSON")
+    parser.add_argument("--base-url", default="http://localhost:5000", help="URL server PadiDoc")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS),
+                        help=f"Skenario dipisah koma: {', '.join(SCENARIOS)}")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="File baseline JSON untuk dibandingkan")
+    parser.add_argument("--update-baseline", action="store_true", help="Simpan hasil run ini sebagai baseline")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="Ambang regresi relatif untuk p95 dan throughput (0.10 = 10%%)")
+    parser.add_argument("--p95-threshold", type=float, help="Ambang khusus p95 (default --threshold)")
+    parser.add_argument("--throughput-threshold", type=float, help="Ambang khusus throughput (default --threshold)")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0,
+                        help="Kenaikan p95 di bawah nilai absolut ini tidak dihitung regresi")
+    parser.add_argument("--scale", type=float, default=1.0, help="Pengali jumlah request tiap skenario")
+    parser.add_argument("--dsn", default=os.environ.get("BENCH_DATABASE_URL") or os.environ.get("DATABASE_URL"),
+                        help="Postgres lokal untuk list-scaling (default BENCH_DATABASE_URL / DATABASE_URL)")
+    parser.add_argument("--list-sizes", default="10k,100k,1M", help="Ukuran tabel list-scaling")
+    parser.add_argument("--keep-data", action="store_true", help="Jangan hapus baris list-scaling setelah selesai")
+    parser.add_argument("--allow-remote", action="store_true", help="Izinkan server/database selain localhost")
+    parser.add_argument("--json-out", help="Tulis hasil run ini ke file JSON (untuk artefak CI)")
+    parser.add_argument("--label", default="", help="Label build untuk file hasil/baseline")
+    args = parser.parse_args()
+
+    names = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        raise SystemExit(f"Skenario tidak dikenal: {', '.join(unknown)}")
+    hosts = [urlparse(args.base_url).hostname or ""]
+    if args.dsn and "list-scaling" in names:
+        hosts.append(urlparse(args.dsn).hostname or "")
+    remote = [host for host in hosts if host not in LOCAL_HOSTS]
+    if remote and not args.allow_remote:
+        raise SystemExit(f"Host {', '.join(remote)} bukan lokal; benchmark menulis ribuan baris (pakai --allow-remote)")
+
+    tester = PadiDocTester(args.base_url)
+    tester.metrics_interval = 0
+    try:
+        requests.get(f"{args.base_url}/api/dashboard/metrics", timeout=10).raise_for_status()
+    except requests.exceptions.RequestException as error:
+        print(f"Error: Cannot reach server on {args.base_url}: {error}")
+        sys.exit(2)
+
+    suite = BenchmarkSuite(tester, args.dsn, args.scale, tuple(parse_size(size) for size in args.list_sizes.split(",")),
+                           args.keep_data)
+    results = suite.run(names)
+    if args.json_out:
+        write_results(args.json_out, results, args.label)
+        tester.log(f"Hasil ditulis ke {args.json_out}")
+
+    ok = not any(result.violations for result in results)
+    if os.path.exists(args.baseline) and not args.update_baseline:
+        with open(args.baseline, encoding="utf-8") as handle:
+            baseline = json.load(handle)
+        tester.log(f"Dibandingkan dengan baseline {args.baseline} ({baseline.get('label') or baseline.get('generatedAt')})")
+        rows = compare(results, baseline,
+                       args.p95_threshold if args.p95_threshold is not None else args.threshold,
+                       args.throughput_threshold if args.throughput_threshold is not None else args.threshold,
+                       args.min_delta_ms)
+        ok = report_comparison(rows, results, tester.log)
+    elif args.update_baseline or not os.path.exists(args.baseline):
+        write_results(args.baseline, results, args.label)
+        tester.log(f"Baseline disimpan ke {args.baseline}")
+        report_comparison([], results, tester.log)
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Bulk Loader untuk PadiDoc
+Membaca file CSV/NDJSON besar secara streaming dalam potongan berukuran tetap
+dan mengirimkannya ke /api/<resource>/bulk
+"""
+
+import argparse
+import csv
+import io
+import itertools
+import time
+from datetime import datetime
+from typing import Dict, Iterator, List, Tuple
+
+import requests
+
+from latency_histogram import LatencyRecorder
+
+RESOURCES = ("pembelian", "produksi", "penjualan")
+
+
+class BulkLoader:
+    """Streaming loader dengan memori terbatas: hanya satu potongan yang disimpan di memori"""
+
+    def __init__(self, base_url: str = "http://localhost:5000", resource: str = "pembelian",
+                 chunk_rows: int = 2000, batch_size: int = 500, session: requests.Session = None):
+        if resource not in RESOURCES:
+            raise ValueError(f"Resource harus salah satu dari {', '.join(RESOURCES)}")
+        self.base_url = base_url
+        self.resource = resource
+        self.chunk_rows = chunk_rows
+        self.batch_size = batch_size
+        self.session = session or requests.Session()
+        self.latency = LatencyRecorder()
+
+    def log(self, message: str, level: str = "INFO"):
+        """Log message dengan timestamp"""
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        print(f"[{timestamp}] {level}: {message}")
+
+    def iter_csv_chunks(self, path: str) -> Iterator[Tuple[int, int, str]]:
+        """Hasilkan (baris pertama, jumlah baris, teks CSV dengan header) per potongan"""
+        with open(path, newline="", encoding="utf-8") as handle:
+            reader = csv.reader(handle)
+            header = next(reader, None)
+            if header is None:
+                return
+            first_line = 2
+            while True:
+                rows = list(itertools.islice(reader, self.chunk_rows))
+                if not rows:
+                    return
+                buffer = io.StringIO()
+                writer = csv.writer(buffer, lineterminator="\n")
+                writer.writerow(header)
+                writer.writerows(rows)
+                yield first_line, len(rows), buffer.getvalue()
+                first_line += len(rows)
+
+    def iter_ndjson_chunks(self, path: str) -> Iterator[Tuple[int, int, str]]:
+        with open(path, encoding="utf-8") as handle:
+            first_line = 1
+            while True:
+                lines = list(itertools.islice(handle, self.chunk_rows))
+                if not lines:
+                    return
+                yield first_line, len(lines), "".join(lines)
+                first_line += len(lines)
+
+    def _post_chunk(self, body: str, content_type: str) -> Dict:
+        url = f"{self.base_url}/api/{self.resource}/bulk"
+        started = time.perf_counter()
+        response = self.session.post(
+            url,
+            params={"batchSize": self.batch_size},
+            data=body.encode("utf-8"),
+            headers={"Content-Type": content_type},
+        )
+        self.latency.record("POST", f"/api/{self.resource}/bulk", time.perf_counter() - started)
+        try:
+            return response.json()
+        except ValueError:
+            return {"message": f"HTTP {response.status_code}: {response.text[:200]}"}
+
+    def load(self, path: str) -> Dict:
+        """Kirim seluruh file dan kembalikan ringkasan import"""
+        is_csv = not path.endswith((".ndjson", ".jsonl"))
+        chunks = self.iter_csv_chunks(path) if is_csv else self.iter_ndjson_chunks(path)
+        content_type = "text/csv" if is_csv else "application/x-ndjson"
+        # Nomor baris dari server relatif terhadap potongan (CSV: header = baris 1)
+        line_offset = 2 if is_csv else 1
+
+        summary = {"rows": 0, "inserted": 0, "failedBatches": 0, "errors": []}
+        errors: List[Dict] = summary["errors"]
+        started = time.perf_counter()
+
+        for first_line, count, body in chunks:
+            result = self._post_chunk(body, content_type)
+            summary["rows"] += count
+            summary["inserted"] += result.get("inserted", 0)
+            for batch in result.get("batches", []):
+                if batch.get("error"):
+                    summary["failedBatches"] += 1
+                    self.log(f"Batch baris {first_line + batch['firstLine'] - line_offset}-"
+                             f"{first_line + batch['lastLine'] - line_offset} gagal: {batch['error']}", "ERROR")
+            for error in result.get("errors", []):
+                errors.append({"line": first_line + error["line"] - line_offset, "message": error["message"]})
+            if "batches" not in result and result.get("message"):
+                summary["failedBatches"] += 1
+                self.log(f"Potongan mulai baris {first_line} gagal: {result['message']}", "ERROR")
+
+            elapsed = time.perf_counter() - started
+            self.log(f"{summary['rows']} baris terkirim, {summary['inserted']} tersimpan "
+                     f"({summary['rows'] / elapsed:.0f} baris/s)")
+
+        summary["elapsed"] = round(time.perf_counter() - started, 3)
+        summary["rowsPerSecond"] = round(summary["rows"] / summary["elapsed"], 1) if summary["elapsed"] else 0
+        return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import massal transaksi PadiDoc dari CSV/NDJSON")
+    parser.add_argument("resource", choices=RESOURCES)
+    parser.add_argument("path", help="File .csv atau .ndjson/.jsonl")
+    parser.add_argument("--base-url", default="http://localhost:5000")
+    parser.add_argument("--chunk-rows", type=int, default=2000, help="Jumlah baris per request HTTP")
+    parser.add_argument("--batch-size", type=int, default=500, help="Jumlah baris per commit di server")
+    args = parser.parse_args()
+
+    loader = BulkLoader(args.base_url, args.resource, args.chunk_rows, args.batch_size)
+    try:
+        summary = loader.load(args.path)
+    except requests.exceptions.ConnectionError:
+        print(f"Error: Cannot connect to server. Make sure the application is running on {args.base_url}")
+        return
+
+    loader.log(f"Selesai: {summary['inserted']}/{summary['rows']} baris tersimpan dalam {summary['elapsed']}s "
+               f"({summary['rowsPerSecond']} baris/s), {summary['failedBatches']} batch gagal")
+    for error in summary["errors"][:20]:
+        loader.log(f"  Baris {error['line']}: {error['message']}", "ERROR")
+    if len(summary["errors"]) > 20:
+        loader.log(f"  ... dan {len(summary['errors']) - 20} error lainnya", "ERROR")
+    loader.latency.report(loader.log)
+
+
+if __name__ == "__main__":
+    main()
@@ -30,6 +30,22 @@ export async function apiRequest(
   return res;
 }
 
+// Endpoint list dibatasi satu halaman di server; halaman frontend masih menghitung total
+// dan filter dari seluruh baris, jadi query-nya meminta ?all=1. queryKey tetap tanpa
+// parameter agar invalidateQueries({ queryKey: ["/api/pembelian"] }) tetap cocok.
+const FULL_LIST_ENDPOINTS = new Set([
+  "/api/suppliers",
+  "/api/customers",
+  "/api/pembelian",
+  "/api/pengeringan",
+  "/api/produksi",
+  "/api/penjualan",
+  "/api/pengeluaran",
+  "/api/stok",
+  "/api/log-stok",
+  "/api/activity-logs",
+]);
+
 type UnauthorizedBehavior = "returnNull" | "throw";
 export const getQueryFn: <T>(options: {
   on401: UnauthorizedBehavior;
@@ -42,7 +58,8 @@ export const getQueryFn: <T>(options: {
       ...(token ? { "Authorization": `Bearer ${token}` } : {}),
     };
 
-    const res = await fetch(queryKey.join("/") as string, {
+    const url = queryKey.join("/") as string;
+    const res = await fetch(FULL_LIST_ENDPOINTS.has(url) ? `${url}?all=1` : url, {
       headers,
       credentials: "include",
     });
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Export Client untuk PadiDoc
+Mengunduh /api/export/<resource> (CSV atau XLSX) secara streaming langsung ke disk tanpa
+menampung seluruh body di memori, lalu mengukur baris/detik dan puncak memori. Mode
+--benchmark membandingkannya dengan endpoint list JSON lama untuk rentang tanggal yang sama.
+"""
+
+import argparse
+import json
+import resource as rlimit
+import sys
+import time
+import tracemalloc
+import zipfile
+from datetime import datetime
+from typing import Dict, Optional
+
+import requests
+
+from metrics_scraper import MetricsScraper
+
+RESOURCES = ("pembelian", "penjualan", "log-stok")
+
+
+class CsvRowCounter:
+    """Hitung baris CSV per potongan byte; newline di dalam field ber-quote tidak dihitung"""
+
+    def __init__(self):
+        self.in_quotes = False
+        self.lines = 0
+
+    def feed(self, chunk: bytes):
+        # Memisah di tanda kutip: segmen genap di luar quote, ganjil di dalam ("" menutup lalu membuka lagi)
+        for index, segment in enumerate(chunk.split(b'"')):
+            if index > 0:
+                self.in_quotes = not self.in_quotes
+            if not self.in_quotes:
+                self.lines += segment.count(b"\n")
+
+    @property
+    def rows(self) -> int:
+        return max(0, self.lines - 1)  # tanpa header
+
+
+def count_xlsx_rows(path: str) -> int:
+    """Hitung <row> di sheet pertama dengan dekompresi streaming (tanpa membaca seluruh XML)"""
+    rows, tail = 0, b""
+    with zipfile.ZipFile(path) as archive, archive.open("xl/worksheets/sheet1.xml") as sheet:
+        while True:
+            chunk = sheet.read(1 << 16)
+            if not chunk:
+                break
+            data = tail + chunk
+            rows += data.count(b"<row>")
+            tail = data[-4:]
+    return max(0, rows - 1)
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss dalam KiB di Linux
+    return rlimit.getrusage(rlimit.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class ExportClient:
+    """Klien download streaming dengan pengukuran throughput dan memori"""
+
+    def __init__(self, base_url: str = "http://localhost:5000", chunk_size: int = 1 << 16,
+                 session: requests.Session = None):
+        self.base_url = base_url
+        self.chunk_size = chunk_size
+        self.session = session or requests.Session()
+
+    def log(self, message: str, level: str = "INFO"):
+        """Log message dengan timestamp"""
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        print(f"[{timestamp}] {level}: {message}")
+
+    def _params(self, date_from: Optional[str], date_to: Optional[str], jenis_item: Optional[str]) -> Dict:
+        params = {"from": date_from, "to": date_to, "jenisItem": jenis_item}
+        return {key: value for key, value in params.items() if value}
+
+    def download(self, resource: str, path: str, date_from: str = None, date_to: str = None,
+                 jenis_item: str = None, fmt: str = "csv") -> Dict:
+        """Unduh export ke file; memori klien tetap sebesar satu potongan"""
+        params = self._params(date_from, date_to, jenis_item)
+        params["format"] = fmt
+        counter = CsvRowCounter()
+        size = 0
+        first_byte = None
+
+        tracemalloc.start()
+        started = time.perf_counter()
+        with self.session.get(f"{self.base_url}/api/export/{resource}", params=params, stream=True) as response:
+            if not response.ok:
+                tracemalloc.stop()
+                raise RuntimeError(f"Export gagal: HTTP {response.status_code} {response.text[:200]}")
+            with open(path, "wb") as handle:
+                for chunk in response.iter_content(chunk_size=self.chunk_size):
+                    if first_byte is None:
+                        first_byte = time.perf_counter() - started
+                    handle.write(chunk)
+                    size += len(chunk)
+                    if fmt == "csv":
+                        counter.feed(chunk)
+        elapsed = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        rows = counter.rows if fmt == "csv" else count_xlsx_rows(path)
+        return {
+            "mode": f"stream-{fmt}",
+            "path": path,
+            "rows": rows,
+            "bytes": size,
+            "elapsed": round(elapsed, 3),
+            "firstByte": round(first_byte or 0.0, 3),
+            "rowsPerSecond": round(rows / elapsed, 1) if elapsed else 0.0,
+            "clientPeakMb": round(peak / 1048576, 2),
+        }
+
+    def fetch_json(self, resource: str, date_from: str = None, date_to: str = None,
+                   jenis_item: str = None) -> Dict:
+        """Cara lama: satu array JSON berisi seluruh rentang, dimuat utuh ke memori"""
+        params = self._params(date_from, date_to, jenis_item)
+        tracemalloc.start()
+        started = time.perf_counter()
+        response = self.session.get(f"{self.base_url}/api/{resource}", params=params)
+        response.raise_for_status()
+        rows = len(response.json())
+        elapsed = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return {
+            "mode": "json",
+            "rows": rows,
+            "bytes": len(response.content),
+            "elapsed": round(elapsed, 3),
+            "firstByte": round(response.elapsed.total_seconds(), 3),
+            "rowsPerSecond": round(rows / elapsed, 1) if elapsed else 0.0,
+            "clientPeakMb": round(peak / 1048576, 2),
+        }
+
+    def measure(self, run, metrics_interval: float = 0.25) -> Dict:
+        """Jalankan satu mode sambil men-scrape memori server"""
+        scraper = MetricsScraper(self.base_url, metrics_interval, self.log)
+        scraping = scraper.start()
+        try:
+            result = run()
+        finally:
+            scraper.stop()
+        if scraping and scraper.first:
+            baseline = scraper.first.get("padidoc_process_memory_bytes", {}).get((("type", "rss"),), 0.0)
+            summary = scraper.summary()
+            result["serverPeakRssMb"] = summary["peakRssMb"]
+            result["serverRssGrowthMb"] = round(summary["peakRssMb"] - baseline / 1048576, 1)
+        return result
+
+    def report(self, result: Dict):
+        line = (f"{result['mode']:<12}{result['rows']:>10} baris {result['bytes'] / 1048576:>9.1f} MB "
+                f"{result['elapsed']:>8.2f}s {result['rowsPerSecond']:>11.0f} baris/s "
+                f"first byte {result['firstByte']:.3f}s, klien puncak {result['clientPeakMb']:.1f} MB")
+        if "serverPeakRssMb" in result:
+            line += f", server RSS puncak {result['serverPeakRssMb']} MB (+{result['serverRssGrowthMb']} MB)"
+        self.log(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Download export PadiDoc secara streaming")
+    parser.add_argument("resource", choices=RESOURCES)
+    parser.add_argument("--base-url", default="http://localhost:5000")
+    parser.add_argument("--from", dest="date_from", help="Tanggal awal (inklusif)")
+    parser.add_argument("--to", dest="date_to", help="Tanggal akhir (eksklusif)")
+    parser.add_argument("--jenis-item", help="Filter jenisItem/jenisBarang")
+    parser.add_argument("--format", default="csv", choices=["csv", "xlsx"])
+    parser.add_argument("--out", help="File tujuan (default <resource>.<format>)")
+    parser.add_argument("--benchmark", action="store_true",
+                        help="Bandingkan dengan endpoint list JSON untuk rentang yang sama")
+    parser.add_argument("--max-client-mb", type=float, default=32.0,
+                        help="Gagal jika puncak memori klien saat streaming melebihi batas ini")
+    parser.add_argument("--max-server-growth-mb", type=float, default=0.0,
+                        help="Gagal jika RSS server naik lebih dari batas ini saat streaming (0 = tidak dicek)")
+    parser.add_argument("--json-out", help="Tulis hasil JSON ke file ini")
+    args = parser.parse_args()
+
+    client = ExportClient(args.base_url)
+    path = args.out or f"{args.resource}.{args.format}"
+    try:
+        stream = client.measure(lambda: client.download(args.resource, path, args.date_from, args.date_to,
+                                                        args.jenis_item, args.format))
+        results = [stream]
+        if args.benchmark:
+            results.append(client.measure(lambda: client.fetch_json(args.resource, args.date_from, args.date_to,
+                                                                    args.jenis_item)))
+    except requests.exceptions.ConnectionError:
+        print(f"Error: Cannot connect to server. Make sure the application is running on {args.base_url}")
+        sys.exit(1)
+
+    for result in results:
+        client.report(result)
+    client.log(f"Proses klien: ru_maxrss {peak_rss_mb():.1f} MB, file tersimpan di {path}")
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as handle:
+            json.dump({"resource": args.resource, "from": args.date_from, "to": args.date_to,
+                       "results": results}, handle, indent=2)
+
+    failures = []
+    if stream["clientPeakMb"] > args.max_client_mb:
+        failures.append(f"memori klien {stream['clientPeakMb']} MB > {args.max_client_mb} MB")
+    if args.max_server_growth_mb and stream.get("serverRssGrowthMb", 0) > args.max_server_growth_mb:
+        failures.append(f"RSS server naik {stream['serverRssGrowthMb']} MB > {args.max_server_growth_mb} MB")
+    if args.benchmark and len(results) > 1 and results[1]["rows"] != stream["rows"]:
+        client.log(f"Jumlah baris berbeda: stream {stream['rows']}, JSON {results[1]['rows']}", "WARNING")
+    for failure in failures:
+        client.log(failure, "ERROR")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+"""
+Index Benchmark untuk PadiDoc
+Mengisi Postgres lokal dengan ledger log_stok berukuran besar (default 1 juta baris) beserta
+pembelian/produksi/penjualan yang menjadi referensinya, lalu mengukur query panas sebelum dan
+sesudah index dari sql/indexes/0001_hot_query_indexes.sql dipasang.
+
+Data ditulis ke schema terpisah (default padidoc_bench) sehingga tabel aplikasi tidak tersentuh.
+Butuh driver PostgreSQL: pip install "psycopg[binary]" (atau psycopg2-binary).
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import time
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, List, Tuple
+from urllib.parse import urlparse
+
+MIGRATION = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sql", "indexes", "0001_hot_query_indexes.sql")
+JENIS_ITEM = ("gabah", "beras", "katul", "menir", "sekam")
+LOCAL_HOSTS = {"", "localhost", "127.0.0.1", "::1"}
+BENCH_TABLES = "stok, pembelian, produksi, penjualan, log_stok"
+
+# Kolom mengikuti shared/schema.ts; foreign key sengaja ditiadakan (tidak memengaruhi plan query)
+TABLES = """
+CREATE TABLE stok (
+  id serial PRIMARY KEY, jenis_item text NOT NULL, jumlah numeric(10,2) NOT NULL, satuan text NOT NULL,
+  harga_rata_rata numeric(10,2), batas_minimum numeric(10,2), lokasi text, updated_at timestamp DEFAULT now()
+);
+CREATE TABLE pembelian (
+  id serial PRIMARY KEY, supplier_id integer, tanggal timestamp NOT NULL, jenis_gabah text NOT NULL,
+  jenis_barang text NOT NULL DEFAULT 'gabah', asal_barang text DEFAULT 'pembelian', jumlah numeric(10,2) NOT NULL,
+  harga_per_kg numeric(10,2) NOT NULL, total_harga numeric(12,2) NOT NULL, kadar_air numeric(5,2), kualitas text,
+  status text DEFAULT 'pending', metode_pembayaran text DEFAULT 'cash', catatan text, created_at timestamp DEFAULT now()
+);
+CREATE TABLE produksi (
+  id serial PRIMARY KEY, pengeringan_id integer, tanggal timestamp NOT NULL, jenis_beras_produced text NOT NULL,
+  sumber_bahan text DEFAULT 'pengeringan', pembelian_id integer, jumlah_gabah_input numeric(10,2),
+  jumlah_beras_output numeric(10,2), jumlah_dedak numeric(10,2), jumlah_menir numeric(10,2),
+  jumlah_katul numeric(10,2), jumlah_sekam numeric(10,2), rendemen numeric(5,2), status text DEFAULT 'completed',
+  catatan text, created_at timestamp DEFAULT now()
+);
+CREATE TABLE penjualan (
+  id serial PRIMARY KEY, customer_id integer, tanggal timestamp NOT NULL, jenis_beras text NOT NULL,
+  jenis_barang text NOT NULL DEFAULT 'beras', asal_barang text DEFAULT 'produksi', jumlah numeric(10,2) NOT NULL,
+  harga_per_kg numeric(10,2) NOT NULL, total_harga numeric(12,2) NOT NULL, status text DEFAULT 'completed',
+  metode_pembayaran text DEFAULT 'cash', catatan text, created_at timestamp DEFAULT now()
+);
+CREATE TABLE log_stok (
+  id serial PRIMARY KEY, stok_id integer, jenis_transaksi text NOT NULL, jumlah numeric(10,2) NOT NULL,
+  jumlah_sebelum numeric(10,2), jumlah_sesudah numeric(10,2), referensi_id integer, referensi_tabel text,
+  keterangan text, created_at timestamp DEFAULT now()
+);
+"""
+
+# Transaksi dibuat berurutan waktu dengan sedikit jitter (input mundur tanggal), sehingga
+# korelasi fisik id/tanggal mirip data produksi. {n} = jumlah baris, {span} = detik rentang data.
+SEED_PEMBELIAN = """
+INSERT INTO pembelian (supplier_id, tanggal, jenis_gabah, jenis_barang, jumlah, harga_per_kg, total_harga, created_at)
+SELECT 1 + g % 50, t, 'IR64', 'gabah', j, 6500, j * 6500, t + interval '5 minutes'
+FROM (SELECT g, now() - make_interval(secs => {span}) + make_interval(secs => g::float * {span} / {n} - random() * 172800) AS t,
+             round((500 + random() * 4500)::numeric, 2) AS j
+      FROM generate_series(1, {n}) g) s;
+"""
+SEED_PRODUKSI = """
+INSERT INTO produksi (tanggal, jenis_beras_produced, sumber_bahan, jumlah_gabah_input, jumlah_beras_output,
+                      jumlah_katul, jumlah_menir, jumlah_sekam, rendemen, created_at)
+SELECT t, 'Premium', 'pembelian_langsung', j, round(j * 0.63, 2), round(j * 0.08, 2), round(j * 0.04, 2),
+       round(j * 0.2, 2), 63, t + interval '5 minutes'
+FROM (SELECT g, now() - make_interval(secs => {span}) + make_interval(secs => g::float * {span} / {n} - random() * 172800) AS t,
+             round((2000 + random() * 6000)::numeric, 2) AS j
+      FROM generate_series(1, {n}) g) s;
+"""
+SEED_PENJUALAN = """
+INSERT INTO penjualan (customer_id, tanggal, jenis_beras, jenis_barang, jumlah, harga_per_kg, total_harga, created_at)
+SELECT 1 + g % 50, t, 'Premium', 'beras', j, 12000, j * 12000, t + interval '5 minutes'
+FROM (SELECT g, now() - make_interval(secs => {span}) + make_interval(secs => g::float * {span} / {n} - random() * 172800) AS t,
+             round((100 + random() * 1900)::numeric, 2) AS j
+      FROM generate_series(1, {n}) g) s;
+"""
+# Satu baris log per pembelian/penjualan, lima per produksi (gabah keluar + empat hasil), urut created_at
+SEED_LEDGER = """
+INSERT INTO log_stok (stok_id, jenis_transaksi, jumlah, referensi_id, referensi_tabel, keterangan, created_at)
+SELECT s.id, m.jenis_transaksi, m.jumlah, m.referensi_id, m.referensi_tabel, m.keterangan, m.created_at
+FROM (
+  SELECT 'gabah' AS jenis_item, 'masuk' AS jenis_transaksi, jumlah, id AS referensi_id,
+         'pembelian' AS referensi_tabel, 'Pembelian' AS keterangan, created_at
+  FROM pembelian
+  UNION ALL
+  SELECT o.jenis_item, o.jenis_transaksi, o.jumlah, p.id, 'produksi', 'Produksi', p.created_at
+  FROM produksi p CROSS JOIN LATERAL (VALUES
+    ('gabah', 'keluar', -p.jumlah_gabah_input), ('beras', 'masuk', p.jumlah_beras_output),
+    ('katul', 'masuk', p.jumlah_katul), ('menir', 'masuk', p.jumlah_menir), ('sekam', 'masuk', p.jumlah_sekam)
+  ) AS o(jenis_item, jenis_transaksi, jumlah)
+  UNION ALL
+  SELECT 'beras', 'keluar', -jumlah, id, 'penjualan', 'Penjualan', created_at
+  FROM penjualan
+) m JOIN stok s ON s.jenis_item = m.jenis_item
+ORDER BY m.created_at;
+"""
+
+
+def connect(dsn: str):
+    """Koneksi autocommit (CREATE INDEX CONCURRENTLY tidak boleh di dalam transaksi)"""
+    try:
+        import psycopg
+        return psycopg.connect(dsn, autocommit=True)
+    except ImportError:
+        pass
+    try:
+        import psycopg2
+    except ImportError:
+        raise SystemExit('Driver PostgreSQL tidak ditemukan: pip install "psycopg[binary]" atau psycopg2-binary')
+    connection = psycopg2.connect(dsn)
+    connection.autocommit = True
+    return connection
+
+
+def read_migration(path: str = MIGRATION) -> List[Tuple[str, str]]:
+    """(nama index, statement) dari file SQL index; statement diakhiri `;` dan boleh multi-baris"""
+    with open(path, encoding="utf-8") as handle:
+        text = "\n".join(line for line in handle if not line.strip().startswith("--"))
+    statements = []
+    for statement in text.split(";"):
+        statement = " ".join(statement.split())
+        match = re.search(r"IF NOT EXISTS (\w+) ON", statement)
+        if match:
+            statements.append((match.group(1), statement))
+    return statements
+
+
+def scan_nodes(plan: Dict[str, Any]) -> List[str]:
+    """Jenis scan pada plan EXPLAIN JSON, contoh ['Index Scan pembelian_tanggal_idx']"""
+    nodes = []
+    if "Scan" in plan.get("Node Type", ""):
+        nodes.append(f"{plan['Node Type']} {plan.get('Index Name') or plan.get('Relation Name', '')}".strip())
+    for child in plan.get("Plans", []):
+        nodes.extend(scan_nodes(child))
+    return nodes
+
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+class IndexBenchmark:
+    """Seed ledger besar di schema terpisah lalu bandingkan query panas tanpa dan dengan index"""
+
+    def __init__(self, dsn: str, schema: str = "padidoc_bench", ledger_rows: int = 1_000_000,
+                 days: int = 1095, repeat: int = 50, seed: int = 42):
+        self.connection = connect(dsn)
+        self.schema = schema
+        self.ledger_rows = ledger_rows
+        self.days = days
+        self.repeat = repeat
+        self.random = random.Random(seed)
+        self.counts: Dict[str, int] = {}
+
+    def log(self, message: str, level: str = "INFO"):
+        """Log message dengan timestamp"""
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        print(f"[{timestamp}] {level}: {message}")
+
+    def execute(self, statement: str, params: Tuple = ()) -> List[Tuple]:
+        with self.connection.cursor() as cursor:
+            cursor.execute(statement, params or None)
+            return cursor.fetchall() if cursor.description else []
+
+    def use_schema(self):
+        self.execute(f"CREATE SCHEMA IF NOT EXISTS {self.schema}")
+        self.execute(f"SET search_path TO {self.schema}")
+
+    def transaction_counts(self) -> Dict[str, int]:
+        """Campuran pembelian:produksi:penjualan 5:1:4 -> 14 baris ledger per 10 transaksi"""
+        transactions = self.ledger_rows * 10 // 14
+        return {
+            "pembelian": transactions // 2,
+            "produksi": transactions // 10,
+            "penjualan": transactions * 4 // 10,
+        }
+
+    def seeded_rows(self) -> int:
+        exists = self.execute("SELECT to_regclass('log_stok') IS NOT NULL")[0][0]
+        return self.execute("SELECT count(*) FROM log_stok")[0][0] if exists else -1
+
+    def seed(self, reset: bool = False):
+        self.use_schema()
+        self.counts = self.transaction_counts()
+        existing = self.seeded_rows()
+        expected = self.counts["pembelian"] + 5 * self.counts["produksi"] + self.counts["penjualan"]
+        if existing == expected and not reset:
+            self.log(f"Memakai data schema {self.schema} yang sudah ada ({existing} baris ledger)")
+            return
+
+        self.log(f"Mengisi schema {self.schema}: {self.counts} -> {expected} baris ledger")
+        self.execute(f"DROP SCHEMA IF EXISTS {self.schema} CASCADE")
+        self.use_schema()
+        self.execute(TABLES)
+        for jenis in JENIS_ITEM:
+            self.execute("INSERT INTO stok (jenis_item, jumlah, satuan) VALUES (%s, 0, 'kg')", (jenis,))
+
+        span = self.days * 86400
+        for table, template in (("pembelian", SEED_PEMBELIAN), ("produksi", SEED_PRODUKSI),
+                                ("penjualan", SEED_PENJUALAN)):
+            started = time.perf_counter()
+            self.execute(template.format(n=self.counts[table], span=span))
+            self.log(f"  {table}: {self.counts[table]} baris dalam {time.perf_counter() - started:.1f}s")
+        started = time.perf_counter()
+        self.execute(SEED_LEDGER)
+        self.log(f"  log_stok: {self.seeded_rows()} baris dalam {time.perf_counter() - started:.1f}s")
+
+    def hot_queries(self) -> List[Tuple[str, str, Callable[[], Tuple]]]:
+        """Query panas aplikasi dengan parameter acak (nama, SQL, pembuat parameter)"""
+        first_day = date.today() - timedelta(days=self.days)
+
+        def random_day() -> Tuple:
+            day = first_day + timedelta(days=self.random.randrange(self.days))
+            return (day, day + timedelta(days=1))
+
+        return [
+            ("stok per jenisItem (autoUpdateStok)",
+             "SELECT id FROM stok WHERE jenis_item = %s ORDER BY id LIMIT 1",
+             lambda: (self.random.choice(JENIS_ITEM),)),
+            ("log_stok per referensi produksi",
+             "SELECT id, jumlah FROM log_stok WHERE referensi_tabel = 'produksi' AND referensi_id = %s",
+             lambda: (self.random.randint(1, self.counts["produksi"]),)),
+            ("total harian pembelian",
+             "SELECT coalesce(sum(jumlah), 0), count(*) FROM pembelian WHERE tanggal >= %s AND tanggal < %s",
+             random_day),
+            ("total harian produksi",
+             "SELECT coalesce(sum(jumlah_gabah_input), 0), count(*) FROM produksi WHERE tanggal >= %s AND tanggal < %s",
+             random_day),
+            ("total harian penjualan",
+             "SELECT coalesce(sum(jumlah), 0), count(*) FROM penjualan WHERE tanggal >= %s AND tanggal < %s",
+             random_day),
+            ("pembelian terbaru",
+             "SELECT * FROM pembelian ORDER BY created_at DESC LIMIT 10",
+             lambda: ()),
+            ("penjualan terbaru",
+             "SELECT * FROM penjualan ORDER BY created_at DESC LIMIT 10",
+             lambda: ()),
+        ]
+
+    def measure(self) -> Dict[str, Dict[str, Any]]:
+        results = {}
+        for name, statement, params in self.hot_queries():
+            plan = self.execute(f"EXPLAIN (FORMAT JSON) {statement}", params())[0][0]
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            for _ in range(3):
+                self.execute(statement, params())
+            samples = []
+            for _ in range(self.repeat):
+                values = params()
+                started = time.perf_counter()
+                self.execute(statement, values)
+                samples.append((time.perf_counter() - started) * 1000)
+            results[name] = {
+                "plan": ", ".join(scan_nodes(plan[0]["Plan"])),
+                "p50": round(percentile(samples, 50), 3),
+                "p95": round(percentile(samples, 95), 3),
+            }
+        return results
+
+    def run(self, reset: bool = False) -> Dict[str, Any]:
+        self.seed(reset)
+        migration = read_migration()
+
+        for index_name, _ in migration:
+            self.execute(f"DROP INDEX IF EXISTS {index_name}")
+        self.execute(f"VACUUM ANALYZE {BENCH_TABLES}")
+        self.log("Mengukur query tanpa index...")
+        before = self.measure()
+
+        build = {}
+        for index_name, statement in migration:
+            started = time.perf_counter()
+            self.execute(statement)
+            build[index_name] = round(time.perf_counter() - started, 3)
+            self.log(f"  {index_name} dibangun dalam {build[index_name]:.2f}s")
+        self.execute(f"ANALYZE {BENCH_TABLES}")
+        self.log("Mengukur query dengan index...")
+        after = self.measure()
+
+        return {
+            "schema": self.schema,
+            "ledgerRows": self.seeded_rows(),
+            "transactions": self.counts,
+            "repeat": self.repeat,
+            "indexBuildSeconds": build,
+            "queries": {name: {"before": before[name], "after": after[name]} for name in before},
+        }
+
+    def report(self, result: Dict[str, Any]):
+        self.log(f"Ledger {result['ledgerRows']} baris, {result['repeat']} eksekusi per query (ms):")
+        self.log(f"{'query':<38}{'p50 tanpa':>11}{'p95 tanpa':>11}{'p50 index':>11}{'p95 index':>11}{'speedup':>9}")
+        for name, timings in result["queries"].items():
+            before, after = timings["before"], timings["after"]
+            speedup = before["p50"] / after["p50"] if after["p50"] else 0.0
+            self.log(f"{name:<38}{before['p50']:>11.3f}{before['p95']:>11.3f}"
+                     f"{after['p50']:>11.3f}{after['p95']:>11.3f}{speedup:>8.1f}x")
+            self.log(f"    plan: {before['plan']}  ->  {after['plan']}")
+
+    def drop(self):
+        self.execute(f"DROP SCHEMA IF EXISTS {self.schema} CASCADE")
+        self.log(f"Schema {self.schema} dihapus")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark index query panas PadiDoc pada Postgres lokal")
+    parser.add_argument("--dsn", default=os.environ.get("BENCH_DATABASE_URL") or os.environ.get("DATABASE_URL"),
+                        help="Connection string Postgres (default BENCH_DATABASE_URL / DATABASE_URL)")
+    parser.add_argument("--schema", default="padidoc_bench", help="Schema tempat data benchmark ditulis")
+    parser.add_argument("--ledger-rows", type=int, default=1_000_000, help="Jumlah baris log_stok")
+    parser.add_argument("--days", type=int, default=1095, help="Rentang hari data transaksi")
+    parser.add_argument("--repeat", type=int, default=50, help="Eksekusi per query untuk tiap fase")
+    parser.add_argument("--seed", type=int, default=42, help="Seed parameter query acak")
+    parser.add_argument("--reset", action="store_true", help="Isi ulang data walau schema sudah terisi")
+    parser.add_argument("--drop", action="store_true", help="Hapus schema benchmark setelah selesai")
+    parser.add_argument("--allow-remote", action="store_true", help="Izinkan host selain localhost")
+    parser.add_argument("--json-out", help="Tulis hasil JSON ke file ini")
+    args = parser.parse_args()
+
+    if not args.dsn:
+        raise SystemExit("Isi --dsn atau BENCH_DATABASE_URL/DATABASE_URL")
+    host = urlparse(args.dsn).hostname or ""
+    if host not in LOCAL_HOSTS and not args.allow_remote:
+        raise SystemExit(f"Host {host} bukan lokal; benchmark menulis jutaan baris (pakai --allow-remote jika sengaja)")
+
+    benchmark = IndexBenchmark(args.dsn, args.schema, args.ledger_rows, args.days, args.repeat, args.seed)
+    result = benchmark.run(args.reset)
+    benchmark.report(result)
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as handle:
+            json.dump(result, handle, indent=2)
+        benchmark.log(f"Hasil ditulis ke {args.json_out}")
+    if args.drop:
+        benchmark.drop()
+
+
+if __name__ == "__main__":
+    main()
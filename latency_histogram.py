@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Latency Histogram untuk PadiDoc
+Histogram bucket tetap gaya HDR (log-linear) dengan memori terbatas,
+dipakai untuk mencatat latensi per endpoint dan per method
+"""
+
+import json
+import re
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+PERCENTILES = (50.0, 90.0, 99.0, 99.9)
+
+_NUMERIC_SEGMENT = re.compile(r"/\d+(?=/|$)")
+
+
+class LatencyHistogram:
+    """Histogram latensi dalam mikrodetik dengan presisi relatif tetap
+
+    Setiap rentang pangkat dua dibagi menjadi sub-bucket linear sehingga
+    kesalahan relatif tetap di bawah ~1% untuk 2 digit signifikan, sementara
+    jumlah bucket tetap (sekitar 2.5k counter untuk rentang 1us-60s).
+    """
+
+    def __init__(self, highest_us: int = 60_000_000, significant_figures: int = 2):
+        if not 1 <= significant_figures <= 5:
+            raise ValueError("significant_figures harus antara 1 dan 5")
+        self.highest_us = highest_us
+        self.significant_figures = significant_figures
+        sub_bucket_count = 1
+        while sub_bucket_count < 2 * 10 ** significant_figures:
+            sub_bucket_count <<= 1
+        self._sub_bits = sub_bucket_count.bit_length() - 1
+        self._half_bits = self._sub_bits - 1
+        self._half_count = 1 << self._half_bits
+        bucket_count = max(0, highest_us.bit_length() - self._sub_bits) + 1
+        self.counts: List[int] = [0] * ((bucket_count + 1) << self._half_bits)
+        self.total = 0
+        self.overflow = 0
+        self.min_us: Optional[int] = None
+        self.max_us = 0
+        self.sum_us = 0
+
+    def _index(self, value: int) -> int:
+        bucket = max(0, value.bit_length() - self._sub_bits)
+        return (bucket << self._half_bits) + (value >> bucket)
+
+    def _highest_equivalent(self, index: int) -> int:
+        if index < (1 << self._sub_bits):
+            return index
+        bucket = (index >> self._half_bits) - 1
+        sub = index - (bucket << self._half_bits)
+        return ((sub + 1) << bucket) - 1
+
+    def record(self, value_us: int, count: int = 1):
+        """Catat satu nilai latensi dalam mikrodetik"""
+        value = max(0, int(value_us))
+        if value > self.highest_us:
+            self.overflow += count
+            value = self.highest_us
+        self.counts[self._index(value)] += count
+        self.total += count
+        self.sum_us += value * count
+        self.max_us = max(self.max_us, value)
+        self.min_us = value if self.min_us is None else min(self.min_us, value)
+
+    def record_seconds(self, seconds: float):
+        self.record(int(seconds * 1_000_000))
+
+    def merge(self, other: "LatencyHistogram"):
+        """Gabungkan histogram lain dengan konfigurasi yang sama"""
+        if len(other.counts) != len(self.counts):
+            raise ValueError("Konfigurasi histogram tidak sama")
+        for index, count in enumerate(other.counts):
+            if count:
+                self.counts[index] += count
+        self.total += other.total
+        self.overflow += other.overflow
+        self.sum_us += other.sum_us
+        self.max_us = max(self.max_us, other.max_us)
+        if other.min_us is not None:
+            self.min_us = other.min_us if self.min_us is None else min(self.min_us, other.min_us)
+
+    def value_at_percentile(self, percentile: float) -> int:
+        """Nilai latensi (us) pada persentil tertentu"""
+        if self.total == 0:
+            return 0
+        target = max(1, int(round(percentile / 100.0 * self.total + 0.5 - 1e-9)))
+        running = 0
+        for index, count in enumerate(self.counts):
+            running += count
+            if running >= target:
+                return min(self._highest_equivalent(index), self.max_us)
+        return self.max_us
+
+    @property
+    def mean_us(self) -> float:
+        return self.sum_us / self.total if self.total else 0.0
+
+    def summary(self) -> Dict[str, float]:
+        """Ringkasan dalam milidetik untuk laporan dan JSON"""
+        result: Dict[str, float] = {"count": self.total}
+        for percentile in PERCENTILES:
+            result[_percentile_key(percentile)] = round(self.value_at_percentile(percentile) / 1000.0, 3)
+        result["min"] = round((self.min_us or 0) / 1000.0, 3)
+        result["max"] = round(self.max_us / 1000.0, 3)
+        result["mean"] = round(self.mean_us / 1000.0, 3)
+        if self.overflow:
+            result["overflow"] = self.overflow
+        return result
+
+
+def _percentile_key(percentile: float) -> str:
+    # 50 -> p50, 99.9 -> p999
+    return "p" + f"{percentile:g}".replace(".", "")
+
+
+def normalize_endpoint(path: str) -> str:
+    """Samakan path dengan ID numerik, contoh /api/pembelian/12 -> /api/pembelian/:id"""
+    return _NUMERIC_SEGMENT.sub("/:id", path.split("?", 1)[0])
+
+
+class LatencyRecorder:
+    """Kumpulan histogram per (method, endpoint)"""
+
+    def __init__(self, highest_us: int = 60_000_000, significant_figures: int = 2):
+        self.highest_us = highest_us
+        self.significant_figures = significant_figures
+        self.histograms: Dict[Tuple[str, str], LatencyHistogram] = {}
+
+    def histogram(self, method: str, path: str) -> LatencyHistogram:
+        key = (method.upper(), normalize_endpoint(path))
+        if key not in self.histograms:
+            self.histograms[key] = LatencyHistogram(self.highest_us, self.significant_figures)
+        return self.histograms[key]
+
+    def record(self, method: str, path: str, seconds: float):
+        self.histogram(method, path).record_seconds(seconds)
+
+    def merge(self, other: "LatencyRecorder"):
+        for (method, path), histogram in other.histograms.items():
+            self.histogram(method, path).merge(histogram)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        return {f"{method} {path}": histogram.summary()
+                for (method, path), histogram in sorted(self.histograms.items())}
+
+    def report(self, log: Callable[[str], None] = print):
+        """Cetak tabel persentil latensi (ms) per endpoint"""
+        columns = [_percentile_key(p) for p in PERCENTILES]
+        log(f"{'endpoint':<36}{'count':>8}" + "".join(f"{c:>10}" for c in columns) + f"{'max':>10}")
+        for name, stats in self.summary().items():
+            log(f"{name:<36}{stats['count']:>8}" + "".join(f"{stats[c]:>10.2f}" for c in columns)
+                + f"{stats['max']:>10.2f}")
+
+    def to_json(self, label: str = "", extra: Optional[Dict] = None) -> Dict:
+        """Ringkasan JSON yang stabil agar mudah di-diff antar build"""
+        data = {
+            "label": label,
+            "generatedAt": datetime.now().isoformat(timespec="seconds"),
+            "unit": "ms",
+            "endpoints": self.summary(),
+        }
+        if extra:
+            data.update(extra)
+        return data
+
+    def write_json(self, path: str, label: str = "", extra: Optional[Dict] = None):
+        with open(path, "w", encoding="utf-8") as handle:
+            json.dump(self.to_json(label, extra), handle, indent=2, sort_keys=True)
+            handle.write("\n")
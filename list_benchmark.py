@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+List Benchmark untuk PadiDoc
+Mengukur latensi cold-start (request pertama setelah server dinyalakan) dan steady-state
+endpoint GET list, beserta jumlah query dan penulisan database per request dari
+/api/internal/metrics, lalu membandingkannya dengan ringkasan JSON build sebelumnya
+"""
+
+import json
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from latency_histogram import LatencyHistogram
+from metrics_scraper import MetricsScraper
+
+LIST_ENDPOINTS = ("/api/suppliers", "/api/customers", "/api/pembelian", "/api/penjualan",
+                  "/api/pengeringan", "/api/produksi", "/api/stok")
+
+WRITE_PREFIXES = ("insert", "update", "delete")
+
+
+def query_totals(samples: Optional[Dict]) -> Tuple[float, float]:
+    """Total query dan query tulis dari satu scrape metrik"""
+    if not samples:
+        return 0.0, 0.0
+    total = writes = 0.0
+    for labels, value in samples.get("padidoc_db_query_duration_seconds_count", {}).items():
+        total += value
+        if dict(labels).get("statement", "").lstrip().lower().startswith(WRITE_PREFIXES):
+            writes += value
+    return total, writes
+
+
+class ListEndpointBenchmark:
+    """Cold-start vs steady-state untuk endpoint list lewat API publik"""
+
+    def __init__(self, tester, endpoints: List[str] = None, repeats: int = 200):
+        self.tester = tester
+        self.endpoints = endpoints or list(LIST_ENDPOINTS)
+        self.repeats = repeats
+        # Scrape manual di sekitar tiap fase, bukan thread latar
+        self.scraper = MetricsScraper(tester.base_url, log=tester.log)
+
+    def _get(self, endpoint: str) -> Tuple[float, int, int]:
+        started = time.perf_counter()
+        response = self.tester.session.get(f"{self.tester.base_url}{endpoint}")
+        elapsed = time.perf_counter() - started
+        rows = len(response.json()) if response.ok else 0
+        return elapsed, response.status_code, rows
+
+    def _measure(self, endpoint: str, count: int) -> Dict[str, Any]:
+        before = query_totals(self.scraper.scrape())
+        histogram = LatencyHistogram()
+        rows, statuses = 0, {}
+        for _ in range(count):
+            elapsed, status, rows = self._get(endpoint)
+            histogram.record_seconds(elapsed)
+            statuses[status] = statuses.get(status, 0) + 1
+        after = query_totals(self.scraper.scrape())
+        summary = histogram.summary()
+        summary["p95"] = round(histogram.value_at_percentile(95.0) / 1000.0, 3)
+        result = {"latencyMs": summary, "rows": rows, "statuses": statuses}
+        if after[0]:
+            result["queriesPerRequest"] = round((after[0] - before[0]) / count, 2)
+            result["writesPerRequest"] = round((after[1] - before[1]) / count, 2)
+        return result
+
+    def run(self) -> Dict[str, Dict[str, Any]]:
+        """Request pertama tiap endpoint dihitung sebagai cold, sisanya steady-state"""
+        results: Dict[str, Dict[str, Any]] = {}
+        for endpoint in self.endpoints:
+            cold = self._measure(endpoint, 1)
+            steady = self._measure(endpoint, self.repeats)
+            results[endpoint] = {"cold": cold, "steady": steady}
+        return results
+
+    def report(self, results: Dict[str, Dict[str, Any]]):
+        log = self.tester.log
+        log(f"{'endpoint':<20}{'cold ms':>10}{'q/req':>7}{'w/req':>7}{'rows':>8}"
+            f"{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'q/req':>7}")
+        for endpoint, result in results.items():
+            cold, steady = result["cold"], result["steady"]
+            log(f"{endpoint:<20}{cold['latencyMs']['max']:>10.2f}{cold.get('queriesPerRequest', '-'):>7}"
+                f"{cold.get('writesPerRequest', '-'):>7}{cold['rows']:>8}"
+                f"{steady['latencyMs']['p50']:>10.2f}{steady['latencyMs']['p95']:>10.2f}"
+                f"{steady['latencyMs']['p99']:>10.2f}{steady.get('queriesPerRequest', '-'):>7}")
+            if cold.get("writesPerRequest"):
+                log(f"{endpoint} menulis ke database saat GET pertama", "WARNING")
+
+
+def compare_list_baseline(results: Dict[str, Dict[str, Any]], baseline_path: str, log) -> Dict[str, Dict[str, float]]:
+    """Perbandingan cold dan steady p95 terhadap ringkasan --json-out build sebelumnya"""
+    with open(baseline_path, encoding="utf-8") as handle:
+        baseline = json.load(handle).get("listBenchmark", {})
+
+    def ratio(old: float, new: float) -> float:
+        return old / new if new else 0.0
+
+    speedups: Dict[str, Dict[str, float]] = {}
+    log(f"{'endpoint':<20}{'cold base':>11}{'cold':>9}{'x':>7}{'p95 base':>10}{'p95':>9}{'x':>7}")
+    for endpoint, result in results.items():
+        old = baseline.get(endpoint)
+        if not old:
+            log(f"{endpoint:<20} (tidak ada di baseline)")
+            continue
+        cold_old, cold_new = old["cold"]["latencyMs"]["max"], result["cold"]["latencyMs"]["max"]
+        p95_old, p95_new = old["steady"]["latencyMs"]["p95"], result["steady"]["latencyMs"]["p95"]
+        speedups[endpoint] = {"cold": ratio(cold_old, cold_new), "steadyP95": ratio(p95_old, p95_new)}
+        log(f"{endpoint:<20}{cold_old:>11.2f}{cold_new:>9.2f}{speedups[endpoint]['cold']:>6.1f}x"
+            f"{p95_old:>10.2f}{p95_new:>9.2f}{speedups[endpoint]['steadyP95']:>6.1f}x")
+    return speedups
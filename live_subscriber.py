@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+Live Subscriber untuk PadiDoc
+Membuka ratusan koneksi Server-Sent Events ke /api/live, lalu menembakkan pembelian
+dan mengukur latensi dari request tulis sampai notifikasi stok diterima tiap klien
+"""
+
+import asyncio
+import json
+import ssl
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import urlsplit
+
+from latency_histogram import LatencyHistogram
+from load_engine import AsyncHttpPool
+
+
+def p95_ms(histogram: LatencyHistogram) -> float:
+    return round(histogram.value_at_percentile(95.0) / 1000.0, 3)
+
+
+class SseSubscriber:
+    """Satu koneksi SSE; mencatat waktu tiba setiap referensi dokumen di event stok"""
+
+    def __init__(self, base_url: str, topics: str = "stok,dashboard"):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname or "localhost"
+        self.tls = parts.scheme == "https"
+        self.port = parts.port or (443 if self.tls else 80)
+        self.topics = topics
+        self.arrivals: Dict[str, float] = {}
+        self.events: Dict[str, int] = {}
+        self.truncated = 0
+        self.connect_seconds = 0.0
+        self.error: Optional[str] = None
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._chunked = False
+        self._buffer = b""
+
+    async def connect(self, timeout: float = 30.0):
+        """Buka stream dan tunggu sampai event snapshot awal diterima"""
+        started = time.perf_counter()
+        ssl_ctx = ssl.create_default_context() if self.tls else None
+        self._reader, self._writer = await asyncio.open_connection(self.host, self.port, ssl=ssl_ctx)
+        self._writer.write((
+            f"GET /api/live?topics={self.topics} HTTP/1.1\r\n"
+            f"Host: {self.host}:{self.port}\r\n"
+            "Accept: text/event-stream\r\n"
+            "Cache-Control: no-cache\r\n\r\n"
+        ).encode("latin-1"))
+        await self._writer.drain()
+
+        status_line = await asyncio.wait_for(self._reader.readline(), timeout)
+        status = int(status_line.split(b" ", 2)[1]) if status_line else 0
+        headers: Dict[str, str] = {}
+        while True:
+            line = await self._reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            key, _, value = line.decode("latin-1").partition(":")
+            headers[key.strip().lower()] = value.strip()
+        if status != 200:
+            raise ConnectionError(f"/api/live mengembalikan HTTP {status}")
+        self._chunked = headers.get("transfer-encoding", "").lower() == "chunked"
+
+        while "snapshot" not in self.events:
+            await asyncio.wait_for(self._read_events(), timeout)
+        self.connect_seconds = time.perf_counter() - started
+
+    async def _read_data(self) -> bytes:
+        if not self._chunked:
+            data = await self._reader.read(1 << 16)
+            if not data:
+                raise ConnectionResetError("Stream live ditutup server")
+            return data
+        size_line = await self._reader.readline()
+        size = int(size_line.split(b";", 1)[0].strip() or b"0", 16)
+        if size == 0:
+            raise ConnectionResetError("Stream live ditutup server")
+        data = await self._reader.readexactly(size)
+        await self._reader.readexactly(2)
+        return data
+
+    async def _read_events(self):
+        self._buffer += await self._read_data()
+        received = time.perf_counter()
+        while b"\n\n" in self._buffer:
+            block, self._buffer = self._buffer.split(b"\n\n", 1)
+            event, data = "message", []
+            for line in block.decode("utf-8").split("\n"):
+                if line.startswith("event:"):
+                    event = line[6:].strip()
+                elif line.startswith("data:"):
+                    data.append(line[5:].lstrip())
+            if not data:
+                continue  # komentar heartbeat atau retry
+            self.events[event] = self.events.get(event, 0) + 1
+            if event == "stok":
+                for item in json.loads("\n".join(data))["items"]:
+                    self.truncated += item.get("truncated") or 0
+                    for ref in item["referensi"]:
+                        self.arrivals.setdefault(ref, received)
+
+    async def listen(self):
+        try:
+            while True:
+                await self._read_events()
+        except asyncio.CancelledError:
+            pass
+        except (ConnectionError, asyncio.IncompleteReadError, OSError) as error:
+            self.error = str(error) or type(error).__name__
+
+    def close(self):
+        if self._writer:
+            self._writer.close()
+
+
+@dataclass
+class LiveLatencyResult:
+    """Hasil satu run latensi push live"""
+    clients: int
+    connected: int
+    writes: int
+    failed_writes: int
+    elapsed: float
+    notify: LatencyHistogram
+    write: LatencyHistogram
+    connect: LatencyHistogram
+    missed: int
+    truncated: int
+    disconnected: int
+    events: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def delivered_ratio(self) -> float:
+        expected = self.connected * (self.writes - self.failed_writes)
+        return (expected - self.missed) / expected if expected else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "clients": self.clients,
+            "connected": self.connected,
+            "writes": self.writes,
+            "failedWrites": self.failed_writes,
+            "elapsed": round(self.elapsed, 3),
+            "writeToNotifyMs": {**self.notify.summary(), "p95": p95_ms(self.notify)},
+            "writeMs": self.write.summary(),
+            "connectMs": self.connect.summary(),
+            "missed": self.missed,
+            "truncated": self.truncated,
+            "disconnected": self.disconnected,
+            "deliveredRatio": round(self.delivered_ratio, 4),
+            "events": self.events,
+        }
+
+
+class LiveLatencyProbe:
+    """Ukur latensi tulis -> notifikasi /api/live dengan banyak klien sekaligus"""
+
+    def __init__(self, tester, clients: int = 200, writes: int = 200, rate: float = 20.0,
+                 concurrency: int = 16, settle: float = 5.0, topics: str = "stok,dashboard",
+                 payload: Optional[Callable[[int], Dict]] = None):
+        self.tester = tester
+        self.clients = clients
+        self.writes = writes
+        self.rate = rate
+        self.concurrency = concurrency
+        self.settle = settle
+        self.topics = topics
+        self.payload = payload or (lambda i: tester.build_pembelian_payload(tester.suppliers[i % len(tester.suppliers)], i))
+
+    async def _connect_all(self) -> List[SseSubscriber]:
+        subscribers = [SseSubscriber(self.tester.base_url, self.topics) for _ in range(self.clients)]
+        # Buka koneksi bertahap agar accept backlog server tidak meluap
+        gate = asyncio.Semaphore(50)
+
+        async def open_one(subscriber: SseSubscriber):
+            async with gate:
+                try:
+                    await subscriber.connect()
+                except (ConnectionError, OSError, asyncio.TimeoutError) as error:
+                    subscriber.error = str(error) or type(error).__name__
+                    subscriber.close()
+
+        await asyncio.gather(*(open_one(subscriber) for subscriber in subscribers))
+        return subscribers
+
+    async def _run(self) -> LiveLatencyResult:
+        subscribers = await self._connect_all()
+        connected = [subscriber for subscriber in subscribers if subscriber.error is None]
+        listeners = [asyncio.create_task(subscriber.listen()) for subscriber in connected]
+        self.tester.log(f"{len(connected)}/{self.clients} klien live terhubung")
+
+        pool = AsyncHttpPool(self.tester.base_url, self.concurrency)
+        sent: Dict[str, float] = {}
+        write_latency = LatencyHistogram()
+        failed = 0
+
+        async def write(index: int):
+            nonlocal failed
+            started = time.perf_counter()
+            try:
+                response = await pool.request("POST", "/api/pembelian", self.payload(index))
+            except (ConnectionError, OSError, asyncio.TimeoutError):
+                failed += 1
+                return
+            write_latency.record_seconds(time.perf_counter() - started)
+            if response.ok:
+                sent[f"pembelian:{response.json()['id']}"] = started
+            else:
+                failed += 1
+
+        started = time.perf_counter()
+        tasks = []
+        for index in range(self.writes):
+            tasks.append(asyncio.create_task(write(index + 1)))
+            await asyncio.sleep(1.0 / self.rate)
+        await asyncio.gather(*tasks)
+
+        # Beri waktu notifikasi terakhir sampai ke semua klien
+        deadline = time.perf_counter() + self.settle
+        while time.perf_counter() < deadline:
+            if all(ref in subscriber.arrivals for subscriber in connected if subscriber.error is None for ref in sent):
+                break
+            await asyncio.sleep(0.05)
+        elapsed = time.perf_counter() - started
+
+        for task in listeners:
+            task.cancel()
+        await asyncio.gather(*listeners)
+        for subscriber in subscribers:
+            subscriber.close()
+        await pool.close()
+
+        notify = LatencyHistogram()
+        connect = LatencyHistogram()
+        missed = 0
+        events: Dict[str, int] = {}
+        for subscriber in connected:
+            connect.record_seconds(subscriber.connect_seconds)
+            for event, count in subscriber.events.items():
+                events[event] = events.get(event, 0) + count
+            for ref, sent_at in sent.items():
+                arrived = subscriber.arrivals.get(ref)
+                if arrived is None:
+                    missed += 1
+                else:
+                    notify.record_seconds(max(0.0, arrived - sent_at))
+
+        return LiveLatencyResult(
+            clients=self.clients,
+            connected=len(connected),
+            writes=self.writes,
+            failed_writes=failed,
+            elapsed=elapsed,
+            notify=notify,
+            write=write_latency,
+            connect=connect,
+            missed=missed,
+            truncated=sum(subscriber.truncated for subscriber in connected),
+            disconnected=sum(1 for subscriber in connected if subscriber.error is not None),
+            events=events,
+        )
+
+    def run(self) -> LiveLatencyResult:
+        return self.tester.run_with_metrics(self._run())
+
+    def report(self, result: LiveLatencyResult):
+        log = self.tester.log
+        notify, write = result.notify.summary(), result.write.summary()
+        log(f"Klien: {result.connected}/{result.clients} terhubung, {result.disconnected} terputus, "
+            f"connect p95 {p95_ms(result.connect)} ms")
+        log(f"Tulis: {result.writes} pembelian ({result.failed_writes} gagal) dalam {result.elapsed:.1f}s, "
+            f"p50 {write['p50']} ms, p99 {write['p99']} ms")
+        log(f"Tulis -> notifikasi: p50 {notify['p50']} ms, p95 {p95_ms(result.notify)} ms, p99 {notify['p99']} ms, "
+            f"max {notify['max']} ms ({notify['count']} notifikasi)")
+        stok_events = result.events.get("stok", 0)
+        per_event = notify["count"] / stok_events if stok_events else 0.0
+        log(f"Event: {result.events} - rata-rata {per_event:.1f} penulisan per event stok (penggabungan)")
+        level = "INFO" if result.missed == 0 else "WARNING"
+        log(f"Terkirim {result.delivered_ratio * 100:.2f}%, hilang {result.missed}, "
+            f"referensi terpotong {result.truncated}", level)
@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+Load Engine untuk PadiDoc
+Engine asyncio open-loop dengan pool koneksi keep-alive untuk menguji
+jalur tulis /api/pembelian, /api/produksi dan /api/penjualan di bawah beban
+"""
+
+import asyncio
+import json
+import random
+import ssl
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from latency_histogram import LatencyRecorder
+
+
+class HttpResponse:
+    """Response HTTP sederhana dari AsyncHttpPool"""
+
+    def __init__(self, status: int, headers: Dict[str, str], body: bytes):
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+    @property
+    def ok(self) -> bool:
+        return 200 <= self.status < 300
+
+    @property
+    def text(self) -> str:
+        return self.body.decode("utf-8", errors="replace")
+
+    def json(self) -> Any:
+        return json.loads(self.body) if self.body else {}
+
+
+class AsyncHttpPool:
+    """Pool koneksi HTTP/1.1 keep-alive berbasis asyncio streams"""
+
+    def __init__(self, base_url: str, size: int = 64, timeout: float = 30.0):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname or "localhost"
+        self.tls = parts.scheme == "https"
+        self.port = parts.port or (443 if self.tls else 80)
+        self.size = size
+        self.timeout = timeout
+        self._idle: List[Tuple[asyncio.StreamReader, asyncio.StreamWriter]] = []
+        self._slots = asyncio.Semaphore(size)
+        self.opened = 0
+
+    async def _open(self) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        ssl_ctx = ssl.create_default_context() if self.tls else None
+        reader, writer = await asyncio.open_connection(self.host, self.port, ssl=ssl_ctx)
+        self.opened += 1
+        return reader, writer
+
+    def _encode(self, method: str, path: str, data: Any, headers: Optional[Dict[str, str]]) -> bytes:
+        # str/bytes dikirim apa adanya (mis. NDJSON/CSV), selain itu di-encode sebagai JSON
+        if isinstance(data, (str, bytes)):
+            body = data.encode("utf-8") if isinstance(data, str) else data
+        else:
+            body = b"" if data is None else json.dumps(data).encode("utf-8")
+        lines = [
+            f"{method.upper()} {path} HTTP/1.1",
+            f"Host: {self.host}:{self.port}",
+            "Connection: keep-alive",
+            "Accept: */*",
+        ]
+        if data is not None and not any(key.lower() == "content-type" for key in (headers or {})):
+            lines.append("Content-Type: application/json")
+        if data is not None or method.upper() in ("POST", "PUT", "PATCH"):
+            lines.append(f"Content-Length: {len(body)}")
+        for key, value in (headers or {}).items():
+            lines.append(f"{key}: {value}")
+        return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body
+
+    async def _read_head(self, reader: asyncio.StreamReader) -> Tuple[str, int, Dict[str, str]]:
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionResetError("Koneksi ditutup oleh server")
+        version, status, *_ = status_line.decode("latin-1").split(" ", 2)
+        headers: Dict[str, str] = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            key, _, value = line.decode("latin-1").partition(":")
+            headers[key.strip().lower()] = value.strip()
+        return version, int(status), headers
+
+    async def _read_chunked(self, reader: asyncio.StreamReader) -> bytes:
+        chunks = []
+        while True:
+            size_line = await reader.readline()
+            size = int(size_line.split(b";", 1)[0].strip() or b"0", 16)
+            if size == 0:
+                # Buang trailer sampai baris kosong
+                while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    pass
+                return b"".join(chunks)
+            chunks.append(await reader.readexactly(size))
+            await reader.readexactly(2)
+
+    async def _roundtrip(self, conn, method: str, payload: bytes) -> Tuple[HttpResponse, bool]:
+        reader, writer = conn
+        writer.write(payload)
+        await writer.drain()
+        version, status, headers = await self._read_head(reader)
+        keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+
+        if method.upper() == "HEAD" or status in (204, 304) or 100 <= status < 200:
+            body = b""
+        elif headers.get("transfer-encoding", "").lower() == "chunked":
+            body = await self._read_chunked(reader)
+        elif "content-length" in headers:
+            body = await reader.readexactly(int(headers["content-length"]))
+        else:
+            body = await reader.read()
+            keep_alive = False
+        return HttpResponse(status, headers, body), keep_alive
+
+    async def request(self, method: str, path: str, data: Any = None,
+                      headers: Optional[Dict[str, str]] = None) -> HttpResponse:
+        """Kirim satu request memakai koneksi idle dari pool bila tersedia"""
+        payload = self._encode(method, path, data, headers)
+        async with self._slots:
+            for attempt in range(2):
+                reused = bool(self._idle)
+                conn = self._idle.pop() if reused else await self._open()
+                try:
+                    response, keep_alive = await asyncio.wait_for(
+                        self._roundtrip(conn, method, payload), self.timeout
+                    )
+                except (ConnectionError, asyncio.IncompleteReadError) as error:
+                    conn[1].close()
+                    # Koneksi keep-alive bisa sudah ditutup server saat idle, coba sekali lagi
+                    if reused and attempt == 0:
+                        continue
+                    raise ConnectionError(str(error)) from error
+                except BaseException:
+                    conn[1].close()
+                    raise
+                if keep_alive:
+                    self._idle.append(conn)
+                else:
+                    conn[1].close()
+                return response
+        raise ConnectionError("Request gagal setelah retry")
+
+    async def close(self):
+        """Tutup semua koneksi idle"""
+        while self._idle:
+            _, writer = self._idle.pop()
+            writer.close()
+
+
+@dataclass
+class Operation:
+    """Satu jenis transaksi dalam campuran beban"""
+    name: str
+    method: str
+    path: str
+    payload: Callable[[], Optional[Dict]]
+    weight: float = 1.0
+    headers: Optional[Dict[str, str]] = None
+
+
+@dataclass
+class EndpointStats:
+    """Statistik per endpoint selama satu run"""
+    name: str
+    sent: int = 0
+    ok: int = 0
+    client_errors: int = 0
+    server_errors: int = 0
+    transport_errors: int = 0
+    dropped: int = 0
+    status_counts: Dict[int, int] = field(default_factory=dict)
+
+    def record(self, status: Optional[int]):
+        if status is None:
+            self.transport_errors += 1
+            return
+        self.status_counts[status] = self.status_counts.get(status, 0) + 1
+        if 200 <= status < 300:
+            self.ok += 1
+        elif status < 500:
+            self.client_errors += 1
+        else:
+            self.server_errors += 1
+
+    @property
+    def completed(self) -> int:
+        return self.ok + self.client_errors + self.server_errors + self.transport_errors
+
+
+class LoadEngine:
+    """Generator beban open-loop: kedatangan request tidak menunggu response sebelumnya"""
+
+    def __init__(self, base_url: str, operations: List[Operation], rate: float,
+                 duration: float, concurrency: int = 64, max_outstanding: Optional[int] = None,
+                 arrival: str = "poisson", rng: Optional[random.Random] = None,
+                 log: Callable[[str], None] = print):
+        if rate <= 0 or duration <= 0:
+            raise ValueError("rate dan duration harus lebih dari 0")
+        if not operations:
+            raise ValueError("Minimal satu operasi diperlukan")
+        self.base_url = base_url
+        self.operations = operations
+        self.rate = rate
+        self.duration = duration
+        self.concurrency = concurrency
+        self.max_outstanding = max_outstanding or concurrency * 16
+        self.arrival = arrival
+        self.rng = rng or random.Random()
+        self.log = log
+        self.stats: Dict[str, EndpointStats] = {op.name: EndpointStats(op.name) for op in operations}
+        self.latency = LatencyRecorder()
+        # Request gagal (non-2xx atau error transport) dicatat terpisah agar tidak menggeser p50/p99
+        self.error_latency = LatencyRecorder()
+        self.dropped = 0
+        self.elapsed = 0.0
+        self._weights = [op.weight for op in operations]
+
+    def _next_gap(self) -> float:
+        if self.arrival == "constant":
+            return 1.0 / self.rate
+        return self.rng.expovariate(self.rate)
+
+    async def _fire(self, pool: AsyncHttpPool, op: Operation, scheduled: float):
+        stats = self.stats[op.name]
+        try:
+            response = await pool.request(op.method, op.path, op.payload(), op.headers)
+            status: Optional[int] = response.status
+        except (ConnectionError, OSError, asyncio.TimeoutError):
+            status = None
+        self.on_complete(op, status, scheduled, time.perf_counter())
+        stats.record(status)
+
+    def on_complete(self, op: Operation, status: Optional[int], scheduled: float, finished: float):
+        """Catat latensi dari waktu kedatangan terjadwal (bebas coordinated omission)"""
+        ok = status is not None and 200 <= status < 300
+        recorder = self.latency if ok else self.error_latency
+        recorder.record(op.method, op.path, finished - scheduled)
+
+    async def run(self) -> Dict[str, EndpointStats]:
+        """Jalankan beban selama `duration` detik pada laju `rate` request/detik"""
+        pool = AsyncHttpPool(self.base_url, size=self.concurrency)
+        pending = set()
+        start = time.perf_counter()
+        deadline = start + self.duration
+        next_arrival = start
+
+        try:
+            while next_arrival < deadline:
+                now = time.perf_counter()
+                if next_arrival > now:
+                    await asyncio.sleep(next_arrival - now)
+                # Kirim semua kedatangan yang sudah jatuh tempo dalam satu batch
+                now = time.perf_counter()
+                while next_arrival <= now and next_arrival < deadline:
+                    op = self.rng.choices(self.operations, weights=self._weights)[0]
+                    stats = self.stats[op.name]
+                    stats.sent += 1
+                    if len(pending) >= self.max_outstanding:
+                        self.dropped += 1
+                        stats.dropped += 1
+                    else:
+                        task = asyncio.ensure_future(self._fire(pool, op, next_arrival))
+                        pending.add(task)
+                        task.add_done_callback(pending.discard)
+                    next_arrival += self._next_gap()
+            if pending:
+                await asyncio.wait(pending)
+        finally:
+            self.elapsed = time.perf_counter() - start
+            await pool.close()
+
+        return self.stats
+
+    def report(self):
+        """Cetak throughput berkelanjutan per endpoint"""
+        elapsed = self.elapsed or self.duration
+        offered = sum(s.sent for s in self.stats.values())
+        completed_ok = sum(s.ok for s in self.stats.values())
+        self.log(f"Durasi {elapsed:.1f}s, ditawarkan {offered / self.duration:.0f} req/s, "
+                 f"berhasil {completed_ok / elapsed:.0f} req/s, dibuang {self.dropped}")
+        self.log(f"{'endpoint':<28}{'sent':>8}{'2xx':>8}{'4xx':>8}{'5xx':>8}{'err':>8}{'drop':>8}{'ok/s':>10}")
+        for s in self.stats.values():
+            self.log(f"{s.name:<28}{s.sent:>8}{s.ok:>8}{s.client_errors:>8}{s.server_errors:>8}"
+                     f"{s.transport_errors:>8}{s.dropped:>8}{s.ok / elapsed:>10.1f}")
+        self.latency.report(self.log)
+        if self.error_latency.histograms:
+            self.log("Latensi request gagal (non-2xx dan error transport):")
+            self.error_latency.report(self.log)
+
+    def summary(self) -> Dict[str, Any]:
+        """Ringkasan throughput per endpoint untuk JSON"""
+        elapsed = self.elapsed or self.duration
+        return {
+            "rate": self.rate,
+            "duration": self.duration,
+            "concurrency": self.concurrency,
+            "dropped": self.dropped,
+            "throughput": {s.name: round(s.ok / elapsed, 2) for s in self.stats.values()},
+            "statusCounts": {s.name: {str(k): v for k, v in sorted(s.status_counts.items())}
+                             for s in self.stats.values()},
+            "errorLatency": self.error_latency.summary(),
+        }
+
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    """Parse campuran transaksi, contoh: 'pembelian=5,produksi=1,penjualan=4'"""
+    weights: Dict[str, float] = {}
+    for part in mix.split(","):
+        if not part.strip():
+            continue
+        name, _, weight = part.partition("=")
+        weights[name.strip()] = float(weight or 1)
+    return weights
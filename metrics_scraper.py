@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Metrics Scraper untuk PadiDoc
+Mengambil /api/internal/metrics (format teks Prometheus) secara berkala selama run beban,
+lalu melaporkan waktu tunggu pool, query in-flight, statement terlambat dan latensi per route
+dari selisih histogram antara scrape pertama dan terakhir.
+Endpoint /api/internal/* butuh token: isi METRICS_TOKEN dengan nilai yang sama seperti di server.
+"""
+
+import math
+import os
+import re
+import threading
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import requests
+
+METRICS_ENDPOINT = "/api/internal/metrics"
+
+_SAMPLE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(?:\{(.*)\})?\s+(\S+)')
+_LABEL = re.compile(r'([a-zA-Z_][a-zA-Z0-9_]*)="((?:[^"\\]|\\.)*)"')
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def internal_headers() -> Dict[str, str]:
+    """Header Authorization untuk /api/internal/* dari env METRICS_TOKEN (kosong jika tidak di-set)"""
+    token = os.environ.get("METRICS_TOKEN")
+    return {"Authorization": f"Bearer {token}"} if token else {}
+
+
+def _unescape(value: str) -> str:
+    return value.replace('\\n', '\n').replace('\\"', '"').replace('\\\\', '\\')
+
+
+def parse_prometheus(text: str) -> Dict[str, Dict[LabelKey, float]]:
+    """Nama sampel -> {label terurut: nilai}; baris komentar (# HELP/# TYPE) diabaikan"""
+    samples: Dict[str, Dict[LabelKey, float]] = defaultdict(dict)
+    for line in text.splitlines():
+        if not line or line.startswith("#"):
+            continue
+        match = _SAMPLE.match(line)
+        if not match:
+            continue
+        name, raw_labels, raw_value = match.groups()
+        labels = tuple(sorted((key, _unescape(value)) for key, value in _LABEL.findall(raw_labels or "")))
+        try:
+            samples[name][labels] = float(raw_value)
+        except ValueError:
+            continue
+    return dict(samples)
+
+
+def histogram_quantile(quantile: float, buckets: List[Tuple[float, float]]) -> float:
+    """Estimasi kuantil dari bucket kumulatif (le, count), interpolasi linear seperti PromQL"""
+    buckets = sorted(buckets)
+    if not buckets or buckets[-1][1] <= 0:
+        return 0.0
+    rank = quantile * buckets[-1][1]
+    lower_bound, lower_count = 0.0, 0.0
+    for bound, count in buckets:
+        if count >= rank:
+            if math.isinf(bound):
+                return lower_bound
+            if count == lower_count:
+                return bound
+            return lower_bound + (bound - lower_bound) * (rank - lower_count) / (count - lower_count)
+        lower_bound, lower_count = bound, count
+    return lower_bound
+
+
+class HistogramDelta:
+    """Selisih satu keluarga histogram antara dua scrape, dikelompokkan per label"""
+
+    def __init__(self, name: str, before: Dict[str, Dict[LabelKey, float]],
+                 after: Dict[str, Dict[LabelKey, float]], group: Tuple[str, ...] = ()):
+        self.buckets: Dict[Tuple, List[Tuple[float, float]]] = defaultdict(list)
+        self.sums: Dict[Tuple, float] = defaultdict(float)
+        self.counts: Dict[Tuple, float] = defaultdict(float)
+
+        def series_key(labels: LabelKey) -> Tuple:
+            return tuple((key, value) for key, value in labels if key in group)
+
+        grouped: Dict[Tuple, Dict[float, float]] = defaultdict(lambda: defaultdict(float))
+        for labels, value in after.get(f"{name}_bucket", {}).items():
+            bound = float(dict(labels)["le"])
+            grouped[series_key(labels)][bound] += value - before.get(f"{name}_bucket", {}).get(labels, 0.0)
+        for key, bounds in grouped.items():
+            self.buckets[key] = sorted(bounds.items())
+        for suffix, target in (("_sum", self.sums), ("_count", self.counts)):
+            for labels, value in after.get(f"{name}{suffix}", {}).items():
+                target[series_key(labels)] += value - before.get(f"{name}{suffix}", {}).get(labels, 0.0)
+
+    def series(self) -> List[Tuple]:
+        return [key for key, count in self.counts.items() if count > 0]
+
+    def quantile(self, key: Tuple, quantile: float) -> float:
+        return histogram_quantile(quantile, self.buckets.get(key, []))
+
+    def mean(self, key: Tuple) -> float:
+        count = self.counts.get(key, 0.0)
+        return self.sums.get(key, 0.0) / count if count else 0.0
+
+
+def _label(key: Tuple, name: str) -> str:
+    return dict(key).get(name, "")
+
+
+class MetricsScraper:
+    """Scrape berkala di thread latar; gauge dicatat maksimumnya, histogram dihitung selisihnya"""
+
+    def __init__(self, base_url: str, interval: float = 1.0, log: Callable[..., None] = print,
+                 headers: Optional[Dict[str, str]] = None):
+        self.url = f"{base_url}{METRICS_ENDPOINT}"
+        self.interval = interval
+        self.log = log
+        self.session = requests.Session()
+        self.session.headers.update(internal_headers() if headers is None else headers)
+        self.last_status: Optional[int] = None
+        self.first: Optional[Dict[str, Dict[LabelKey, float]]] = None
+        self.last: Optional[Dict[str, Dict[LabelKey, float]]] = None
+        self.scrapes = 0
+        self.failures = 0
+        self.peaks: Dict[str, float] = defaultdict(float)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def scrape(self) -> Optional[Dict[str, Dict[LabelKey, float]]]:
+        try:
+            response = self.session.get(self.url, timeout=5)
+        except requests.exceptions.RequestException:
+            self.failures += 1
+            return None
+        self.last_status = response.status_code
+        if not response.ok or not response.headers.get("Content-Type", "").startswith("text/plain"):
+            self.failures += 1
+            return None
+        samples = parse_prometheus(response.text)
+        self.scrapes += 1
+        if self.first is None:
+            self.first = samples
+        self.last = samples
+        for value in samples.get("padidoc_db_queries_in_flight", {}).values():
+            self.peaks["queriesInFlight"] = max(self.peaks["queriesInFlight"], value)
+        for labels, value in samples.get("padidoc_db_pool_connections", {}).items():
+            state = dict(labels).get("state", "")
+            self.peaks[f"pool_{state}"] = max(self.peaks[f"pool_{state}"], value)
+        for labels, value in samples.get("padidoc_process_memory_bytes", {}).items():
+            kind = dict(labels).get("type", "")
+            self.peaks[f"memory_{kind}"] = max(self.peaks[f"memory_{kind}"], value)
+        return samples
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            self.scrape()
+
+    def start(self) -> bool:
+        """Scrape awal; False jika server belum menyediakan endpoint metrik"""
+        if self.scrape() is None:
+            if self.last_status in (401, 403):
+                self.log(f"Endpoint {METRICS_ENDPOINT} menolak akses ({self.last_status}); "
+                         "set METRICS_TOKEN sama dengan server", "WARNING")
+            else:
+                self.log(f"Endpoint {METRICS_ENDPOINT} tidak tersedia, metrik server tidak direkam", "WARNING")
+            return False
+        self._thread = threading.Thread(target=self._loop, name="metrics-scraper", daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self.scrape()
+
+    def __enter__(self) -> "MetricsScraper":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+        self.report()
+
+    def summary(self, top: int = 10) -> Dict[str, Any]:
+        if self.first is None or self.last is None:
+            return {}
+        before, after = self.first, self.last
+
+        wait = HistogramDelta("padidoc_db_pool_wait_seconds", before, after)
+        queries = HistogramDelta("padidoc_db_query_duration_seconds", before, after, group=("statement",))
+        routes = HistogramDelta("padidoc_http_request_duration_seconds", before, after, group=("method", "route"))
+        slow = after.get("padidoc_db_slow_queries_total", {})
+        slow_before = before.get("padidoc_db_slow_queries_total", {})
+
+        statements = sorted(queries.series(), key=lambda key: queries.sums[key], reverse=True)[:top]
+        return {
+            "scrapes": self.scrapes,
+            "poolWait": {
+                "count": int(wait.counts.get((), 0)),
+                "p50Ms": round(wait.quantile((), 0.5) * 1000, 3),
+                "p95Ms": round(wait.quantile((), 0.95) * 1000, 3),
+                "meanMs": round(wait.mean(()) * 1000, 3),
+            },
+            "peakQueriesInFlight": int(self.peaks["queriesInFlight"]),
+            "peakPoolWaiting": int(self.peaks["pool_waiting"]),
+            "peakPoolConnections": int(self.peaks["pool_total"]),
+            "peakRssMb": round(self.peaks["memory_rss"] / 1048576, 1),
+            "peakHeapUsedMb": round(self.peaks["memory_heap_used"] / 1048576, 1),
+            "slowQueries": int(sum(value - slow_before.get(labels, 0.0) for labels, value in slow.items())),
+            "statements": [
+                {
+                    "statement": _label(key, "statement"),
+                    "count": int(queries.counts[key]),
+                    "totalMs": round(queries.sums[key] * 1000, 1),
+                    "meanMs": round(queries.mean(key) * 1000, 3),
+                    "p95Ms": round(queries.quantile(key, 0.95) * 1000, 3),
+                }
+                for key in statements
+            ],
+            "routes": {
+                f"{_label(key, 'method')} {_label(key, 'route')}": {
+                    "count": int(routes.counts[key]),
+                    "p50Ms": round(routes.quantile(key, 0.5) * 1000, 3),
+                    "p95Ms": round(routes.quantile(key, 0.95) * 1000, 3),
+                }
+                for key in sorted(routes.series())
+            },
+        }
+
+    def report(self, top: int = 10):
+        summary = self.summary(top)
+        if not summary:
+            return
+        wait = summary["poolWait"]
+        self.log(f"Pool DB: {wait['count']} acquire, tunggu p50 {wait['p50Ms']:.2f} ms, p95 {wait['p95Ms']:.2f} ms; "
+                 f"puncak {summary['peakPoolConnections']} koneksi, {summary['peakPoolWaiting']} menunggu, "
+                 f"{summary['peakQueriesInFlight']} query in-flight")
+        if summary["peakRssMb"]:
+            self.log(f"Memori server: puncak RSS {summary['peakRssMb']} MB, heap {summary['peakHeapUsedMb']} MB")
+        if summary["slowQueries"]:
+            self.log(f"{summary['slowQueries']} slow query selama run", "WARNING")
+        self.log("Statement teratas menurut total waktu (server):")
+        for item in summary["statements"]:
+            self.log(f"  {item['totalMs']:>10.1f} ms {item['count']:>7}x mean {item['meanMs']:.2f} ms "
+                     f"p95 {item['p95Ms']:.2f} ms  {item['statement'][:100]}")
+        self.log("Latensi route (server):")
+        for name, stats in summary["routes"].items():
+            self.log(f"  {name:<40}{stats['count']:>8}x p50 {stats['p50Ms']:>8.2f} ms p95 {stats['p95Ms']:>8.2f} ms")
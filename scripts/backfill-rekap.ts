@@ -0,0 +1,21 @@
+// Script to rebuild the rekap_harian rollup table from transaction history
+import { rebuildRekapHarian } from '../server/rekapHarian';
+
+async function backfillRekap() {
+  try {
+    console.log('📊 Rebuilding rekap harian from pembelian, produksi and penjualan...');
+    const started = Date.now();
+
+    const rows = await rebuildRekapHarian();
+
+    console.log(`✅ Rekap harian rebuilt: ${rows} rows in ${Date.now() - started} ms`);
+  } catch (error) {
+    console.error('❌ Error rebuilding rekap harian:', error);
+    process.exit(1);
+  } finally {
+    process.exit(0);
+  }
+}
+
+// Run the backfill
+backfillRekap();
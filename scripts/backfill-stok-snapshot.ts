@@ -0,0 +1,21 @@
+// Script to rebuild daily stok snapshots from the log_stok ledger
+import { rebuildStokSnapshots } from '../server/stokSnapshot';
+
+async function backfillStokSnapshot() {
+  try {
+    console.log('📦 Rebuilding daily stok snapshots from log_stok...');
+    const started = Date.now();
+
+    const rows = await rebuildStokSnapshots();
+
+    console.log(`✅ Stok snapshots rebuilt: ${rows} rows in ${Date.now() - started} ms`);
+  } catch (error) {
+    console.error('❌ Error rebuilding stok snapshots:', error);
+    process.exit(1);
+  } finally {
+    process.exit(0);
+  }
+}
+
+// Run the backfill
+backfillStokSnapshot();
@@ -0,0 +1,105 @@
+// Script to check that CSV exports write timestamps as UTC regardless of the Node TZ.
+// Run it with a non-UTC TZ, e.g. npm run check:export-tz
+import { Writable } from 'stream';
+import { pool } from '../server/db';
+import { streamExport } from '../server/exportStream';
+
+const RESOURCES: Array<{ resource: string; table: string; columns: Record<string, string> }> = [
+  { resource: 'pembelian', table: 'pembelian', columns: { tanggal: 'tanggal', createdAt: 'created_at' } },
+  { resource: 'penjualan', table: 'penjualan', columns: { tanggal: 'tanggal', createdAt: 'created_at' } },
+  { resource: 'log-stok', table: 'log_stok', columns: { createdAt: 'created_at' } },
+];
+
+function parseCsv(text: string): string[][] {
+  const rows: string[][] = [];
+  let row: string[] = [];
+  let cell = '';
+  let quoted = false;
+  for (let i = 0; i < text.length; i++) {
+    const char = text[i];
+    if (quoted) {
+      if (char === '"' && text[i + 1] === '"') {
+        cell += '"';
+        i++;
+      } else if (char === '"') {
+        quoted = false;
+      } else {
+        cell += char;
+      }
+    } else if (char === '"') {
+      quoted = true;
+    } else if (char === ',') {
+      row.push(cell);
+      cell = '';
+    } else if (char === '\n') {
+      row.push(cell.replace(/\r$/, ''));
+      rows.push(row);
+      row = [];
+      cell = '';
+    } else {
+      cell += char;
+    }
+  }
+  return rows;
+}
+
+async function exportCsv(resource: string): Promise<string> {
+  const chunks: Buffer[] = [];
+  const res: any = new Writable({
+    write(chunk, _encoding, callback) {
+      chunks.push(Buffer.from(chunk));
+      callback();
+    },
+  });
+  res.status = (code: number) => {
+    res.statusCode = code;
+    return res;
+  };
+  res.setHeader = () => undefined;
+  res.json = (body: unknown) => {
+    throw new Error(`Export ${resource} gagal: ${res.statusCode} ${JSON.stringify(body)}`);
+  };
+  await streamExport({ params: { resource }, query: { format: 'csv' } } as any, res);
+  return Buffer.concat(chunks).toString('utf-8');
+}
+
+async function checkExportTz() {
+  let failures = 0;
+  try {
+    if (new Date().getTimezoneOffset() === 0) {
+      console.error('❌ TZ proses adalah UTC; jalankan dengan TZ non-UTC, mis. TZ=Asia/Jakarta');
+      process.exit(1);
+    }
+
+    for (const { resource, table, columns } of RESOURCES) {
+      const [header, ...rows] = parseCsv(await exportCsv(resource));
+      const selects = Object.values(columns)
+        .map((column) => `to_char(${column}, 'YYYY-MM-DD"T"HH24:MI:SS.MS"Z"') as ${column}`)
+        .join(', ');
+      const expected = await pool.query(`select id, ${selects} from ${table}`);
+      const byId = new Map(expected.rows.map((row) => [String(row.id), row]));
+
+      let mismatches = 0;
+      for (const row of rows) {
+        const id = row[header.indexOf('id')];
+        for (const [key, column] of Object.entries(columns)) {
+          const exported = row[header.indexOf(key)];
+          const stored = byId.get(id)?.[column] ?? '';
+          if (exported !== stored) {
+            if (mismatches < 5) console.error(`❌ ${resource} #${id} ${key}: export ${exported}, database ${stored}`);
+            mismatches++;
+          }
+        }
+      }
+      failures += mismatches;
+      console.log(`${mismatches === 0 ? '✅' : '❌'} ${resource}: ${rows.length} baris, ${mismatches} timestamp berbeda`);
+    }
+  } catch (error) {
+    console.error('❌ Error checking export timezone:', error);
+    process.exit(1);
+  }
+  process.exit(failures > 0 ? 1 : 0);
+}
+
+// Run the check
+checkExportTz();
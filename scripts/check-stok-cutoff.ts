@@ -0,0 +1,109 @@
+// Script to check that point-in-time stok (/api/laporan/stok?at=) and the log-stok export
+// (?to=) agree with the ledger at the same cutoff, and that every stok snapshot matches the
+// ledger at its watermark. Run it with a non-UTC TZ, e.g. npm run check:stok-cutoff
+import { pool } from '../server/db';
+import { buildExportQuery } from '../server/storage';
+import { getStokAt } from '../server/stokSnapshot';
+import { REKAP_TZ, rekapDate } from '../server/rekapHarian';
+import { utcTimestamp } from '../server/pagination';
+
+async function checkStokCutoff() {
+  let failures = 0;
+  try {
+    if (new Date().getTimezoneOffset() === 0) {
+      console.error('❌ TZ proses adalah UTC; jalankan dengan TZ non-UTC, mis. TZ=Asia/Jakarta');
+      process.exit(1);
+    }
+
+    // Di sekitar tengah malam UTC hari bisnis dan hari UTC berbeda: tanggal rekap dari JS
+    // (penulisan transaksi) harus sama dengan tanggal dari SQL (rebuildRekapHarian)
+    for (const hour of [16, 17, 23]) {
+      const at = new Date(Date.UTC(2025, 0, 15, hour, 30));
+      const fromSql = await pool.query(
+        "select (($1::timestamp at time zone 'UTC') at time zone $2)::date::text as tanggal",
+        [utcTimestamp(at), REKAP_TZ],
+      );
+      if (rekapDate(at) !== fromSql.rows[0].tanggal) {
+        console.error(`❌ rekapDate ${rekapDate(at)} != SQL ${fromSql.rows[0].tanggal} (${at.toISOString()}, ${REKAP_TZ})`);
+        failures++;
+      }
+    }
+
+    const at = process.argv[2] ? new Date(process.argv[2]) : new Date();
+    console.log(`🕒 Cutoff ${at.toISOString()} (TZ=${process.env.TZ || 'lokal'})`);
+
+    // Ledger dengan caranya sendiri: posisi tiap stok = jumlah_sesudah baris terakhir sebelum
+    // cutoff, atau jumlah_sebelum baris pertama jika belum ada. Cutoff dikirim sebagai ISO
+    // timestamptz dan dikonversi Postgres, bukan lewat utcTimestamp seperti getStokAt/export.
+    const ledger = await pool.query(`
+      select s.jenis_item,
+        sum(coalesce(akhir.jumlah_sesudah, pertama.jumlah_sebelum, 0)) as jumlah,
+        sum(coalesce(pertama.jumlah_sebelum, 0)) as awal
+      from stok s
+      left join lateral (
+        select l.jumlah_sesudah from log_stok l
+        where l.stok_id = s.id and l.created_at < ($1::timestamptz at time zone 'UTC')
+        order by l.id desc limit 1
+      ) akhir on true
+      left join lateral (
+        select l.jumlah_sebelum from log_stok l where l.stok_id = s.id order by l.id limit 1
+      ) pertama on true
+      group by s.jenis_item
+    `, [at.toISOString()]);
+    const fromLedger = new Map<string, { jumlah: number; awal: number }>(ledger.rows.map((row) => [
+      String(row.jenis_item),
+      { jumlah: Number(row.jumlah), awal: Number(row.awal) },
+    ]));
+
+    // Export log-stok dengan ?to= harus berhenti di cutoff yang sama
+    const stokRows = await pool.query('select id, jenis_item from stok');
+    const jenisOf = new Map<number, string>(stokRows.rows.map((row) => [Number(row.id), String(row.jenis_item)]));
+    const exportQuery = buildExportQuery('log-stok', { to: at });
+    const exported = await pool.query(exportQuery.sql, exportQuery.params as any[]);
+    const fromExport = new Map<string, number>();
+    for (const row of exported.rows) {
+      const jenisItem = jenisOf.get(Number(row.stok_id)) || '?';
+      fromExport.set(jenisItem, (fromExport.get(jenisItem) || 0) + Number(row.jumlah));
+    }
+
+    for (const item of await getStokAt(at)) {
+      const expected = fromLedger.get(item.jenisItem) || { jumlah: 0, awal: 0 };
+      const exportTotal = expected.awal + (fromExport.get(item.jenisItem) || 0);
+      const ok = Math.abs(expected.jumlah - item.jumlah) < 0.01 && Math.abs(expected.jumlah - exportTotal) < 0.01;
+      if (!ok) failures++;
+      console.log(`${ok ? '✅' : '❌'} ${item.jenisItem}: ledger ${expected.jumlah}, stok-at ${item.jumlah}, export ${exportTotal}`);
+    }
+
+    // Setiap snapshot (periodik maupun hasil rebuild) harus sama dengan posisi ledger pada
+    // watermark-nya; snapshot rebuild yang mulai dari 0 alih-alih jumlah_sebelum akan gagal di sini
+    const snapshots = await pool.query(`
+      select ss.id, ss.jenis_item, ss.jumlah,
+        sum(coalesce(akhir.jumlah_sesudah, pertama.jumlah_sebelum, 0)) as ledger
+      from stok_snapshot ss
+      join stok s on s.jenis_item = ss.jenis_item
+      left join lateral (
+        select l.jumlah_sesudah from log_stok l
+        where l.stok_id = s.id and l.id <= ss.log_stok_id
+        order by l.id desc limit 1
+      ) akhir on true
+      left join lateral (
+        select l.jumlah_sebelum from log_stok l where l.stok_id = s.id order by l.id limit 1
+      ) pertama on true
+      group by ss.id, ss.jenis_item, ss.jumlah
+      order by ss.id
+    `);
+    const mismatched = snapshots.rows.filter((row) => Math.abs(Number(row.jumlah) - Number(row.ledger)) >= 0.01);
+    for (const row of mismatched.slice(0, 10)) {
+      console.error(`❌ snapshot #${row.id} ${row.jenis_item}: ${row.jumlah}, ledger ${row.ledger}`);
+    }
+    failures += mismatched.length;
+    console.log(`${mismatched.length === 0 ? '✅' : '❌'} ${snapshots.rows.length - mismatched.length}/${snapshots.rows.length} snapshot cocok dengan ledger`);
+  } catch (error) {
+    console.error('❌ Error checking stok cutoff:', error);
+    process.exit(1);
+  }
+  process.exit(failures > 0 ? 1 : 0);
+}
+
+// Run the check
+checkStokCutoff();
@@ -0,0 +1,41 @@
+// Script to build the secondary indexes from sql/indexes/*.sql in order
+// without locking writes (CREATE INDEX CONCURRENTLY cannot run inside a transaction).
+// Kept apart from ./migrations, which belongs to drizzle-kit.
+import fs from 'fs';
+import path from 'path';
+import { pool } from '../server/db';
+
+const INDEXES_DIR = path.resolve(process.cwd(), 'sql', 'indexes');
+
+// Statements end with `;` (or a drizzle-kit statement-breakpoint) and may span several lines
+function splitStatements(text: string): string[] {
+  return text
+    .split('\n')
+    .filter((line) => !line.trim().startsWith('--') || line.includes('statement-breakpoint'))
+    .join('\n')
+    .split(/;|--> statement-breakpoint/)
+    .map((statement) => statement.trim())
+    .filter(Boolean);
+}
+
+async function createIndexes() {
+  try {
+    const files = fs.readdirSync(INDEXES_DIR).filter((file) => file.endsWith('.sql')).sort();
+    const statements = files.flatMap((file) => splitStatements(fs.readFileSync(path.join(INDEXES_DIR, file), 'utf-8')));
+
+    console.log(`🗂️  Creating ${statements.length} indexes concurrently...`);
+    for (const statement of statements) {
+      const started = Date.now();
+      await pool.query(statement);
+      console.log(`✅ ${statement} (${Date.now() - started} ms)`);
+    }
+  } catch (error) {
+    console.error('❌ Error creating indexes:', error);
+    process.exit(1);
+  } finally {
+    process.exit(0);
+  }
+}
+
+// Run the index build
+createIndexes();
@@ -1,5 +1,7 @@
 import { storage } from "./storage";
 import { Request } from "express";
+import type { InsertActivityLog } from "@shared/schema";
+import { Gauge } from "./metrics";
 
 export interface ActivityLogData {
   userId: number;
@@ -11,21 +13,172 @@ export interface ActivityLogData {
   userAgent?: string;
 }
 
+export interface ActivityLogStats {
+  pending: number;
+  capacity: number;
+  enqueued: number;
+  written: number;
+  dropped: number;
+  waits: number;
+  flushes: number;
+  failedFlushes: number;
+}
+
+// Write-behind: log aktivitas ditampung di ring buffer dan ditulis dengan multi-row insert
+// saat jumlahnya mencapai FLUSH_SIZE atau setiap FLUSH_INTERVAL_MS, di luar jalur request.
+// Backpressure: jika database tertinggal sampai buffer penuh, log() menunggu satu batch
+// flush selesai sebelum menambah entry, sehingga audit login/perubahan user tidak hilang.
+// Drop-oldest hanya jalan terakhir (entry baru menyalip saat menunggu) dan selalu diberi warning.
+const BUFFER_CAPACITY = parseInt(process.env.ACTIVITY_LOG_BUFFER_SIZE || "10000");
+const FLUSH_SIZE = parseInt(process.env.ACTIVITY_LOG_FLUSH_SIZE || "200");
+const FLUSH_INTERVAL_MS = parseInt(process.env.ACTIVITY_LOG_FLUSH_MS || "1000");
+const DROP_WARN_INTERVAL_MS = 10000;
+
+// Buffer melingkar berkapasitas tetap; saat penuh entry tertua ditimpa
+class RingBuffer<T> {
+  private items: Array<T | undefined>;
+  private head = 0;
+  size = 0;
+
+  constructor(readonly capacity: number) {
+    this.items = new Array(capacity);
+  }
+
+  // Mengembalikan true jika entry tertua terpaksa dibuang
+  push(item: T): boolean {
+    const overwrote = this.size === this.capacity;
+    this.items[(this.head + this.size) % this.capacity] = item;
+    if (overwrote) {
+      this.head = (this.head + 1) % this.capacity;
+    } else {
+      this.size++;
+    }
+    return overwrote;
+  }
+
+  take(count: number): T[] {
+    const taken: T[] = [];
+    while (taken.length < count && this.size > 0) {
+      taken.push(this.items[this.head]!);
+      this.items[this.head] = undefined;
+      this.head = (this.head + 1) % this.capacity;
+      this.size--;
+    }
+    return taken;
+  }
+}
+
 export class ActivityLogger {
+  private static buffer = new RingBuffer<InsertActivityLog>(BUFFER_CAPACITY);
+  private static timer: NodeJS.Timeout | undefined;
+  private static flushing: Promise<void> | undefined;
+  private static spaceWaiters: Array<() => void> = [];
+  private static lastDropWarning = 0;
+  private static stats = { enqueued: 0, written: 0, dropped: 0, waits: 0, flushes: 0, failedFlushes: 0 };
+
   static async log(data: ActivityLogData) {
-    try {
-      await storage.createActivityLog({
-        userId: data.userId,
-        action: data.action,
-        resource: data.resource,
-        resourceId: data.resourceId,
-        details: data.details,
-        ipAddress: data.ipAddress,
-        userAgent: data.userAgent,
+    // Waktu kejadian dicatat di sini, bukan saat flush, agar audit tidak tergeser hingga FLUSH_INTERVAL_MS
+    const entry: InsertActivityLog = {
+      userId: data.userId,
+      action: data.action,
+      resource: data.resource,
+      resourceId: data.resourceId,
+      details: data.details,
+      ipAddress: data.ipAddress,
+      userAgent: data.userAgent,
+      createdAt: new Date(),
+    };
+
+    if (this.buffer.size >= this.buffer.capacity) {
+      this.stats.waits++;
+      await this.waitForSpace();
+    }
+
+    const dropped = this.buffer.push(entry);
+    this.stats.enqueued++;
+    if (dropped) {
+      this.stats.dropped++;
+      this.warnDropped();
+    }
+
+    // Batch penuh langsung di-flush tanpa menunggu timer
+    if (this.buffer.size >= FLUSH_SIZE) {
+      void this.flush();
+    } else {
+      this.scheduleFlush();
+    }
+  }
+
+  // Selesai saat flush berikutnya menulis (atau gagal menulis) satu batch
+  private static waitForSpace(): Promise<void> {
+    const waited = new Promise<void>((resolve) => this.spaceWaiters.push(resolve));
+    void this.flush();
+    return waited;
+  }
+
+  private static releaseWaiters() {
+    const waiters = this.spaceWaiters;
+    this.spaceWaiters = [];
+    for (const resolve of waiters) resolve();
+  }
+
+  private static warnDropped() {
+    const now = Date.now();
+    if (now - this.lastDropWarning < DROP_WARN_INTERVAL_MS) return;
+    this.lastDropWarning = now;
+    console.warn(`Activity log buffer penuh (${this.buffer.capacity}); ${this.stats.dropped} entry dibuang sejauh ini`);
+  }
+
+  private static scheduleFlush() {
+    if (this.timer) return;
+    this.timer = setTimeout(() => {
+      this.timer = undefined;
+      void this.flush();
+    }, FLUSH_INTERVAL_MS);
+    // Timer tidak boleh menahan proses tetap hidup
+    this.timer.unref();
+  }
+
+  // Hanya satu flush berjalan dalam satu waktu; pemanggil berikutnya menunggu flush yang sama
+  static flush(): Promise<void> {
+    if (!this.flushing) {
+      this.flushing = this.drain().finally(() => {
+        this.flushing = undefined;
+        if (this.buffer.size > 0) this.scheduleFlush();
       });
-    } catch (error) {
-      console.error("Failed to log activity:", error);
     }
+    return this.flushing;
+  }
+
+  private static async drain() {
+    while (this.buffer.size > 0) {
+      const rows = this.buffer.take(FLUSH_SIZE);
+      try {
+        await storage.createActivityLogs(rows);
+        this.stats.written += rows.length;
+        this.stats.flushes++;
+      } catch (error) {
+        // Log aktivitas tidak boleh mengganggu request; batch gagal dihitung sebagai drop
+        this.stats.failedFlushes++;
+        this.stats.dropped += rows.length;
+        console.error("Failed to log activity:", error);
+        return;
+      } finally {
+        this.releaseWaiters();
+      }
+    }
+  }
+
+  static async shutdown() {
+    if (this.timer) {
+      clearTimeout(this.timer);
+      this.timer = undefined;
+    }
+    await this.flush();
+  }
+
+  static getStats(): ActivityLogStats {
+    return { pending: this.buffer.size, capacity: this.buffer.capacity, ...this.stats };
   }
 
   static async logLogin(userId: number, req: Request) {
@@ -97,4 +250,14 @@ export class ActivityLogger {
       userAgent: req.get("User-Agent"),
     });
   }
-}
\ No newline at end of file
+}
+
+new Gauge("padidoc_activity_log_pending", "Log aktivitas yang menunggu ditulis", () => ActivityLogger.getStats().pending);
+new Gauge("padidoc_activity_log_events_total", "Log aktivitas per hasil", () => {
+  const stats = ActivityLogger.getStats();
+  return [
+    { labels: { result: "written" }, value: stats.written },
+    { labels: { result: "dropped" }, value: stats.dropped },
+  ];
+}, "counter");
+new Gauge("padidoc_activity_log_waits_total", "log() yang menunggu flush karena buffer penuh", () => ActivityLogger.getStats().waits, "counter");
@@ -1,7 +1,8 @@
 import jwt from "jsonwebtoken";
-import bcrypt from "bcryptjs";
+import { timingSafeEqual } from "crypto";
 import { Request, Response, NextFunction } from "express";
 import { storage } from "./storage";
+import { passwordPool } from "./passwordPool";
 
 export interface AuthenticatedRequest extends Request {
   userId?: number;
@@ -14,6 +15,7 @@ export interface AuthenticatedRequest extends Request {
 }
 
 const JWT_SECRET = process.env.JWT_SECRET || "padidoc-secret-key-development";
+const METRICS_TOKEN = process.env.METRICS_TOKEN;
 
 export const generateToken = (userId: number, email: string, role: string): string => {
   return jwt.sign(
@@ -31,13 +33,14 @@ export const verifyToken = (token: string): any => {
   }
 };
 
+// Hashing berjalan di worker thread; melempar PasswordPoolSaturatedError saat antrean penuh
 export const hashPassword = async (password: string): Promise<string> => {
   const saltRounds = 12;
-  return await bcrypt.hash(password, saltRounds);
+  return await passwordPool.run<string>("hash", [password, saltRounds]);
 };
 
 export const comparePassword = async (password: string, hash: string): Promise<boolean> => {
-  return await bcrypt.compare(password, hash);
+  return await passwordPool.run<boolean>("compare", [password, hash]);
 };
 
 // Auth middleware - protect routes
@@ -61,8 +64,8 @@ export const authenticateToken = async (
       return;
     }
 
-    // Get user from database
-    const user = await storage.getUser(decoded.userId);
+    // Get user from cache (LRU + TTL), database hanya dibaca saat miss
+    const user = await storage.getAuthUser(decoded.userId);
     if (!user || !user.isActive) {
       res.status(401).json({ message: "User tidak aktif" });
       return;
@@ -104,4 +107,25 @@ export const requireRole = (roles: string[]) => {
 export const requireAdmin = requireRole(["admin"]);
 
 // Admin or operator middleware
-export const requireAuth = requireRole(["admin", "operator"]);
\ No newline at end of file
+export const requireAuth = requireRole(["admin", "operator"]);
+
+function matchesMetricsToken(token: string): boolean {
+  if (!METRICS_TOKEN) return false;
+  const given = Buffer.from(token);
+  const expected = Buffer.from(METRICS_TOKEN);
+  return given.length === expected.length && timingSafeEqual(given, expected);
+}
+
+// Endpoint /api/internal/*: token statis METRICS_TOKEN (scraper tanpa login) atau JWT admin
+export const requireInternalAccess = (
+  req: AuthenticatedRequest,
+  res: Response,
+  next: NextFunction
+): void => {
+  const token = req.headers.authorization?.split(" ")[1];
+  if (token && matchesMetricsToken(token)) {
+    next();
+    return;
+  }
+  void authenticateToken(req, res, () => requireAdmin(req, res, next));
+};
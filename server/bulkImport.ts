@@ -0,0 +1,212 @@
+import express, { type Request, type Response } from "express";
+import { z } from "zod";
+
+// Import massal transaksi: body NDJSON, CSV atau JSON array, di-commit per batch
+export const BULK_DEFAULT_BATCH_SIZE = 500;
+export const BULK_MAX_BATCH_SIZE = 1000;
+
+// express.json hanya menangani application/json, jadi NDJSON dan CSV dibaca sebagai teks
+export const bulkBodyParser = express.text({
+  type: ["text/csv", "application/x-ndjson", "application/ndjson", "text/plain"],
+  limit: "20mb",
+});
+
+export interface BulkRowError {
+  line: number;
+  message: string;
+}
+
+export interface BulkBatchResult {
+  batch: number;
+  firstLine: number;
+  lastLine: number;
+  inserted: number;
+  error?: string;
+}
+
+export interface BulkImportSummary {
+  received: number;
+  inserted: number;
+  batches: BulkBatchResult[];
+  errors: BulkRowError[];
+}
+
+interface BulkRecord {
+  line: number;
+  data: Record<string, unknown>;
+}
+
+// Parser CSV sederhana (RFC 4180): mendukung field ber-quote, "" sebagai escape dan CRLF
+export function parseCsv(text: string): string[][] {
+  const rows: string[][] = [];
+  let row: string[] = [];
+  let field = "";
+  let inQuotes = false;
+
+  for (let i = 0; i < text.length; i++) {
+    const char = text[i];
+    if (inQuotes) {
+      if (char === '"' && text[i + 1] === '"') {
+        field += '"';
+        i++;
+      } else if (char === '"') {
+        inQuotes = false;
+      } else {
+        field += char;
+      }
+    } else if (char === '"') {
+      inQuotes = true;
+    } else if (char === ",") {
+      row.push(field);
+      field = "";
+    } else if (char === "\n" || char === "\r") {
+      if (char === "\r" && text[i + 1] === "\n") i++;
+      row.push(field);
+      rows.push(row);
+      row = [];
+      field = "";
+    } else {
+      field += char;
+    }
+  }
+
+  if (field !== "" || row.length > 0) {
+    row.push(field);
+    rows.push(row);
+  }
+
+  return rows.filter((cells) => cells.some((cell) => cell.trim() !== ""));
+}
+
+function csvRecords(text: string): BulkRecord[] {
+  const [header, ...rows] = parseCsv(text);
+  if (!header) return [];
+  const columns = header.map((column) => column.trim());
+
+  return rows.map((cells, index) => {
+    const data: Record<string, unknown> = {};
+    columns.forEach((column, col) => {
+      const value = cells[col]?.trim();
+      // Sel kosong dianggap tidak diisi agar field opsional tetap valid
+      if (value !== undefined && value !== "") data[column] = value;
+    });
+    return { line: index + 2, data };
+  });
+}
+
+export function parseBulkBody(req: Request): { records: BulkRecord[]; errors: BulkRowError[] } {
+  const errors: BulkRowError[] = [];
+
+  if (Array.isArray(req.body)) {
+    return { records: req.body.map((data, index) => ({ line: index + 1, data })), errors };
+  }
+
+  if (typeof req.body !== "string") {
+    return { records: [], errors: [{ line: 0, message: "Body harus berupa NDJSON, CSV atau JSON array" }] };
+  }
+
+  if ((req.get("Content-Type") || "").includes("csv")) {
+    return { records: csvRecords(req.body), errors };
+  }
+
+  const records: BulkRecord[] = [];
+  req.body.split(/\r?\n/).forEach((text, index) => {
+    if (!text.trim()) return;
+    try {
+      records.push({ line: index + 1, data: JSON.parse(text) });
+    } catch {
+      errors.push({ line: index + 1, message: "JSON tidak valid" });
+    }
+  });
+  return { records, errors };
+}
+
+// Nilai CSV selalu string, sedangkan kolom foreign key di schema bertipe integer
+function coerceIntegers(data: Record<string, unknown>, integerFields: string[]) {
+  for (const field of integerFields) {
+    if (typeof data[field] === "string") {
+      const value = Number(data[field]);
+      if (Number.isInteger(value)) data[field] = value;
+    }
+  }
+  return data;
+}
+
+function formatZodError(error: z.ZodError): string {
+  return error.errors.map((issue) => `${issue.path.join(".") || "row"}: ${issue.message}`).join("; ");
+}
+
+export async function importInBatches<S extends z.ZodTypeAny>(
+  records: BulkRecord[],
+  schema: S,
+  integerFields: string[],
+  batchSize: number,
+  commit: (rows: z.infer<S>[]) => Promise<unknown[]>
+): Promise<BulkImportSummary> {
+  const summary: BulkImportSummary = { received: records.length, inserted: 0, batches: [], errors: [] };
+
+  for (let start = 0; start < records.length; start += batchSize) {
+    const chunk = records.slice(start, start + batchSize);
+    const batch: BulkBatchResult = {
+      batch: summary.batches.length + 1,
+      firstLine: chunk[0].line,
+      lastLine: chunk[chunk.length - 1].line,
+      inserted: 0,
+    };
+    summary.batches.push(batch);
+
+    const rows: z.infer<S>[] = [];
+    let invalid = 0;
+    for (const record of chunk) {
+      const result = schema.safeParse(coerceIntegers(record.data, integerFields));
+      if (result.success) {
+        rows.push(result.data);
+      } else {
+        invalid++;
+        summary.errors.push({ line: record.line, message: formatZodError(result.error) });
+      }
+    }
+
+    // Batch hanya di-commit jika semua barisnya valid
+    if (invalid > 0) {
+      batch.error = `${invalid} baris tidak valid, batch tidak disimpan`;
+      continue;
+    }
+
+    try {
+      const inserted = await commit(rows);
+      batch.inserted = inserted.length;
+      summary.inserted += inserted.length;
+    } catch (error) {
+      batch.error = error instanceof Error ? error.message : "Gagal menyimpan batch";
+    }
+  }
+
+  return summary;
+}
+
+export function bulkImportHandler<S extends z.ZodTypeAny>(
+  resource: string,
+  schema: S,
+  integerFields: string[],
+  commit: (rows: z.infer<S>[]) => Promise<unknown[]>
+) {
+  return async (req: Request, res: Response) => {
+    try {
+      const { records, errors } = parseBulkBody(req);
+      if (errors.length > 0) {
+        return res.status(400).json({ message: `Data import ${resource} tidak valid`, errors });
+      }
+
+      const requested = parseInt(String(req.query.batchSize || BULK_DEFAULT_BATCH_SIZE));
+      const batchSize = Math.min(Math.max(requested || BULK_DEFAULT_BATCH_SIZE, 1), BULK_MAX_BATCH_SIZE);
+
+      const summary = await importInBatches(records, schema, integerFields, batchSize, commit);
+      const failed = summary.batches.some((batch) => batch.error);
+      res.status(failed ? 400 : 201).json(summary);
+    } catch (error) {
+      console.error(`Error importing ${resource}:`, error);
+      res.status(500).json({ message: `Failed to import ${resource}` });
+    }
+  };
+}
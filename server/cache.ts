@@ -0,0 +1,115 @@
+import { Gauge } from "./metrics";
+
+// Cache LRU + TTL in-process sederhana dengan counter hit/miss dan invalidasi eksplisit
+
+export interface CacheStats {
+  name: string;
+  size: number;
+  hits: number;
+  misses: number;
+  invalidations: number;
+  hitRate: number;
+}
+
+interface CacheEntry<T> {
+  value: T;
+  expiresAt: number;
+}
+
+const registry = new Map<string, TtlCache<unknown>>();
+
+export class TtlCache<T> {
+  private entries = new Map<string, CacheEntry<T>>();
+  private inflight = new Map<string, Promise<T>>();
+  // Naik setiap invalidasi; hasil load yang dimulai sebelum invalidasi tidak disimpan
+  private generation = 0;
+  hits = 0;
+  misses = 0;
+  invalidations = 0;
+
+  constructor(readonly name: string, private ttlMs: number, private maxEntries = 1000) {
+    registry.set(name, this as TtlCache<unknown>);
+  }
+
+  get(key: string): T | undefined {
+    const entry = this.entries.get(key);
+    if (!entry) return undefined;
+    this.entries.delete(key);
+    if (entry.expiresAt <= Date.now()) {
+      return undefined;
+    }
+    // Pindahkan ke akhir Map agar eviksi selalu membuang yang paling lama tidak dipakai (LRU)
+    this.entries.set(key, entry);
+    return entry.value;
+  }
+
+  set(key: string, value: T) {
+    if (this.ttlMs <= 0) return;
+    if (this.entries.size >= this.maxEntries && !this.entries.has(key)) {
+      // Buang entry yang paling lama tidak dipakai (awal Map)
+      const oldest = this.entries.keys().next().value;
+      if (oldest !== undefined) this.entries.delete(oldest);
+    }
+    this.entries.set(key, { value, expiresAt: Date.now() + this.ttlMs });
+  }
+
+  async getOrLoad(key: string, loader: () => Promise<T>): Promise<T> {
+    const cached = this.get(key);
+    if (cached !== undefined) {
+      this.hits++;
+      return cached;
+    }
+    this.misses++;
+
+    // Request bersamaan untuk key yang sama berbagi satu query
+    const pending = this.inflight.get(key);
+    if (pending) return pending;
+
+    const generation = this.generation;
+    const promise = loader()
+      .then((value) => {
+        if (generation === this.generation && value !== undefined) this.set(key, value);
+        return value;
+      })
+      .finally(() => this.inflight.delete(key));
+    this.inflight.set(key, promise);
+    return promise;
+  }
+
+  invalidate(key?: string) {
+    this.invalidations++;
+    this.generation++;
+    if (key === undefined) {
+      this.entries.clear();
+      this.inflight.clear();
+    } else {
+      this.entries.delete(key);
+      this.inflight.delete(key);
+    }
+  }
+
+  stats(): CacheStats {
+    const lookups = this.hits + this.misses;
+    return {
+      name: this.name,
+      size: this.entries.size,
+      hits: this.hits,
+      misses: this.misses,
+      invalidations: this.invalidations,
+      hitRate: lookups > 0 ? this.hits / lookups : 0,
+    };
+  }
+}
+
+export function getCacheStats(): CacheStats[] {
+  return Array.from(registry.values()).map((cache) => cache.stats());
+}
+
+function cacheSeries(field: "hits" | "misses" | "invalidations" | "size") {
+  return () => getCacheStats().map((stats) => ({ labels: { cache: stats.name }, value: stats[field] }));
+}
+
+new Gauge("padidoc_cache_hits_total", "Cache hit per cache", cacheSeries("hits"), "counter");
+new Gauge("padidoc_cache_misses_total", "Cache miss per cache", cacheSeries("misses"), "counter");
+new Gauge("padidoc_cache_invalidations_total", "Invalidasi per cache", cacheSeries("invalidations"), "counter");
+new Gauge("padidoc_cache_entries", "Jumlah entri per cache", cacheSeries("size"));
@@ -2,6 +2,7 @@ import { Pool, neonConfig } from '@neondatabase/serverless';
 import { drizzle } from 'drizzle-orm/neon-serverless';
 import ws from "ws";
 import * as schema from "@shared/schema";
+import { Counter, Gauge, Histogram } from "./metrics";
 
 neonConfig.webSocketConstructor = ws;
 
@@ -11,5 +12,123 @@ if (!process.env.DATABASE_URL) {
   );
 }
 
-export const pool = new Pool({ connectionString: process.env.DATABASE_URL });
-export const db = drizzle({ client: pool, schema });
\ No newline at end of file
+// Ukuran pool dan batas waktu dapat diatur lewat env. Acquire timeout membuat request
+// gagal cepat saat pool habis, alih-alih menunggu tanpa batas.
+const POOL_MAX = parseInt(process.env.DB_POOL_MAX || "10");
+const POOL_IDLE_TIMEOUT_MS = parseInt(process.env.DB_POOL_IDLE_TIMEOUT_MS || "10000");
+const POOL_ACQUIRE_TIMEOUT_MS = parseInt(process.env.DB_POOL_ACQUIRE_TIMEOUT_MS || "5000");
+const SLOW_QUERY_MS = parseInt(process.env.SLOW_QUERY_MS || "200");
+
+export const pool = new Pool({
+  connectionString: process.env.DATABASE_URL,
+  max: POOL_MAX,
+  idleTimeoutMillis: POOL_IDLE_TIMEOUT_MS,
+  connectionTimeoutMillis: POOL_ACQUIRE_TIMEOUT_MS,
+});
+
+const queryDuration = new Histogram("padidoc_db_query_duration_seconds", "Latensi query per statement ter-normalisasi");
+const poolWait = new Histogram("padidoc_db_pool_wait_seconds", "Waktu menunggu koneksi dari pool");
+const slowQueries = new Counter("padidoc_db_slow_queries_total", "Query yang melewati SLOW_QUERY_MS");
+const queryErrors = new Counter("padidoc_db_query_errors_total", "Query yang gagal");
+let inFlight = 0;
+new Gauge("padidoc_db_queries_in_flight", "Query yang sedang berjalan", () => inFlight);
+new Gauge("padidoc_db_pool_connections", "Koneksi pool per status", () => [
+  { labels: { state: "total" }, value: pool.totalCount },
+  { labels: { state: "idle" }, value: pool.idleCount },
+  { labels: { state: "waiting" }, value: pool.waitingCount },
+]);
+new Gauge("padidoc_db_pool_max", "Ukuran maksimum pool", () => POOL_MAX);
+
+// Literal, parameter dan daftar VALUES yang panjangnya berubah-ubah disamakan agar
+// statement yang sama masuk ke satu seri histogram
+export function normalizeSql(text: string): string {
+  return text
+    .replace(/'(?:[^']|'')*'/g, "?")
+    .replace(/\$\d+/g, "?")
+    .replace(/\b\d+(?:\.\d+)?\b/g, "?")
+    .replace(/\s+/g, " ")
+    .replace(/\(\s*(?:\?|default)(?:\s*,\s*(?:\?|default))*\s*\)/gi, "(...)")
+    .replace(/\(\.\.\.\)(?:\s*,\s*\(\.\.\.\))+/g, "(...)")
+    .trim()
+    .slice(0, 300);
+}
+
+function startQuery(text: string | undefined) {
+  const started = process.hrtime.bigint();
+  inFlight++;
+  return (error?: unknown) => {
+    inFlight--;
+    const seconds = Number(process.hrtime.bigint() - started) / 1e9;
+    const statement = normalizeSql(text || "unknown");
+    queryDuration.observe(seconds, { statement });
+    if (error) queryErrors.inc({ statement });
+    if (seconds * 1000 >= SLOW_QUERY_MS) {
+      slowQueries.inc({ statement });
+      console.warn(`Slow query (${(seconds * 1000).toFixed(1)} ms): ${statement}`);
+    }
+  };
+}
+
+const instrumented = new WeakSet<object>();
+
+// Bungkus client.query (promise maupun callback) untuk mencatat durasi setiap statement
+function instrumentClient<T extends { query: (...args: any[]) => any }>(client: T): T {
+  if (!client || instrumented.has(client)) return client;
+  instrumented.add(client);
+  const originalQuery = client.query.bind(client);
+  client.query = ((...args: any[]) => {
+    const text = typeof args[0] === "string" ? args[0] : args[0]?.text;
+    const done = startQuery(text);
+    const callbackIndex = args.findIndex((arg) => typeof arg === "function");
+    if (callbackIndex >= 0) {
+      const callback = args[callbackIndex];
+      args[callbackIndex] = (error: unknown, result: unknown) => {
+        done(error);
+        callback(error, result);
+      };
+      return originalQuery(...args);
+    }
+    const result = originalQuery(...args);
+    if (result && typeof result.then === "function") {
+      return result.then(
+        (value: unknown) => {
+          done();
+          return value;
+        },
+        (error: unknown) => {
+          done(error);
+          throw error;
+        },
+      );
+    }
+    done();
+    return result;
+  }) as T["query"];
+  return client;
+}
+
+// pool.query dan transaksi drizzle sama-sama mengambil koneksi lewat pool.connect,
+// jadi cukup satu titik untuk mengukur waktu tunggu pool dan memasang timing query
+const originalConnect = pool.connect.bind(pool) as (...args: any[]) => any;
+pool.connect = ((callback?: (error: Error | undefined, client: any, release: any) => void) => {
+  const started = process.hrtime.bigint();
+  const observeWait = () => poolWait.observe(Number(process.hrtime.bigint() - started) / 1e9);
+  if (typeof callback === "function") {
+    return originalConnect((error: Error | undefined, client: any, release: any) => {
+      observeWait();
+      callback(error, client ? instrumentClient(client) : client, release);
+    });
+  }
+  return originalConnect().then(
+    (client: any) => {
+      observeWait();
+      return instrumentClient(client);
+    },
+    (error: unknown) => {
+      observeWait();
+      throw error;
+    },
+  );
+}) as typeof pool.connect;
+
+export const db = drizzle({ client: pool, schema });
@@ -0,0 +1,142 @@
+import type { Request, Response } from "express";
+import { once } from "events";
+import { types } from "@neondatabase/serverless";
+import { pool } from "./db";
+import { buildExportQuery, type ExportQuery, type ExportResource } from "./storage";
+import { parseListOptions, ListQueryError } from "./pagination";
+import { XlsxStreamWriter } from "./xlsxStream";
+
+// Export laporan tanpa memuat seluruh tabel ke memori: baris dibaca bertahap dari
+// server-side cursor (DECLARE/FETCH) dan ditulis ke response chunked sambil
+// menghormati backpressure socket. Snapshot REPEATABLE READ menjaga angka tetap konsisten.
+const EXPORT_FETCH_SIZE = parseInt(process.env.EXPORT_FETCH_SIZE || "1000");
+// Tiap export menahan satu koneksi pool selama download berlangsung
+const EXPORT_MAX_CONCURRENT = parseInt(process.env.EXPORT_MAX_CONCURRENT || "2");
+
+export const EXPORT_RESOURCES: ExportResource[] = ["pembelian", "penjualan", "log-stok"];
+export type ExportFormat = "csv" | "xlsx";
+
+let activeExports = 0;
+
+// Kolom timestamp tanpa zona waktu berisi waktu UTC (lihat utcTimestamp), tetapi parser bawaan
+// pg membacanya sebagai waktu lokal TZ proses. Query cursor export memakai parser UTC sendiri.
+const TIMESTAMP_OID = 1114;
+
+export function parseUtcTimestamp(value: string): Date {
+  return new Date(`${value.replace(" ", "T")}Z`);
+}
+
+const exportTypes = {
+  getTypeParser: (oid: number, format?: any) =>
+    oid === TIMESTAMP_OID ? parseUtcTimestamp : types.getTypeParser(oid, format),
+};
+
+function csvCell(value: unknown): string {
+  if (value === null || value === undefined) return "";
+  const text = value instanceof Date ? value.toISOString() : String(value);
+  return /[",\r\n]/.test(text) ? `"${text.replace(/"/g, '""')}"` : text;
+}
+
+function csvLine(values: unknown[]): string {
+  return values.map(csvCell).join(",") + "\r\n";
+}
+
+function exportFilename(resource: string, req: Request, format: ExportFormat): string {
+  const range = [req.query.from, req.query.to].filter((value) => typeof value === "string").join("_");
+  return `${resource}${range ? `_${range}` : ""}.${format}`.replace(/[^\w.-]/g, "-");
+}
+
+export async function streamExport(req: Request, res: Response) {
+  const resource = req.params.resource as ExportResource;
+  const format = (req.query.format || "csv") as ExportFormat;
+  if (!EXPORT_RESOURCES.includes(resource)) {
+    return res.status(404).json({ message: `Export tidak tersedia untuk ${resource}` });
+  }
+  if (format !== "csv" && format !== "xlsx") {
+    return res.status(400).json({ message: "Format export harus csv atau xlsx" });
+  }
+
+  let query: ExportQuery;
+  try {
+    query = buildExportQuery(resource, parseListOptions(req));
+  } catch (error) {
+    if (error instanceof ListQueryError) {
+      return res.status(400).json({ message: error.message });
+    }
+    console.error(`Error exporting ${resource}:`, error);
+    return res.status(500).json({ message: `Failed to export ${resource}` });
+  }
+
+  if (activeExports >= EXPORT_MAX_CONCURRENT) {
+    res.setHeader("Retry-After", "5");
+    return res.status(429).json({ message: "Export lain sedang berjalan, silakan coba lagi" });
+  }
+  activeExports++;
+
+  let closed = false;
+  res.on("close", () => {
+    closed = true;
+  });
+
+  // Tunggu buffer socket kosong sebelum menulis lagi; berhenti jika klien memutus koneksi
+  const write = async (chunk: string | Buffer) => {
+    if (closed) return;
+    if (!res.write(chunk) && !closed) {
+      await Promise.race([once(res, "drain"), once(res, "close")]);
+    }
+  };
+
+  let client: Awaited<ReturnType<typeof pool.connect>> | undefined;
+  try {
+    client = await pool.connect();
+    await client.query("BEGIN ISOLATION LEVEL REPEATABLE READ READ ONLY");
+    await client.query({ text: `DECLARE export_cursor NO SCROLL CURSOR FOR ${query.sql}`, values: query.params as any[] });
+
+    const header = query.columns.map((column) => column.key);
+    res.status(200);
+    res.setHeader("Content-Disposition", `attachment; filename="${exportFilename(resource, req, format)}"`);
+    res.setHeader("Cache-Control", "no-store");
+    let xlsx: XlsxStreamWriter | undefined;
+    if (format === "xlsx") {
+      res.setHeader("Content-Type", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet");
+      xlsx = new XlsxStreamWriter(write, resource);
+      await xlsx.begin(header);
+    } else {
+      res.setHeader("Content-Type", "text/csv; charset=utf-8");
+      await write(csvLine(header));
+    }
+
+    while (!closed) {
+      const batch = await client.query({ text: `FETCH ${EXPORT_FETCH_SIZE} FROM export_cursor`, types: exportTypes as any });
+      if (batch.rows.length === 0) break;
+      const values = batch.rows.map((row: Record<string, unknown>) => query.columns.map((column) => row[column.name]));
+      if (xlsx) {
+        await xlsx.writeRows(values);
+        if (xlsx.full) {
+          console.warn(`Export ${resource} dipotong di batas baris XLSX`);
+          break;
+        }
+      } else {
+        await write(values.map(csvLine).join(""));
+      }
+    }
+
+    await client.query(closed ? "ROLLBACK" : "COMMIT");
+    if (!closed) {
+      if (xlsx) await xlsx.end();
+      res.end();
+    }
+  } catch (error) {
+    console.error(`Error exporting ${resource}:`, error);
+    await client?.query("ROLLBACK").catch(() => undefined);
+    if (!res.headersSent) {
+      res.status(500).json({ message: `Failed to export ${resource}` });
+    } else {
+      // Header sudah terkirim: putus koneksi agar klien tidak menganggap file terpotong sebagai lengkap
+      res.destroy(error as Error);
+    }
+  } finally {
+    client?.release();
+    activeExports--;
+  }
+}
@@ -1,10 +1,20 @@
 import express, { type Request, Response, NextFunction } from "express";
 import { registerRoutes } from "./routes";
 import { setupVite, serveStatic, log } from "./vite";
+import { trafficRecorder } from "./trafficRecorder";
+import { ActivityLogger } from "./activityLogger";
+import { routeMetrics } from "./metrics";
+import { startStokSnapshotScheduler } from "./stokSnapshot";
 
 const app = express();
 app.use(express.json());
 app.use(express.urlencoded({ extended: false }));
+app.use(routeMetrics());
+
+// Rekam trafik untuk direplay (TRAFFIC_TRACE_FILE=trace.ndjson)
+if (process.env.TRAFFIC_TRACE_FILE) {
+  app.use(trafficRecorder(process.env.TRAFFIC_TRACE_FILE));
+}
 
 app.use((req, res, next) => {
   const start = Date.now();
@@ -68,4 +78,17 @@ app.use((req, res, next) => {
   }, () => {
     log(`serving on port ${port}`);
   });
+
+  // Snapshot stok periodik untuk query stok point-in-time (STOK_SNAPSHOT_INTERVAL_MS)
+  startStokSnapshotScheduler();
+
+  // Tulis log aktivitas yang masih di buffer sebelum proses berhenti
+  const shutdown = async (signal: string) => {
+    log(`${signal} received, flushing activity log`);
+    server.close();
+    await ActivityLogger.shutdown();
+    process.exit(0);
+  };
+  process.once("SIGTERM", () => void shutdown("SIGTERM"));
+  process.once("SIGINT", () => void shutdown("SIGINT"));
 })();
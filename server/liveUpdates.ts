@@ -0,0 +1,304 @@
+import type { Request, Response } from "express";
+import { Counter, Gauge } from "./metrics";
+
+// Kanal push Server-Sent Events (GET /api/live) untuk perubahan stok dan dashboard,
+// pengganti polling /api/stok dan /api/dashboard/metrics. Perubahan dalam satu tick
+// digabung jadi satu event yang di-encode sekali untuk semua klien. Klien yang socket-nya
+// penuh tidak ditulisi lagi; perubahan untuknya digabung (stok terakhir per stokId, field
+// dashboard terakhir) sampai socket drain, jadi memori per klien tetap terbatas.
+const LIVE_MAX_CLIENTS = parseInt(process.env.LIVE_MAX_CLIENTS || "1000");
+// Jendela penggabungan reload dashboard saat transaksi datang beruntun
+const LIVE_DASHBOARD_COALESCE_MS = parseInt(process.env.LIVE_DASHBOARD_COALESCE_MS || "100");
+const LIVE_HEARTBEAT_MS = parseInt(process.env.LIVE_HEARTBEAT_MS || "15000");
+// Klien yang buffer-nya melewati batas ini atau tertahan terlalu lama diputus
+const LIVE_MAX_BUFFER_BYTES = parseInt(process.env.LIVE_MAX_BUFFER_BYTES || "1048576");
+const LIVE_MAX_BLOCKED_MS = parseInt(process.env.LIVE_MAX_BLOCKED_MS || "30000");
+const LIVE_RETRY_MS = 3000;
+// Referensi dokumen per stokId yang dibawa satu event (sisanya hanya dihitung)
+const MAX_REFERENSI = 50;
+
+export type LiveTopic = "stok" | "dashboard";
+const TOPICS: LiveTopic[] = ["stok", "dashboard"];
+
+export interface StockChange {
+  stokId: number;
+  jenisItem: string;
+  jumlah: number; // jumlah baris stok setelah commit
+  delta: number; // total perubahan yang digabung dalam event ini
+  referensi: string[]; // "pembelian:12", dipakai klien untuk mencocokkan penulisannya
+  truncated?: number;
+}
+
+type DashboardFields = Record<string, unknown>;
+
+interface LiveBatch {
+  stok: Map<number, StockChange>;
+  dashboard?: DashboardFields;
+}
+
+interface LiveSources {
+  stok: () => Promise<unknown[]>;
+  dashboard: () => Promise<object>;
+}
+
+interface LiveClient {
+  id: number;
+  res: Response;
+  topics: Set<LiveTopic>;
+  ready: boolean; // snapshot awal sudah terkirim
+  blockedSince?: number;
+  backlog?: LiveBatch; // perubahan yang digabung selama klien belum siap/tertahan
+}
+
+const clientsConnected = new Counter("padidoc_live_connections_total", "Koneksi live yang dibuka");
+const clientsDropped = new Counter("padidoc_live_dropped_clients_total", "Klien live yang diputus karena lambat");
+const eventsSent = new Counter("padidoc_live_events_total", "Event live yang ditulis ke klien");
+const batchesCoalesced = new Counter("padidoc_live_coalesced_total", "Batch yang digabung ke backlog klien tertahan");
+
+function emptyBatch(): LiveBatch {
+  return { stok: new Map() };
+}
+
+function mergeStock(target: Map<number, StockChange>, change: StockChange) {
+  const previous = target.get(change.stokId);
+  if (!previous) {
+    target.set(change.stokId, { ...change, referensi: [...change.referensi] });
+    return;
+  }
+  previous.jumlah = change.jumlah;
+  previous.delta += change.delta;
+  for (const ref of change.referensi) {
+    if (previous.referensi.length < MAX_REFERENSI) previous.referensi.push(ref);
+    else previous.truncated = (previous.truncated || 0) + 1;
+  }
+  if (change.truncated) previous.truncated = (previous.truncated || 0) + change.truncated;
+}
+
+function mergeBatch(target: LiveBatch, batch: LiveBatch) {
+  batch.stok.forEach((change) => mergeStock(target.stok, change));
+  if (batch.dashboard) target.dashboard = { ...target.dashboard, ...batch.dashboard };
+}
+
+function sameValue(a: unknown, b: unknown): boolean {
+  return a === b || JSON.stringify(a) === JSON.stringify(b);
+}
+
+class LiveUpdates {
+  private clients = new Set<LiveClient>();
+  private nextId = 1;
+  private seq = 0;
+  private pending = emptyBatch();
+  private flushScheduled = false;
+  private sources?: LiveSources;
+  private lastDashboard?: DashboardFields;
+  private dashboardTimer?: NodeJS.Timeout;
+  private dashboardLoading = false;
+  private dashboardDirty = false;
+  private heartbeat?: NodeJS.Timeout;
+
+  configure(sources: LiveSources) {
+    this.sources = sources;
+  }
+
+  // Dipanggil setelah commit transaksi stok
+  publishStock(changes: StockChange[]) {
+    if (changes.length === 0 || !this.hasSubscribers("stok")) return;
+    for (const change of changes) mergeStock(this.pending.stok, change);
+    this.scheduleFlush();
+  }
+
+  // Dipanggil setiap data dashboard berubah; reload digabung per LIVE_DASHBOARD_COALESCE_MS
+  dashboardChanged() {
+    if (!this.hasSubscribers("dashboard")) {
+      this.lastDashboard = undefined;
+      return;
+    }
+    if (this.dashboardLoading) {
+      this.dashboardDirty = true;
+      return;
+    }
+    if (this.dashboardTimer) return;
+    this.dashboardTimer = setTimeout(() => void this.reloadDashboard(), LIVE_DASHBOARD_COALESCE_MS);
+  }
+
+  private async reloadDashboard() {
+    this.dashboardTimer = undefined;
+    if (!this.sources) return;
+    this.dashboardLoading = true;
+    try {
+      const metrics = (await this.sources.dashboard()) as DashboardFields;
+      const changes: DashboardFields = {};
+      for (const [key, value] of Object.entries(metrics)) {
+        if (!this.lastDashboard || !sameValue(this.lastDashboard[key], value)) changes[key] = value;
+      }
+      this.lastDashboard = metrics;
+      if (Object.keys(changes).length > 0) {
+        this.pending.dashboard = { ...this.pending.dashboard, ...changes };
+        this.scheduleFlush();
+      }
+    } catch (error) {
+      console.error("Error loading live dashboard:", error);
+    } finally {
+      this.dashboardLoading = false;
+      if (this.dashboardDirty) {
+        this.dashboardDirty = false;
+        this.dashboardChanged();
+      }
+    }
+  }
+
+  private hasSubscribers(topic: LiveTopic): boolean {
+    for (const client of Array.from(this.clients)) {
+      if (client.topics.has(topic)) return true;
+    }
+    return false;
+  }
+
+  private scheduleFlush() {
+    if (this.flushScheduled) return;
+    this.flushScheduled = true;
+    setImmediate(() => this.flush());
+  }
+
+  private encode(batch: LiveBatch, topics: Set<LiveTopic>): string {
+    let chunk = "";
+    const at = Date.now();
+    if (batch.stok.size > 0 && topics.has("stok")) {
+      const seq = ++this.seq;
+      chunk += `id: ${seq}\nevent: stok\ndata: ${JSON.stringify({ seq, at, items: Array.from(batch.stok.values()) })}\n\n`;
+    }
+    if (batch.dashboard && topics.has("dashboard")) {
+      const seq = ++this.seq;
+      chunk += `id: ${seq}\nevent: dashboard\ndata: ${JSON.stringify({ seq, at, changes: batch.dashboard })}\n\n`;
+    }
+    return chunk;
+  }
+
+  private flush() {
+    this.flushScheduled = false;
+    const batch = this.pending;
+    this.pending = emptyBatch();
+
+    // Satu encoding untuk semua klien dengan topik yang sama dan tanpa backlog
+    const shared = new Map<string, string>();
+    for (const client of Array.from(this.clients)) {
+      if (client.backlog || !client.ready || client.blockedSince !== undefined) {
+        client.backlog = client.backlog || emptyBatch();
+        mergeBatch(client.backlog, batch);
+        batchesCoalesced.inc();
+        if (client.ready && client.blockedSince === undefined) this.drainBacklog(client);
+        continue;
+      }
+      const key = Array.from(client.topics).join(",");
+      if (!shared.has(key)) shared.set(key, this.encode(batch, client.topics));
+      this.send(client, shared.get(key)!);
+    }
+  }
+
+  private drainBacklog(client: LiveClient) {
+    const backlog = client.backlog;
+    client.backlog = undefined;
+    if (backlog) this.send(client, this.encode(backlog, client.topics));
+  }
+
+  private send(client: LiveClient, chunk: string) {
+    if (!chunk || client.res.writableEnded) return;
+    eventsSent.inc({}, chunk.split("\nevent: ").length - 1);
+    if (!client.res.write(chunk)) {
+      client.blockedSince = Date.now();
+      client.res.once("drain", () => {
+        client.blockedSince = undefined;
+        this.drainBacklog(client);
+      });
+    }
+    if (client.res.writableLength > LIVE_MAX_BUFFER_BYTES) this.drop(client, "buffer");
+  }
+
+  private drop(client: LiveClient, reason: string) {
+    clientsDropped.inc({ reason });
+    this.clients.delete(client);
+    client.res.destroy();
+  }
+
+  private startHeartbeat() {
+    if (this.heartbeat) return;
+    this.heartbeat = setInterval(() => {
+      const now = Date.now();
+      for (const client of Array.from(this.clients)) {
+        if (client.blockedSince !== undefined) {
+          if (now - client.blockedSince > LIVE_MAX_BLOCKED_MS) this.drop(client, "blocked");
+        } else if (client.ready) {
+          client.res.write(": ping\n\n");
+        }
+      }
+    }, LIVE_HEARTBEAT_MS);
+    this.heartbeat.unref();
+  }
+
+  // GET /api/live?topics=stok,dashboard
+  async handler(req: Request, res: Response) {
+    const requested = typeof req.query.topics === "string" ? req.query.topics.split(",") : TOPICS;
+    const topics = new Set(TOPICS.filter((topic) => requested.includes(topic)));
+    if (topics.size === 0) {
+      return res.status(400).json({ message: "Topik live harus stok dan/atau dashboard" });
+    }
+    if (this.clients.size >= LIVE_MAX_CLIENTS) {
+      res.setHeader("Retry-After", "5");
+      return res.status(503).json({ message: "Koneksi live penuh, silakan coba lagi" });
+    }
+
+    res.status(200);
+    res.setHeader("Content-Type", "text/event-stream; charset=utf-8");
+    res.setHeader("Cache-Control", "no-store");
+    res.setHeader("Connection", "keep-alive");
+    res.setHeader("X-Accel-Buffering", "no");
+    res.flushHeaders();
+    req.socket.setNoDelay(true);
+
+    // Klien didaftarkan sebelum snapshot dibaca; perubahan selama itu masuk backlog
+    const client: LiveClient = { id: this.nextId++, res, topics, ready: false };
+    this.clients.add(client);
+    clientsConnected.inc();
+    this.startHeartbeat();
+    res.on("close", () => {
+      this.clients.delete(client);
+    });
+
+    try {
+      const snapshot: Record<string, unknown> = {};
+      if (topics.has("stok") && this.sources) snapshot.stok = await this.sources.stok();
+      if (topics.has("dashboard") && this.sources) {
+        const dashboard = (await this.sources.dashboard()) as DashboardFields;
+        snapshot.dashboard = dashboard;
+        this.lastDashboard = this.lastDashboard || dashboard;
+      }
+      if (res.writableEnded || !this.clients.has(client)) return;
+      const seq = ++this.seq;
+      client.ready = true;
+      this.send(client, `retry: ${LIVE_RETRY_MS}\nid: ${seq}\nevent: snapshot\ndata: ${JSON.stringify({ seq, at: Date.now(), ...snapshot })}\n\n`);
+      if (client.blockedSince === undefined) this.drainBacklog(client);
+    } catch (error) {
+      console.error("Error opening live stream:", error);
+      this.clients.delete(client);
+      res.destroy(error as Error);
+    }
+  }
+
+  stats() {
+    let blocked = 0;
+    this.clients.forEach((client) => {
+      if (client.blockedSince !== undefined) blocked++;
+    });
+    return { clients: this.clients.size, blocked };
+  }
+}
+
+export const liveUpdates = new LiveUpdates();
+
+new Gauge("padidoc_live_clients", "Klien live per status", () => {
+  const stats = liveUpdates.stats();
+  return [
+    { labels: { state: "connected" }, value: stats.clients },
+    { labels: { state: "blocked" }, value: stats.blocked },
+  ];
+});
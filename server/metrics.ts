@@ -0,0 +1,181 @@
+import type { Request, Response, NextFunction } from "express";
+
+// Registry metrik in-process yang dirender dalam format teks Prometheus di
+// /api/internal/metrics. Modul lain mendaftarkan histogram, counter dan gauge
+// miliknya sendiri; modul ini sengaja tidak mengimpor db/storage agar bebas siklus.
+
+// Batas bucket dalam detik, 0.5 ms sampai 10 s
+const DEFAULT_BUCKETS = [0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10];
+
+// Batas jumlah kombinasi label per metrik; sisanya digabung ke label "other"
+const MAX_SERIES = parseInt(process.env.METRICS_MAX_SERIES || "200");
+
+type Labels = Record<string, string>;
+
+interface Series<T> {
+  labels: Labels;
+  value: T;
+}
+
+interface HistogramValue {
+  counts: number[];
+  sum: number;
+  count: number;
+}
+
+function escapeLabel(value: string): string {
+  return value.replace(/\\/g, "\\\\").replace(/"/g, '\\"').replace(/\n/g, "\\n");
+}
+
+function formatLabels(labels: Labels, extra?: Labels): string {
+  const entries = Object.entries({ ...labels, ...extra });
+  if (entries.length === 0) return "";
+  return `{${entries.map(([key, value]) => `${key}="${escapeLabel(value)}"`).join(",")}}`;
+}
+
+const metrics: Metric<any>[] = [];
+
+abstract class Metric<T> {
+  protected series = new Map<string, Series<T>>();
+
+  constructor(readonly name: string, readonly help: string, readonly type: string) {
+    metrics.push(this);
+  }
+
+  protected abstract initial(): T;
+
+  protected entry(labels: Labels): Series<T> {
+    let key = JSON.stringify(labels);
+    let series = this.series.get(key);
+    if (!series) {
+      if (this.series.size >= MAX_SERIES) {
+        labels = Object.fromEntries(Object.keys(labels).map((name) => [name, "other"]));
+        key = JSON.stringify(labels);
+        series = this.series.get(key);
+      }
+      if (!series) {
+        series = { labels, value: this.initial() };
+        this.series.set(key, series);
+      }
+    }
+    return series;
+  }
+
+  abstract render(): string[];
+}
+
+export class Histogram extends Metric<HistogramValue> {
+  constructor(name: string, help: string, private buckets: number[] = DEFAULT_BUCKETS) {
+    super(name, help, "histogram");
+  }
+
+  protected initial(): HistogramValue {
+    return { counts: new Array(this.buckets.length).fill(0), sum: 0, count: 0 };
+  }
+
+  observe(seconds: number, labels: Labels = {}) {
+    const value = this.entry(labels).value;
+    const index = this.buckets.findIndex((bound) => seconds <= bound);
+    if (index >= 0) value.counts[index]++;
+    value.sum += seconds;
+    value.count++;
+  }
+
+  render(): string[] {
+    const lines: string[] = [];
+    for (const { labels, value } of Array.from(this.series.values())) {
+      // Bucket Prometheus bersifat kumulatif
+      let cumulative = 0;
+      this.buckets.forEach((bound, index) => {
+        cumulative += value.counts[index];
+        lines.push(`${this.name}_bucket${formatLabels(labels, { le: String(bound) })} ${cumulative}`);
+      });
+      lines.push(`${this.name}_bucket${formatLabels(labels, { le: "+Inf" })} ${value.count}`);
+      lines.push(`${this.name}_sum${formatLabels(labels)} ${value.sum}`);
+      lines.push(`${this.name}_count${formatLabels(labels)} ${value.count}`);
+    }
+    return lines;
+  }
+}
+
+export class Counter extends Metric<number> {
+  constructor(name: string, help: string) {
+    super(name, help, "counter");
+  }
+
+  protected initial(): number {
+    return 0;
+  }
+
+  inc(labels: Labels = {}, amount = 1) {
+    this.entry(labels).value += amount;
+  }
+
+  render(): string[] {
+    return Array.from(this.series.values()).map(({ labels, value }) => `${this.name}${formatLabels(labels)} ${value}`);
+  }
+}
+
+// Gauge dibaca saat scrape dari sumber aslinya (pool, cache, buffer) sehingga tidak perlu disinkronkan
+export class Gauge extends Metric<number> {
+  constructor(name: string, help: string, private read: () => number | Series<number>[], type = "gauge") {
+    super(name, help, type);
+  }
+
+  protected initial(): number {
+    return 0;
+  }
+
+  render(): string[] {
+    const value = this.read();
+    const series = typeof value === "number" ? [{ labels: {}, value }] : value;
+    return series.map(({ labels, value }) => `${this.name}${formatLabels(labels)} ${value}`);
+  }
+}
+
+export function renderMetrics(): string {
+  const lines: string[] = [];
+  for (const metric of metrics) {
+    let samples: string[];
+    try {
+      samples = metric.render();
+    } catch (error) {
+      console.error(`Failed to render metric ${metric.name}:`, error);
+      continue;
+    }
+    lines.push(`# HELP ${metric.name} ${metric.help}`, `# TYPE ${metric.name} ${metric.type}`, ...samples);
+  }
+  return lines.join("\n") + "\n";
+}
+
+new Gauge("padidoc_process_memory_bytes", "Memori proses Node", () => {
+  const memory = process.memoryUsage();
+  return [
+    { labels: { type: "rss" }, value: memory.rss },
+    { labels: { type: "heap_used" }, value: memory.heapUsed },
+    { labels: { type: "external" }, value: memory.external },
+  ];
+});
+
+const httpDuration = new Histogram(
+  "padidoc_http_request_duration_seconds",
+  "Latensi request API per route",
+);
+
+// Latensi per route memakai pola route Express (/api/pembelian/:id), bukan path mentah,
+// agar jumlah seri tetap kecil
+export function routeMetrics() {
+  return (req: Request, res: Response, next: NextFunction) => {
+    if (!req.path.startsWith("/api")) return next();
+    const started = process.hrtime.bigint();
+    res.on("finish", () => {
+      const route = req.route?.path ? `${req.baseUrl}${req.route.path}` : "unmatched";
+      httpDuration.observe(Number(process.hrtime.bigint() - started) / 1e9, {
+        method: req.method,
+        route,
+        status: `${Math.floor(res.statusCode / 100)}xx`,
+      });
+    });
+    next();
+  };
+}
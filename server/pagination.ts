@@ -0,0 +1,55 @@
+import type { Request, Response } from "express";
+import { z } from "zod";
+
+// Keyset pagination untuk endpoint list: ?after=<id>&limit=<n>&from=&to=&jenisItem=
+// Tanpa limit, list dibatasi DEFAULT_PAGE_LIMIT; ?all=1 meminta seluruh baris secara eksplisit
+export const DEFAULT_PAGE_LIMIT = 100;
+export const MAX_PAGE_LIMIT = 1000;
+
+export interface ListOptions {
+  after?: number; // hanya baris dengan id < after (urutan id menurun)
+  limit?: number;
+  from?: Date; // inklusif
+  to?: Date; // eksklusif
+  jenisItem?: string;
+}
+
+const listQuerySchema = z.object({
+  after: z.coerce.number().int().positive().optional(),
+  limit: z.coerce.number().int().positive().transform((value) => Math.min(value, MAX_PAGE_LIMIT)).optional(),
+  from: z.coerce.date().optional(),
+  to: z.coerce.date().optional(),
+  jenisItem: z.string().min(1).optional(),
+  all: z.enum(["1", "true"]).optional(),
+});
+
+export class ListQueryError extends Error {}
+
+// Kolom timestamp tanpa zona waktu menyimpan waktu UTC (konvensi drizzle). Semua batas waktu
+// dikirim sebagai string UTC eksplisit agar hasilnya tidak bergantung pada TZ proses Node.
+export function utcTimestamp(value: Date): string {
+  return value.toISOString().replace("T", " ").replace("Z", "");
+}
+
+export function parseListOptions(req: Request): ListOptions {
+  const result = listQuerySchema.safeParse(req.query);
+  if (!result.success) {
+    throw new ListQueryError("Parameter query tidak valid");
+  }
+
+  const { all, ...options }: ListOptions & { all?: string } = result.data;
+  // Handler GET tidak membaca seluruh tabel kecuali diminta lewat ?all=1 (tanpa cursor)
+  if (!options.limit && (options.after || !all)) {
+    options.limit = DEFAULT_PAGE_LIMIT;
+  }
+  return options;
+}
+
+// Body tetap berupa array agar kompatibel dengan frontend; cursor halaman berikutnya di header
+export function sendPage<T extends { id: number }>(res: Response, rows: T[], options: ListOptions) {
+  if (options.limit && rows.length === options.limit) {
+    const nextCursor = String(rows[rows.length - 1].id);
+    res.setHeader("X-Next-Cursor", nextCursor);
+  }
+  res.json(rows);
+}
@@ -0,0 +1,142 @@
+import os from "os";
+import { Worker } from "worker_threads";
+import { Gauge } from "./metrics";
+
+// bcrypt (bcryptjs, pure JS) di cost 12 memakan ~200 ms CPU per operasi. Hashing dijalankan
+// di pool worker thread berukuran tetap agar event loop utama tetap melayani request lain.
+// Antrean dibatasi: saat penuh request langsung ditolak (429) daripada menumpuk.
+const POOL_SIZE = parseInt(process.env.PASSWORD_POOL_SIZE || String(Math.max(1, Math.min(4, os.cpus().length - 1))));
+const MAX_QUEUE = parseInt(process.env.PASSWORD_POOL_MAX_QUEUE || "32");
+
+// Kode worker di-eval agar tetap berjalan baik lewat tsx maupun bundle esbuild (dist/index.js)
+const WORKER_SOURCE = `
+const { parentPort } = require("worker_threads");
+const bcrypt = require("bcryptjs");
+parentPort.on("message", async ({ id, op, args }) => {
+  try {
+    const result = op === "hash" ? await bcrypt.hash(args[0], args[1]) : await bcrypt.compare(args[0], args[1]);
+    parentPort.postMessage({ id, result });
+  } catch (error) {
+    parentPort.postMessage({ id, error: error && error.message ? error.message : String(error) });
+  }
+});
+`;
+
+type PasswordOp = "hash" | "compare";
+
+interface PasswordTask {
+  id: number;
+  op: PasswordOp;
+  args: Array<string | number>;
+  resolve: (value: any) => void;
+  reject: (error: Error) => void;
+}
+
+interface PoolWorker {
+  worker: Worker;
+  task?: PasswordTask;
+}
+
+export interface PasswordPoolStats {
+  size: number;
+  busy: number;
+  queued: number;
+  maxQueue: number;
+  completed: number;
+  rejected: number;
+}
+
+export class PasswordPoolSaturatedError extends Error {
+  constructor() {
+    super("Server sedang sibuk, silakan coba lagi");
+  }
+}
+
+class PasswordPool {
+  private workers: PoolWorker[] = [];
+  private queue: PasswordTask[] = [];
+  private nextId = 1;
+  private completed = 0;
+  private rejected = 0;
+
+  constructor(private size: number, private maxQueue: number) {}
+
+  get saturated(): boolean {
+    return this.queue.length >= this.maxQueue;
+  }
+
+  run<T>(op: PasswordOp, args: Array<string | number>): Promise<T> {
+    if (this.saturated) {
+      this.rejected++;
+      return Promise.reject(new PasswordPoolSaturatedError());
+    }
+    return new Promise<T>((resolve, reject) => {
+      this.queue.push({ id: this.nextId++, op, args, resolve, reject });
+      this.dispatch();
+    });
+  }
+
+  private spawn(): PoolWorker {
+    const entry: PoolWorker = { worker: new Worker(WORKER_SOURCE, { eval: true }) };
+    entry.worker.on("message", (message: { id: number; result?: unknown; error?: string }) => {
+      const task = entry.task;
+      entry.task = undefined;
+      // Worker menganggur tidak boleh menahan proses (mis. script seed) tetap hidup
+      entry.worker.unref();
+      if (task && task.id === message.id) {
+        this.completed++;
+        if (message.error) task.reject(new Error(message.error));
+        else task.resolve(message.result);
+      }
+      this.dispatch();
+    });
+    entry.worker.on("error", (error) => {
+      console.error("Password worker error:", error);
+      entry.task?.reject(error);
+      entry.task = undefined;
+    });
+    entry.worker.on("exit", () => {
+      entry.task?.reject(new Error("Password worker berhenti"));
+      this.workers = this.workers.filter((item) => item !== entry);
+      this.dispatch();
+    });
+    entry.worker.unref();
+    this.workers.push(entry);
+    return entry;
+  }
+
+  private dispatch() {
+    while (this.queue.length > 0) {
+      let idle = this.workers.find((item) => !item.task);
+      if (!idle && this.workers.length < this.size) idle = this.spawn();
+      if (!idle) return;
+
+      const task = this.queue.shift()!;
+      idle.task = task;
+      idle.worker.ref();
+      idle.worker.postMessage({ id: task.id, op: task.op, args: task.args });
+    }
+  }
+
+  stats(): PasswordPoolStats {
+    return {
+      size: this.size,
+      busy: this.workers.filter((item) => item.task).length,
+      queued: this.queue.length,
+      maxQueue: this.maxQueue,
+      completed: this.completed,
+      rejected: this.rejected,
+    };
+  }
+}
+
+export const passwordPool = new PasswordPool(POOL_SIZE, MAX_QUEUE);
+
+new Gauge("padidoc_password_pool_tasks", "Tugas bcrypt per status", () => {
+  const stats = passwordPool.stats();
+  return [
+    { labels: { state: "busy" }, value: stats.busy },
+    { labels: { state: "queued" }, value: stats.queued },
+  ];
+});
+new Gauge("padidoc_password_pool_rejected_total", "Tugas bcrypt yang ditolak karena antrean penuh", () => passwordPool.stats().rejected, "counter");
@@ -0,0 +1,290 @@
+import { db } from "./db";
+import { and, asc, eq, gte, lte, sql } from "drizzle-orm";
+import { z } from "zod";
+import {
+  rekapHarian,
+  type Pembelian,
+  type Produksi,
+  type Penjualan,
+  type RekapHarian,
+} from "@shared/schema";
+
+// Rekap harian per (tanggal, jenisItem): setiap penulisan transaksi menambahkan selisihnya,
+// sehingga laporan dan dashboard cukup membaca O(hari) baris, bukan O(transaksi)
+
+type DbTransaction = Parameters<Parameters<typeof db.transaction>[0]>[0];
+
+export interface RekapDelta {
+  tanggal: string; // YYYY-MM-DD
+  jenisItem: string;
+  pembelianKg?: number;
+  pembelianNilai?: number;
+  produksiInputKg?: number;
+  produksiOutputKg?: number;
+  penjualanKg?: number;
+  penjualanNilai?: number;
+  jumlahTransaksi?: number;
+}
+
+const REKAP_FIELDS = [
+  "pembelianKg",
+  "pembelianNilai",
+  "produksiInputKg",
+  "produksiOutputKg",
+  "penjualanKg",
+  "penjualanNilai",
+  "jumlahTransaksi",
+] as const;
+
+// Hari bisnis penggilingan, bukan hari UTC: transaksi 00:00-07:00 WIB masuk ke tanggal
+// lokalnya. Kolom timestamp berisi waktu UTC (lihat utcTimestamp), jadi SQL rebuild
+// mengonversinya dengan zona yang sama lewat rekapTanggal
+export const REKAP_TZ = process.env.REKAP_TZ || "Asia/Jakarta";
+
+// en-CA memformat tanggal sebagai YYYY-MM-DD; zona yang tidak dikenal langsung gagal saat start
+const rekapDateFormat = new Intl.DateTimeFormat("en-CA", {
+  timeZone: REKAP_TZ,
+  year: "numeric",
+  month: "2-digit",
+  day: "2-digit",
+});
+
+export function rekapDate(value: Date): string {
+  return rekapDateFormat.format(value);
+}
+
+// Padanan rekapDate di SQL untuk kolom timestamp (UTC) tanpa zona waktu
+function rekapTanggal(column: string) {
+  return sql`(${sql.raw(column)} at time zone 'UTC' at time zone ${REKAP_TZ})::date`;
+}
+
+function toNumber(value: unknown): number {
+  return parseFloat(value?.toString() || "0") || 0;
+}
+
+export function pembelianRekap(item: Pembelian): RekapDelta[] {
+  return [{
+    tanggal: rekapDate(item.tanggal),
+    jenisItem: item.jenisBarang || "gabah",
+    pembelianKg: toNumber(item.jumlah),
+    pembelianNilai: toNumber(item.totalHarga),
+    jumlahTransaksi: 1,
+  }];
+}
+
+// Produksi dicatat sebagai input gabah dan output per produk; rendemen dihitung saat dibaca
+export function produksiRekap(item: Produksi): RekapDelta[] {
+  const tanggal = rekapDate(item.tanggal);
+  const deltas: RekapDelta[] = [{
+    tanggal,
+    jenisItem: "gabah",
+    produksiInputKg: toNumber(item.jumlahGabahInput),
+    jumlahTransaksi: 1,
+  }];
+  const outputs: Array<[string, unknown]> = [
+    ["beras", item.jumlahBerasOutput],
+    ["katul", item.jumlahKatul],
+    ["menir", item.jumlahMenir],
+    ["sekam", item.jumlahSekam],
+  ];
+  for (const [jenisItem, jumlah] of outputs) {
+    const produksiOutputKg = toNumber(jumlah);
+    if (produksiOutputKg > 0) {
+      deltas.push({ tanggal, jenisItem, produksiOutputKg });
+    }
+  }
+  return deltas;
+}
+
+export function penjualanRekap(item: Penjualan): RekapDelta[] {
+  return [{
+    tanggal: rekapDate(item.tanggal),
+    jenisItem: item.jenisBarang || "beras",
+    penjualanKg: toNumber(item.jumlah),
+    penjualanNilai: toNumber(item.totalHarga),
+    jumlahTransaksi: 1,
+  }];
+}
+
+export function negateRekap(deltas: RekapDelta[]): RekapDelta[] {
+  return deltas.map((delta) => {
+    const negated: RekapDelta = { tanggal: delta.tanggal, jenisItem: delta.jenisItem };
+    for (const field of REKAP_FIELDS) {
+      if (delta[field]) negated[field] = -delta[field]!;
+    }
+    return negated;
+  });
+}
+
+// Satu baris per (tanggal, jenisItem): multi-row upsert menolak key yang sama dua kali
+function mergeRekap(deltas: RekapDelta[]): RekapDelta[] {
+  const merged = new Map<string, RekapDelta>();
+  for (const delta of deltas) {
+    const key = `${delta.tanggal}|${delta.jenisItem}`;
+    const current = merged.get(key) || { tanggal: delta.tanggal, jenisItem: delta.jenisItem };
+    for (const field of REKAP_FIELDS) {
+      if (delta[field]) current[field] = (current[field] || 0) + delta[field]!;
+    }
+    merged.set(key, current);
+  }
+  // Urutan tetap agar row lock antar transaksi selalu sama (hindari deadlock)
+  return Array.from(merged.values())
+    .filter((delta) => REKAP_FIELDS.some((field) => delta[field]))
+    .sort((a, b) => a.tanggal.localeCompare(b.tanggal) || a.jenisItem.localeCompare(b.jenisItem));
+}
+
+export async function applyRekap(tx: DbTransaction, deltas: RekapDelta[]): Promise<void> {
+  const rows = mergeRekap(deltas);
+  if (rows.length === 0) return;
+
+  await tx
+    .insert(rekapHarian)
+    .values(rows.map((row) => ({
+      tanggal: row.tanggal,
+      jenisItem: row.jenisItem,
+      pembelianKg: (row.pembelianKg || 0).toFixed(2),
+      pembelianNilai: (row.pembelianNilai || 0).toFixed(2),
+      produksiInputKg: (row.produksiInputKg || 0).toFixed(2),
+      produksiOutputKg: (row.produksiOutputKg || 0).toFixed(2),
+      penjualanKg: (row.penjualanKg || 0).toFixed(2),
+      penjualanNilai: (row.penjualanNilai || 0).toFixed(2),
+      jumlahTransaksi: row.jumlahTransaksi || 0,
+    })))
+    .onConflictDoUpdate({
+      target: [rekapHarian.tanggal, rekapHarian.jenisItem],
+      set: {
+        pembelianKg: sql`${rekapHarian.pembelianKg} + excluded.pembelian_kg`,
+        pembelianNilai: sql`${rekapHarian.pembelianNilai} + excluded.pembelian_nilai`,
+        produksiInputKg: sql`${rekapHarian.produksiInputKg} + excluded.produksi_input_kg`,
+        produksiOutputKg: sql`${rekapHarian.produksiOutputKg} + excluded.produksi_output_kg`,
+        penjualanKg: sql`${rekapHarian.penjualanKg} + excluded.penjualan_kg`,
+        penjualanNilai: sql`${rekapHarian.penjualanNilai} + excluded.penjualan_nilai`,
+        jumlahTransaksi: sql`${rekapHarian.jumlahTransaksi} + excluded.jumlah_transaksi`,
+        updatedAt: sql`now()`,
+      },
+    });
+}
+
+// Bangun ulang seluruh rekap dari riwayat transaksi (backfill / perbaikan drift)
+export async function rebuildRekapHarian(): Promise<number> {
+  return await db.transaction(async (tx) => {
+    // Kunci tabel agar penulisan transaksi baru menunggu sampai rekap selesai dibangun
+    await tx.execute(sql`lock table ${rekapHarian} in exclusive mode`);
+    await tx.delete(rekapHarian);
+    const result = await tx.execute(sql`
+      insert into ${rekapHarian} (
+        tanggal, jenis_item, pembelian_kg, pembelian_nilai, produksi_input_kg,
+        produksi_output_kg, penjualan_kg, penjualan_nilai, jumlah_transaksi
+      )
+      select tanggal, jenis_item, sum(pembelian_kg), sum(pembelian_nilai), sum(produksi_input_kg),
+        sum(produksi_output_kg), sum(penjualan_kg), sum(penjualan_nilai), sum(jumlah_transaksi)
+      from (
+        select ${rekapTanggal("tanggal")} as tanggal, coalesce(jenis_barang, 'gabah') as jenis_item,
+          jumlah as pembelian_kg, total_harga as pembelian_nilai, 0 as produksi_input_kg,
+          0 as produksi_output_kg, 0 as penjualan_kg, 0 as penjualan_nilai, 1 as jumlah_transaksi
+        from pembelian
+        union all
+        select ${rekapTanggal("tanggal")}, 'gabah', 0, 0, coalesce(jumlah_gabah_input, 0), 0, 0, 0, 1
+        from produksi
+        union all
+        select ${rekapTanggal("p.tanggal")}, o.jenis_item, 0, 0, 0, o.jumlah, 0, 0, 0
+        from produksi p
+        cross join lateral (values
+          ('beras', p.jumlah_beras_output),
+          ('katul', p.jumlah_katul),
+          ('menir', p.jumlah_menir),
+          ('sekam', p.jumlah_sekam)
+        ) as o(jenis_item, jumlah)
+        where o.jumlah > 0
+        union all
+        select ${rekapTanggal("tanggal")}, coalesce(jenis_barang, 'beras'), 0, 0, 0, 0, jumlah, total_harga, 1
+        from penjualan
+      ) as transaksi
+      group by tanggal, jenis_item
+    `);
+    return result.rowCount ?? 0;
+  });
+}
+
+export async function getRekapHarian(from: string, to: string, jenisItem?: string): Promise<RekapHarian[]> {
+  return await db
+    .select()
+    .from(rekapHarian)
+    .where(and(
+      gte(rekapHarian.tanggal, from),
+      lte(rekapHarian.tanggal, to),
+      jenisItem ? eq(rekapHarian.jenisItem, jenisItem) : undefined,
+    ))
+    .orderBy(asc(rekapHarian.tanggal), asc(rekapHarian.jenisItem));
+}
+
+const rekapRangeSchema = z.object({
+  from: z.string().regex(/^\d{4}-\d{2}-\d{2}$/).optional(),
+  to: z.string().regex(/^\d{4}-\d{2}-\d{2}$/).optional(),
+  jenisItem: z.string().min(1).optional(),
+});
+
+// Rentang laporan ?from=YYYY-MM-DD&to=YYYY-MM-DD (inklusif, tanggal REKAP_TZ), default 30 hari terakhir
+export function parseRekapRange(query: unknown): { from: string; to: string; jenisItem?: string } | null {
+  const result = rekapRangeSchema.safeParse(query);
+  if (!result.success) return null;
+
+  const defaultFrom = new Date();
+  defaultFrom.setUTCDate(defaultFrom.getUTCDate() - 29);
+  return {
+    from: result.data.from || rekapDate(defaultFrom),
+    to: result.data.to || rekapDate(new Date()),
+    jenisItem: result.data.jenisItem,
+  };
+}
+
+export interface RekapHarianSummary {
+  tanggal: string;
+  pembelianKg: number;
+  pembelianNilai: number;
+  produksiGabahKg: number;
+  produksiBerasKg: number;
+  rendemen: number | null; // persen beras terhadap gabah input
+  penjualanKg: number;
+  penjualanNilai: number;
+  jumlahTransaksi: number;
+  items: RekapHarian[];
+}
+
+// Gabungkan baris per jenisItem menjadi ringkasan per hari untuk laporan rentang tanggal
+export function summarizeRekap(rows: RekapHarian[]): RekapHarianSummary[] {
+  const days = new Map<string, RekapHarianSummary>();
+  for (const row of rows) {
+    let day = days.get(row.tanggal);
+    if (!day) {
+      day = {
+        tanggal: row.tanggal,
+        pembelianKg: 0,
+        pembelianNilai: 0,
+        produksiGabahKg: 0,
+        produksiBerasKg: 0,
+        rendemen: null,
+        penjualanKg: 0,
+        penjualanNilai: 0,
+        jumlahTransaksi: 0,
+        items: [],
+      };
+      days.set(row.tanggal, day);
+    }
+    day.pembelianKg += toNumber(row.pembelianKg);
+    day.pembelianNilai += toNumber(row.pembelianNilai);
+    day.penjualanKg += toNumber(row.penjualanKg);
+    day.penjualanNilai += toNumber(row.penjualanNilai);
+    day.jumlahTransaksi += row.jumlahTransaksi;
+    if (row.jenisItem === "gabah") day.produksiGabahKg += toNumber(row.produksiInputKg);
+    if (row.jenisItem === "beras") day.produksiBerasKg += toNumber(row.produksiOutputKg);
+    day.items.push(row);
+  }
+
+  return Array.from(days.values()).map((day) => ({
+    ...day,
+    rendemen: day.produksiGabahKg > 0
+      ? Math.round((day.produksiBerasKg / day.produksiGabahKg) * 10000) / 100
+      : null,
+  }));
+}
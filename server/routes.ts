@@ -1,4 +1,4 @@
-import type { Express } from "express";
+import type { Express, Response } from "express";
 import { createServer, type Server } from "http";
 import { storage } from "./storage";
 import {
@@ -22,12 +22,30 @@ import {
   authenticateToken, 
   requireAdmin, 
   requireAuth, 
+  requireInternalAccess,
   generateToken, 
   hashPassword, 
   comparePassword,
   type AuthenticatedRequest
 } from "./authMiddleware";
 import { ActivityLogger } from "./activityLogger";
+import { passwordPool, PasswordPoolSaturatedError } from "./passwordPool";
+import { bulkBodyParser, bulkImportHandler } from "./bulkImport";
+import { streamExport } from "./exportStream";
+import { parseListOptions, sendPage, ListQueryError } from "./pagination";
+import { getCacheStats } from "./cache";
+import { renderMetrics } from "./metrics";
+import { parseRekapRange, summarizeRekap } from "./rekapHarian";
+import { parseStokAtQuery } from "./stokSnapshot";
+import { liveUpdates } from "./liveUpdates";
+
+// Pool hashing penuh: semua handler yang hash/compare password menjawab 429 + Retry-After
+function sendPasswordPoolBusy(res: Response, error: unknown): boolean {
+  if (!(error instanceof PasswordPoolSaturatedError)) return false;
+  res.setHeader("Retry-After", "1");
+  res.status(429).json({ message: error.message });
+  return true;
+}
 
 export async function registerRoutes(app: Express): Promise<Server> {
   // Helper function to generate reset token
@@ -37,6 +55,12 @@ export async function registerRoutes(app: Express): Promise<Server> {
 
   // Authentication routes
   app.post("/api/auth/login", async (req, res) => {
+    // Tolak cepat saat pool hashing penuh, sebelum membaca database
+    if (passwordPool.saturated) {
+      res.setHeader("Retry-After", "1");
+      return res.status(429).json({ message: "Server sedang sibuk, silakan coba lagi" });
+    }
+
     try {
       const { email, password } = loginUserSchema.parse(req.body);
       
@@ -65,12 +89,13 @@ export async function registerRoutes(app: Express): Promise<Server> {
         },
       });
     } catch (error) {
+      if (sendPasswordPoolBusy(res, error)) return;
       console.error("Login error:", error);
       res.status(400).json({ message: "Data login tidak valid" });
     }
   });
 
-  app.post("/api/auth/register", requireAdmin, async (req, res) => {
+  app.post("/api/auth/register", authenticateToken, requireAdmin, async (req, res) => {
     try {
       const userData = insertUserSchema.parse(req.body);
       
@@ -101,6 +126,7 @@ export async function registerRoutes(app: Express): Promise<Server> {
         },
       });
     } catch (error) {
+      if (sendPasswordPoolBusy(res, error)) return;
       console.error("Register error:", error);
       res.status(400).json({ message: "Data registrasi tidak valid" });
     }
@@ -125,7 +151,7 @@ export async function registerRoutes(app: Express): Promise<Server> {
     }
   });
 
-  app.get("/api/users", requireAdmin, async (req, res) => {
+  app.get("/api/users", authenticateToken, requireAdmin, async (req, res) => {
     try {
       const users = await storage.getAllUsers();
       res.json(users.map(user => ({
@@ -143,7 +169,7 @@ export async function registerRoutes(app: Express): Promise<Server> {
     }
   });
 
-  app.put("/api/users/:id/role", requireAdmin, async (req, res) => {
+  app.put("/api/users/:id/role", authenticateToken, requireAdmin, async (req, res) => {
     try {
       const { id } = req.params;
       const { role } = req.body;
@@ -176,7 +202,7 @@ export async function registerRoutes(app: Express): Promise<Server> {
     }
   });
 
-  app.put("/api/users/:id/status", requireAdmin, async (req, res) => {
+  app.put("/api/users/:id/status", authenticateToken, requireAdmin, async (req, res) => {
     try {
       const { id } = req.params;
       const { isActive } = req.body;
@@ -206,28 +232,32 @@ export async function registerRoutes(app: Express): Promise<Server> {
   });
 
   // Activity logs endpoint
-  app.get("/api/activity-logs", requireAdmin, async (req, res) => {
+  app.get("/api/activity-logs", authenticateToken, requireAdmin, async (req, res) => {
     try {
-      const logs = await storage.getAllActivityLogs();
+      const options = parseListOptions(req);
+      const logs = await storage.getAllActivityLogs(options);
       
-      // Enrich logs with user information
-      const enrichedLogs = await Promise.all(
-        logs.map(async (log) => {
-          const user = await storage.getUser(log.userId);
-          return {
-            ...log,
-            user: user ? {
-              id: user.id,
-              username: user.username,
-              email: user.email,
-              role: user.role,
-            } : null,
-          };
-        })
-      );
+      // Enrich logs with user information (satu query untuk semua user di halaman ini)
+      const userIds = Array.from(new Set(logs.map((log) => log.userId)));
+      const usersById = new Map((await storage.getUsersByIds(userIds)).map((user) => [user.id, user]));
+      const enrichedLogs = logs.map((log) => {
+        const user = usersById.get(log.userId);
+        return {
+          ...log,
+          user: user ? {
+            id: user.id,
+            username: user.username,
+            email: user.email,
+            role: user.role,
+          } : null,
+        };
+      });
       
-      res.json(enrichedLogs);
+      sendPage(res, enrichedLogs, options);
     } catch (error) {
+      if (error instanceof ListQueryError) {
+        return res.status(400).json({ message: error.message });
+      }
       console.error("Get activity logs error:", error);
       res.status(500).json({ message: "Gagal mendapatkan riwayat aktivitas" });
     }
@@ -289,6 +319,7 @@ export async function registerRoutes(app: Express): Promise<Server> {
       
       res.json({ message: "Password berhasil diubah" });
     } catch (error) {
+      if (sendPasswordPoolBusy(res, error)) return;
       console.error("Reset password error:", error);
       res.status(400).json({ message: "Data tidak valid" });
     }
@@ -349,6 +380,7 @@ export async function registerRoutes(app: Express): Promise<Server> {
         }
       });
     } catch (error) {
+      if (sendPasswordPoolBusy(res, error)) return;
       console.error("Edit profile error:", error);
       res.status(400).json({ message: "Data tidak valid" });
     }
@@ -367,82 +399,85 @@ export async function registerRoutes(app: Express): Promise<Server> {
 
   app.get("/api/dashboard/transactions", async (req, res) => {
     try {
-      const [pembelian, penjualan, pengeluaran] = await Promise.all([
-        storage.getAllPembelian(),
-        storage.getAllPenjualan(),
-        storage.getAllPengeluaran(),
-      ]);
-
-      // Format all transactions with consistent structure
-      const allTransactions = [
-        ...pembelian.map(p => ({
-          id: `pembelian-${p.id}`,
-          type: 'pembelian',
-          description: `Pembelian ${p.jenisBarang || p.jenisGabah}`,
-          amount: parseFloat(p.jumlah.toString()),
-          value: parseFloat(p.totalHarga.toString()),
-          date: p.createdAt || new Date()
-        })),
-        ...penjualan.map(p => ({
-          id: `penjualan-${p.id}`,
-          type: 'penjualan',
-          description: `Penjualan ${p.jenisBarang || p.jenisBeras}`,
-          amount: parseFloat(p.jumlah.toString()),
-          value: parseFloat(p.totalHarga.toString()),
-          date: p.createdAt || new Date()
-        })),
-        ...pengeluaran.map(p => ({
-          id: `pengeluaran-${p.id}`,
-          type: 'pengeluaran',
-          description: p.deskripsi || p.kategori,
-          amount: 0,
-          value: parseFloat(p.jumlah.toString()),
-          date: p.createdAt || new Date()
-        }))
-      ];
-
-      // Sort by date (newest first) and limit to 20 most recent
-      const sortedTransactions = allTransactions
-        .sort((a, b) => new Date(b.date).getTime() - new Date(a.date).getTime())
-        .slice(0, 20);
-
-      res.json(sortedTransactions);
+      // Hanya 20 transaksi terbaru yang dibaca dari database, bukan seluruh tabel
+      const transactions = await storage.getRecentTransactions(20);
+      res.json(transactions);
     } catch (error) {
       console.error("Error fetching transactions:", error);
       res.status(500).json({ message: "Failed to fetch transactions" });
     }
   });
 
+  // Push perubahan stok dan dashboard lewat Server-Sent Events (?topics=stok,dashboard),
+  // diawali event snapshot berisi isi /api/stok dan /api/dashboard/metrics
+  liveUpdates.configure({
+    stok: () => storage.getAllStok(),
+    dashboard: () => storage.getDashboardMetrics(),
+  });
+  app.get("/api/live", (req, res) => liveUpdates.handler(req, res));
+
+  // Laporan harian dari tabel rekap: ?from=YYYY-MM-DD&to=YYYY-MM-DD&jenisItem=
+  app.get("/api/laporan/harian", async (req, res) => {
+    try {
+      const range = parseRekapRange(req.query);
+      if (!range) {
+        return res.status(400).json({ message: "Parameter tanggal harus berformat YYYY-MM-DD" });
+      }
+
+      const rows = await storage.getRekapHarian(range.from, range.to, range.jenisItem);
+      res.json(summarizeRekap(rows));
+    } catch (error) {
+      console.error("Error fetching laporan harian:", error);
+      res.status(500).json({ message: "Failed to fetch laporan harian" });
+    }
+  });
+
+  // Posisi stok pada waktu tertentu: snapshot terdekat + delta log_stok (?at=2024-05-01T17:00&jenisItem=gabah)
+  app.get("/api/laporan/stok", async (req, res) => {
+    try {
+      const query = parseStokAtQuery(req.query);
+      if (!query) {
+        return res.status(400).json({ message: "Parameter waktu tidak valid" });
+      }
+
+      res.json(await storage.getStokAt(query.at, query.jenisItem));
+    } catch (error) {
+      console.error("Error fetching stok at:", error);
+      res.status(500).json({ message: "Failed to fetch stok at" });
+    }
+  });
+
+  // Endpoint /api/internal/* hanya untuk admin atau scraper dengan METRICS_TOKEN
+  // Semua metrik in-process (pool DB, latensi query dan route, cache, buffer) dalam format Prometheus
+  app.get("/api/internal/metrics", requireInternalAccess, (req, res) => {
+    res.type("text/plain; version=0.0.4").send(renderMetrics());
+  });
+
+  // Counter hit/miss cache in-process untuk memantau efektivitas cache dashboard
+  app.get("/api/internal/cache-stats", requireInternalAccess, (req, res) => {
+    res.json(getCacheStats());
+  });
+
+  // Kondisi pool worker bcrypt (sibuk, antre, ditolak)
+  app.get("/api/internal/password-pool-stats", requireInternalAccess, (req, res) => {
+    res.json(passwordPool.stats());
+  });
+
+  // Counter buffer write-behind log aktivitas (antrean, tertulis, terbuang)
+  app.get("/api/internal/activity-log-stats", requireInternalAccess, (req, res) => {
+    res.json(ActivityLogger.getStats());
+  });
+
   // Supplier routes
   app.get("/api/suppliers", async (req, res) => {
     try {
-      const suppliers = await storage.getAllSuppliers();
-      
-      // Add sample data if empty
-      if (suppliers.length === 0) {
-        const sampleSuppliers = [
-          {
-            name: "Toko Tani Sejahtera",
-            address: "Jl. Sawah No. 123, Desa Padi",
-            phone: "081234567890"
-          },
-          {
-            name: "CV. Gabah Makmur", 
-            address: "Jl. Pertanian No. 456, Kec. Subur",
-            phone: "081234567891"
-          }
-        ];
-        
-        for (const supplier of sampleSuppliers) {
-          await storage.createSupplier(supplier);
-        }
-        
-        const newSuppliers = await storage.getAllSuppliers();
-        res.json(newSuppliers);
-      } else {
-        res.json(suppliers);
-      }
+      const options = parseListOptions(req);
+      const suppliers = await storage.getAllSuppliers(options);
+      sendPage(res, suppliers, options);
     } catch (error) {
+      if (error instanceof ListQueryError) {
+        return res.status(400).json({ message: error.message });
+      }
       console.error("Error fetching suppliers:", error);
       res.status(500).json({ message: "Failed to fetch suppliers" });
     }
@@ -499,33 +534,13 @@ export async function registerRoutes(app: Express): Promise<Server> {
   // Customer routes
   app.get("/api/customers", async (req, res) => {
     try {
-      const customers = await storage.getAllCustomers();
-      
-      // Add sample data if empty
-      if (customers.length === 0) {
-        const sampleCustomers = [
-          {
-            name: "Warung Pak Budi",
-            address: "Jl. Pasar No. 789, Kelurahan Ramai",
-            phone: "081234567892"
-          },
-          {
-            name: "Toko Beras Sari",
-            address: "Jl. Beras No. 101, Kota Sejahtera",
-            phone: "081234567893"
-          }
-        ];
-        
-        for (const customer of sampleCustomers) {
-          await storage.createCustomer(customer);
-        }
-        
-        const newCustomers = await storage.getAllCustomers();
-        res.json(newCustomers);
-      } else {
-        res.json(customers);
-      }
+      const options = parseListOptions(req);
+      const customers = await storage.getAllCustomers(options);
+      sendPage(res, customers, options);
     } catch (error) {
+      if (error instanceof ListQueryError) {
+        return res.status(400).json({ message: error.message });
+      }
       console.error("Error fetching customers:", error);
       res.status(500).json({ message: "Failed to fetch customers" });
     }
@@ -545,54 +560,13 @@ export async function registerRoutes(app: Express): Promise<Server> {
   // Pembelian routes
   app.get("/api/pembelian", async (req, res) => {
     try {
-      const pembelian = await storage.getAllPembelian();
-      
-      // Add sample data if empty
-      if (pembelian.length === 0) {
-        const suppliers = await storage.getAllSuppliers();
-        if (suppliers.length > 0) {
-          const samplePembelian = [
-            {
-              supplierId: suppliers[0].id,
-              tanggal: new Date('2024-01-15'),
-              jenisGabah: "Gabah Premium",
-              jenisBarang: "gabah",
-              jumlah: "1000",
-              hargaPerKg: "8000",
-              totalHarga: "8000000",
-              kadarAir: "12",
-              kualitas: "A",
-              status: "completed",
-              metodePembayaran: "cash",
-              catatan: "Kualitas bagus, pengiriman tepat waktu"
-            },
-            {
-              supplierId: suppliers[1]?.id || suppliers[0].id,
-              tanggal: new Date('2024-01-14'),
-              jenisGabah: "Gabah Medium",
-              jenisBarang: "gabah",
-              jumlah: "500",
-              hargaPerKg: "7500",
-              totalHarga: "3750000",
-              kadarAir: "14",
-              kualitas: "B",
-              status: "completed",
-              metodePembayaran: "transfer",
-              catatan: "Standar"
-            }
-          ];
-          
-          for (const item of samplePembelian) {
-            await storage.createPembelian(item);
-          }
-        }
-        
-        const newPembelian = await storage.getAllPembelian();
-        res.json(newPembelian);
-      } else {
-        res.json(pembelian);
-      }
+      const options = parseListOptions(req);
+      const pembelian = await storage.getAllPembelian(options);
+      sendPage(res, pembelian, options);
     } catch (error) {
+      if (error instanceof ListQueryError) {
+        return res.status(400).json({ message: error.message });
+      }
       console.error("Error fetching pembelian:", error);
       res.status(500).json({ message: "Failed to fetch pembelian" });
     }
@@ -614,6 +588,12 @@ export async function registerRoutes(app: Express): Promise<Server> {
     }
   });
 
+  app.post(
+    "/api/pembelian/bulk",
+    bulkBodyParser,
+    bulkImportHandler("pembelian", insertPembelianSchema, ["supplierId"], (rows) => storage.bulkCreatePembelian(rows))
+  );
+
   app.put("/api/pembelian/:id", async (req, res) => {
     try {
       const id = parseInt(req.params.id);
@@ -640,9 +620,13 @@ export async function registerRoutes(app: Express): Promise<Server> {
   // Pengeringan routes
   app.get("/api/pengeringan", async (req, res) => {
     try {
-      const pengeringan = await storage.getAllPengeringan();
-      res.json(pengeringan);
+      const options = parseListOptions(req);
+      const pengeringan = await storage.getAllPengeringan(options);
+      sendPage(res, pengeringan, options);
     } catch (error) {
+      if (error instanceof ListQueryError) {
+        return res.status(400).json({ message: error.message });
+      }
       console.error("Error fetching pengeringan:", error);
       res.status(500).json({ message: "Failed to fetch pengeringan" });
     }
@@ -662,9 +646,13 @@ export async function registerRoutes(app: Express): Promise<Server> {
   // Produksi routes
   app.get("/api/produksi", async (req, res) => {
     try {
-      const produksi = await storage.getAllProduksi();
-      res.json(produksi);
+      const options = parseListOptions(req);
+      const produksi = await storage.getAllProduksi(options);
+      sendPage(res, produksi, options);
     } catch (error) {
+      if (error instanceof ListQueryError) {
+        return res.status(400).json({ message: error.message });
+      }
       console.error("Error fetching produksi:", error);
       res.status(500).json({ message: "Failed to fetch produksi" });
     }
@@ -686,53 +674,22 @@ export async function registerRoutes(app: Express): Promise<Server> {
     }
   });
 
+  app.post(
+    "/api/produksi/bulk",
+    bulkBodyParser,
+    bulkImportHandler("produksi", insertProduksiSchema, ["pengeringanId", "pembelianId"], (rows) => storage.bulkCreateProduksi(rows))
+  );
+
   // Penjualan routes
   app.get("/api/penjualan", async (req, res) => {
     try {
-      const penjualan = await storage.getAllPenjualan();
-      
-      // Add sample data if empty
-      if (penjualan.length === 0) {
-        const customers = await storage.getAllCustomers();
-        if (customers.length > 0) {
-          const samplePenjualan = [
-            {
-              customerId: customers[0].id,
-              tanggal: new Date('2024-01-16'),
-              jenisBeras: "Beras Premium",
-              jenisBarang: "beras",
-              jumlah: "50",
-              hargaPerKg: "15000",
-              totalHarga: "750000",
-              status: "completed",
-              metodePembayaran: "cash",
-              catatan: "Pelanggan reguler"
-            },
-            {
-              customerId: customers[1]?.id || customers[0].id,
-              tanggal: new Date('2024-01-15'),
-              jenisBeras: "Beras Medium",
-              jenisBarang: "beras",
-              jumlah: "100",
-              hargaPerKg: "12000",
-              totalHarga: "1200000",
-              status: "completed",
-              metodePembayaran: "transfer",
-              catatan: "Pesanan besar"
-            }
-          ];
-          
-          for (const item of samplePenjualan) {
-            await storage.createPenjualan(item);
-          }
-        }
-        
-        const newPenjualan = await storage.getAllPenjualan();
-        res.json(newPenjualan);
-      } else {
-        res.json(penjualan);
-      }
+      const options = parseListOptions(req);
+      const penjualan = await storage.getAllPenjualan(options);
+      sendPage(res, penjualan, options);
     } catch (error) {
+      if (error instanceof ListQueryError) {
+        return res.status(400).json({ message: error.message });
+      }
       console.error("Error fetching penjualan:", error);
       res.status(500).json({ message: "Failed to fetch penjualan" });
     }
@@ -754,12 +711,22 @@ export async function registerRoutes(app: Express): Promise<Server> {
     }
   });
 
+  app.post(
+    "/api/penjualan/bulk",
+    bulkBodyParser,
+    bulkImportHandler("penjualan", insertPenjualanSchema, ["customerId"], (rows) => storage.bulkCreatePenjualan(rows))
+  );
+
   // Pengeluaran routes
   app.get("/api/pengeluaran", async (req, res) => {
     try {
-      const pengeluaran = await storage.getAllPengeluaran();
-      res.json(pengeluaran);
+      const options = parseListOptions(req);
+      const pengeluaran = await storage.getAllPengeluaran(options);
+      sendPage(res, pengeluaran, options);
     } catch (error) {
+      if (error instanceof ListQueryError) {
+        return res.status(400).json({ message: error.message });
+      }
       console.error("Error fetching pengeluaran:", error);
       res.status(500).json({ message: "Failed to fetch pengeluaran" });
     }
@@ -779,9 +746,12 @@ export async function registerRoutes(app: Express): Promise<Server> {
   // Stok routes
   app.get("/api/stok", async (req, res) => {
     try {
-      const stok = await storage.getAllStok();
+      const stok = await storage.getAllStok(parseListOptions(req));
       res.json(stok);
     } catch (error) {
+      if (error instanceof ListQueryError) {
+        return res.status(400).json({ message: error.message });
+      }
       console.error("Error fetching stok:", error);
       res.status(500).json({ message: "Failed to fetch stok" });
     }
@@ -801,14 +771,21 @@ export async function registerRoutes(app: Express): Promise<Server> {
   // Log Stok routes
   app.get("/api/log-stok", async (req, res) => {
     try {
-      const logStok = await storage.getAllLogStok();
-      res.json(logStok);
+      const options = parseListOptions(req);
+      const logStok = await storage.getAllLogStok(options);
+      sendPage(res, logStok, options);
     } catch (error) {
+      if (error instanceof ListQueryError) {
+        return res.status(400).json({ message: error.message });
+      }
       console.error("Error fetching log stok:", error);
       res.status(500).json({ message: "Failed to fetch log stok" });
     }
   });
 
+  // Export streaming CSV/XLSX untuk laporan periode besar: /api/export/pembelian?from=&to=&format=xlsx
+  app.get("/api/export/:resource", streamExport);
+
   // Settings routes
   app.get("/api/settings", async (req, res) => {
     try {
@@ -0,0 +1,164 @@
+import { db } from "./db";
+import { sql } from "drizzle-orm";
+import { z } from "zod";
+import { stok, logStok, stokSnapshot, type StokSnapshot } from "@shared/schema";
+import { utcTimestamp } from "./pagination";
+
+// Snapshot stok periodik per jenisItem. Posisi stok pada waktu T = snapshot terakhir
+// sebelum T + jumlah log_stok setelah watermark snapshot tersebut, sehingga query
+// point-in-time hanya me-replay delta, bukan seluruh ledger.
+const STOK_SNAPSHOT_INTERVAL_MS = parseInt(process.env.STOK_SNAPSHOT_INTERVAL_MS || "3600000");
+
+export interface StokAt {
+  jenisItem: string;
+  at: string;
+  jumlah: number;
+  snapshotId: number | null;
+  snapshotAt: string | null;
+  deltaRows: number; // baris log_stok yang di-replay setelah snapshot
+}
+
+function toNumber(value: unknown): number {
+  return value === null || value === undefined ? 0 : Number(value);
+}
+
+function toIso(value: unknown): string | null {
+  if (value === null || value === undefined) return null;
+  return value instanceof Date ? value.toISOString() : new Date(String(value)).toISOString();
+}
+
+// Baris stok dikunci dengan urutan yang sama seperti autoUpdateStok (jenisItem, id), jadi transaksi
+// stok yang sedang berjalan selesai dulu dan jumlah selalu cocok dengan watermark log_stok-nya.
+// jenisItem yang tidak berubah sejak snapshot terakhir dilewati.
+export async function takeStokSnapshots(): Promise<StokSnapshot[]> {
+  return await db.transaction(async (tx) => {
+    await tx.execute(sql`select id from ${stok} order by jenis_item, id for update`);
+    const result = await tx.execute(sql`
+      with per_stok as (
+        select s.jenis_item, s.jumlah,
+          (select max(l.id) from ${logStok} l where l.stok_id = s.id) as last_log_id
+        from ${stok} s
+      ), posisi as (
+        select jenis_item, sum(jumlah) as jumlah, coalesce(max(last_log_id), 0) as log_stok_id
+        from per_stok
+        group by jenis_item
+      )
+      insert into ${stokSnapshot} (jenis_item, jumlah, log_stok_id)
+      select p.jenis_item, p.jumlah, p.log_stok_id
+      from posisi p
+      where not exists (
+        select 1 from ${stokSnapshot} ss
+        where ss.jenis_item = p.jenis_item and ss.log_stok_id = p.log_stok_id and ss.jumlah = p.jumlah
+      )
+      returning id, jenis_item as "jenisItem", jumlah, log_stok_id as "logStokId", taken_at as "takenAt"
+    `);
+    return result.rows as StokSnapshot[];
+  });
+}
+
+// Bangun ulang snapshot harian (akhir tiap hari) dari ledger untuk data sebelum snapshot
+// periodik berjalan. Jumlah kumulatif dihitung dalam urutan id log_stok, dimulai dari
+// jumlah_sebelum baris pertama tiap stok (stok awal yang tidak tercatat sebagai delta).
+export async function rebuildStokSnapshots(): Promise<number> {
+  return await db.transaction(async (tx) => {
+    await tx.execute(sql`select id from ${stok} order by jenis_item, id for update`);
+    await tx.execute(sql`lock table ${stokSnapshot} in exclusive mode`);
+    await tx.delete(stokSnapshot);
+    const result = await tx.execute(sql`
+      with awal as (
+        select s.jenis_item, sum(pertama.jumlah_sebelum) as jumlah
+        from ${stok} s
+        cross join lateral (
+          select l.jumlah_sebelum from ${logStok} l where l.stok_id = s.id order by l.id limit 1
+        ) pertama
+        group by s.jenis_item
+      )
+      insert into ${stokSnapshot} (jenis_item, jumlah, log_stok_id, taken_at)
+      select jenis_item, jumlah, log_stok_id, taken_at
+      from (
+        select s.jenis_item, l.id as log_stok_id,
+          date_trunc('day', l.created_at) + interval '1 day' as taken_at,
+          coalesce(a.jumlah, 0) + sum(l.jumlah) over (partition by s.jenis_item order by l.id) as jumlah,
+          row_number() over (partition by s.jenis_item, date_trunc('day', l.created_at) order by l.id desc) as urutan
+        from ${logStok} l
+        join ${stok} s on s.id = l.stok_id
+        left join awal a on a.jenis_item = s.jenis_item
+      ) as harian
+      where urutan = 1 and taken_at <= now()
+    `);
+    return result.rowCount ?? 0;
+  });
+}
+
+export async function getStokAt(at: Date, jenisItem?: string): Promise<StokAt[]> {
+  // Batas eksklusif yang sama dengan filter `to` di list/export (lihat utcTimestamp)
+  const waktu = utcTimestamp(at);
+  // Tanpa snapshot, replay dimulai dari jumlah_sebelum baris log_stok pertama (sama seperti rebuild)
+  const result = await db.execute(sql`
+    select j.jenis_item, snap.id as snapshot_id, snap.taken_at,
+      coalesce(snap.jumlah, awal.jumlah, 0) + coalesce(delta.jumlah, 0) as jumlah,
+      coalesce(delta.baris, 0) as delta_rows
+    from (
+      select distinct jenis_item from ${stok}
+      ${jenisItem ? sql`where jenis_item = ${jenisItem}` : sql``}
+    ) j
+    left join lateral (
+      select ss.id, ss.jumlah, ss.log_stok_id, ss.taken_at
+      from ${stokSnapshot} ss
+      where ss.jenis_item = j.jenis_item and ss.taken_at <= ${waktu}::timestamp
+      order by ss.taken_at desc, ss.id desc
+      limit 1
+    ) snap on true
+    left join lateral (
+      select sum(pertama.jumlah_sebelum) as jumlah
+      from ${stok} s
+      cross join lateral (
+        select l.jumlah_sebelum from ${logStok} l where l.stok_id = s.id order by l.id limit 1
+      ) pertama
+      where s.jenis_item = j.jenis_item
+    ) awal on snap.id is null
+    left join lateral (
+      select sum(l.jumlah) as jumlah, count(*) as baris
+      from ${logStok} l
+      where l.stok_id in (select s.id from ${stok} s where s.jenis_item = j.jenis_item)
+        and l.id > coalesce(snap.log_stok_id, 0)
+        and l.created_at < ${waktu}::timestamp
+    ) delta on true
+    order by j.jenis_item
+  `);
+
+  return (result.rows as Record<string, unknown>[]).map((row) => ({
+    jenisItem: String(row.jenis_item),
+    at: at.toISOString(),
+    jumlah: toNumber(row.jumlah),
+    snapshotId: row.snapshot_id === null ? null : Number(row.snapshot_id),
+    snapshotAt: toIso(row.taken_at),
+    deltaRows: toNumber(row.delta_rows),
+  }));
+}
+
+const stokAtSchema = z.object({
+  at: z.coerce.date().optional(),
+  jenisItem: z.string().min(1).optional(),
+});
+
+export function parseStokAtQuery(query: unknown): { at: Date; jenisItem?: string } | null {
+  const result = stokAtSchema.safeParse(query);
+  if (!result.success) return null;
+  return { at: result.data.at || new Date(), jenisItem: result.data.jenisItem };
+}
+
+let snapshotTimer: NodeJS.Timeout | undefined;
+
+export function startStokSnapshotScheduler() {
+  if (snapshotTimer || STOK_SNAPSHOT_INTERVAL_MS <= 0) return;
+  snapshotTimer = setInterval(async () => {
+    try {
+      await takeStokSnapshots();
+    } catch (error) {
+      console.error("Failed to take stok snapshot:", error);
+    }
+  }, STOK_SNAPSHOT_INTERVAL_MS);
+  // Timer snapshot tidak boleh menahan proses tetap hidup
+  snapshotTimer.unref();
+}
@@ -9,6 +9,7 @@ import {
   pengeluaran,
   stok,
   logStok,
+  rekapHarian,
   settings,
   passwordResetTokens,
   activityLog,
@@ -32,6 +33,8 @@ import {
   type InsertStok,
   type LogStok,
   type InsertLogStok,
+  type RekapHarian,
+  type StokSnapshot,
   type Settings,
   type InsertSettings,
   type PasswordResetToken,
@@ -40,7 +43,23 @@ import {
   type InsertActivityLog,
 } from "@shared/schema";
 import { db } from "./db";
-import { eq, desc, and, gte, lte, sql } from "drizzle-orm";
+import { eq, desc, asc, and, gte, lte, lt, inArray, sql, getTableColumns, type SQL } from "drizzle-orm";
+import type { PgColumn, PgSelect, PgTable } from "drizzle-orm/pg-core";
+import { utcTimestamp, type ListOptions } from "./pagination";
+import { TtlCache } from "./cache";
+import { liveUpdates, type StockChange } from "./liveUpdates";
+import {
+  applyRekap,
+  getRekapHarian,
+  negateRekap,
+  pembelianRekap,
+  penjualanRekap,
+  produksiRekap,
+  rebuildRekapHarian,
+  rekapDate,
+  type RekapDelta,
+} from "./rekapHarian";
+import { getStokAt, rebuildStokSnapshots, takeStokSnapshots, type StokAt } from "./stokSnapshot";
 
 // PRIORITAS AUDIT - FIXED: Helper types untuk auto-update stok dan log perubahan
 interface StockUpdateResult {
@@ -58,9 +77,223 @@ interface StockLogData {
   keterangan?: string;
 }
 
+// Satu perubahan stok untuk jenisItem tertentu (jumlah positif = masuk, negatif = keluar)
+interface StockMovement extends StockLogData {
+  jenisItem: string;
+}
+
+type DbTransaction = Parameters<Parameters<typeof db.transaction>[0]>[0];
+
+// Filter list yang didorong ke SQL: cursor keyset (id < after), rentang tanggal dan jenisItem
+function listWhere(
+  idColumn: PgColumn,
+  options: ListOptions,
+  dateColumn?: PgColumn,
+  jenisColumn?: PgColumn
+): SQL | undefined {
+  const conditions: SQL[] = [];
+  if (options.after) conditions.push(lt(idColumn, options.after));
+  if (dateColumn && options.from) conditions.push(sql`${dateColumn} >= ${utcTimestamp(options.from)}::timestamp`);
+  if (dateColumn && options.to) conditions.push(sql`${dateColumn} < ${utcTimestamp(options.to)}::timestamp`);
+  if (jenisColumn && options.jenisItem) conditions.push(eq(jenisColumn, options.jenisItem));
+  return conditions.length > 0 ? and(...conditions) : undefined;
+}
+
+function withLimit<T extends PgSelect>(query: T, limit?: number) {
+  return limit ? query.limit(limit) : query;
+}
+
+// Filter jenisItem untuk log stok lewat baris stok (log_stok tidak menyimpan jenisItem)
+function logStokJenisCondition(jenisItem?: string): SQL | undefined {
+  return jenisItem
+    ? inArray(logStok.stokId, db.select({ id: stok.id }).from(stok).where(eq(stok.jenisItem, jenisItem)))
+    : undefined;
+}
+
+export type ExportResource = "pembelian" | "penjualan" | "log-stok";
+
+export interface ExportQuery {
+  sql: string;
+  params: unknown[];
+  columns: Array<{ key: string; name: string }>; // nama field API -> nama kolom database
+}
+
+function exportColumns(table: PgTable): ExportQuery["columns"] {
+  return Object.entries(getTableColumns(table)).map(([key, column]) => ({ key, name: column.name }));
+}
+
+// Query export (urut id menaik, hanya filter tanggal/jenisItem) yang tidak dieksekusi di sini:
+// exportStream.ts membacanya bertahap lewat server-side cursor
+export function buildExportQuery(resource: ExportResource, options: ListOptions): ExportQuery {
+  const filters: ListOptions = { from: options.from, to: options.to, jenisItem: options.jenisItem };
+  switch (resource) {
+    case "pembelian":
+      return {
+        ...db.select().from(pembelian)
+          .where(listWhere(pembelian.id, filters, pembelian.tanggal, pembelian.jenisBarang))
+          .orderBy(asc(pembelian.id))
+          .toSQL(),
+        columns: exportColumns(pembelian),
+      };
+    case "penjualan":
+      return {
+        ...db.select().from(penjualan)
+          .where(listWhere(penjualan.id, filters, penjualan.tanggal, penjualan.jenisBarang))
+          .orderBy(asc(penjualan.id))
+          .toSQL(),
+        columns: exportColumns(penjualan),
+      };
+    case "log-stok":
+      return {
+        ...db.select().from(logStok)
+          .where(and(listWhere(logStok.id, filters, logStok.createdAt), logStokJenisCondition(filters.jenisItem)))
+          .orderBy(asc(logStok.id))
+          .toSQL(),
+        columns: exportColumns(logStok),
+      };
+  }
+}
+
+export interface DashboardMetrics {
+  todayPurchases: number;
+  todayProduction: number;
+  todaySales: number;
+  stockRice: number;
+  stockGabah?: number; // UPDATE INI UNTUK MULTI PRODUK
+  stockKatul?: number; // UPDATE INI UNTUK MULTI PRODUK
+  stockMenir?: number; // UPDATE INI UNTUK MULTI PRODUK
+  stockSekam?: number; // UPDATE INI UNTUK MULTI PRODUK
+  recentTransactions: any[];
+}
+
+// Metrik dashboard di-cache singkat; setiap penulisan yang mengubah stok atau
+// transaksi hari ini menghapus cache sehingga dashboard tidak pernah tertinggal
+const DASHBOARD_CACHE_TTL_MS = parseInt(process.env.DASHBOARD_CACHE_TTL_MS || "5000");
+const dashboardCache = new TtlCache<DashboardMetrics>("dashboard", DASHBOARD_CACHE_TTL_MS);
+
+// Hapus cache dashboard dan beri tahu klien live (/api/live) bahwa angkanya berubah
+function invalidateDashboard() {
+  dashboardCache.invalidate();
+  liveUpdates.dashboardChanged();
+}
+
+// Data user minimum untuk autentikasi, di-cache agar setiap request terproteksi
+// tidak perlu membaca tabel users; perubahan role/status menghapus entry-nya
+export interface AuthUser {
+  id: number;
+  username: string;
+  email: string;
+  role: string;
+  isActive: boolean | null;
+}
+
+const USER_CACHE_TTL_MS = parseInt(process.env.USER_CACHE_TTL_MS || "30000");
+const USER_CACHE_MAX_ENTRIES = parseInt(process.env.USER_CACHE_MAX_ENTRIES || "1000");
+const userCache = new TtlCache<AuthUser>("users", USER_CACHE_TTL_MS, USER_CACHE_MAX_ENTRIES);
+
+export interface RecentTransaction {
+  id: string;
+  type: string;
+  description: string;
+  amount: number;
+  value: number;
+  date: Date;
+}
+
+// Perubahan stok yang ditimbulkan oleh satu dokumen pembelian
+function pembelianMovements(item: Pembelian): StockMovement[] {
+  const jenisBarang = item.jenisBarang || 'gabah';
+  const jumlah = parseFloat(item.jumlah.toString());
+  return [{
+    jenisItem: jenisBarang,
+    jumlah,
+    jenisTransaksi: 'masuk',
+    referensiId: item.id,
+    referensiTabel: 'pembelian',
+    keterangan: `Pembelian ${jenisBarang} sebanyak ${jumlah} kg`
+  }];
+}
+
+// Produksi mengurangi gabah input dan menambah beras serta produk sampingan
+function produksiMovements(item: Produksi): StockMovement[] {
+  const movements: StockMovement[] = [];
+  const gabahInput = parseFloat(item.jumlahGabahInput?.toString() || '0');
+  const outputs: Array<[string, number]> = [
+    ['beras', parseFloat(item.jumlahBerasOutput?.toString() || '0')],
+    ['katul', parseFloat(item.jumlahKatul?.toString() || '0')],
+    ['menir', parseFloat(item.jumlahMenir?.toString() || '0')],
+    ['sekam', parseFloat(item.jumlahSekam?.toString() || '0')],
+  ];
+
+  if (gabahInput > 0) {
+    movements.push({
+      jenisItem: 'gabah',
+      jumlah: -gabahInput,
+      jenisTransaksi: 'keluar',
+      referensiId: item.id,
+      referensiTabel: 'produksi',
+      keterangan: `Produksi menggunakan gabah sebanyak ${gabahInput} kg`
+    });
+  }
+
+  for (const [jenisItem, jumlah] of outputs) {
+    if (jumlah > 0) {
+      movements.push({
+        jenisItem,
+        jumlah,
+        jenisTransaksi: 'masuk',
+        referensiId: item.id,
+        referensiTabel: 'produksi',
+        keterangan: `Produksi menghasilkan ${jenisItem} sebanyak ${jumlah} kg`
+      });
+    }
+  }
+
+  return movements;
+}
+
+function penjualanMovements(item: Penjualan): StockMovement[] {
+  const jenisBarang = item.jenisBarang || 'beras';
+  const jumlah = parseFloat(item.jumlah.toString());
+  return [{
+    jenisItem: jenisBarang,
+    jumlah: -jumlah,
+    jenisTransaksi: 'keluar',
+    referensiId: item.id,
+    referensiTabel: 'penjualan',
+    keterangan: `Penjualan ${jenisBarang} sebanyak ${jumlah} kg`
+  }];
+}
+
+// Gabungkan perubahan stok satu batch import menjadi satu perubahan per jenisItem.
+// referensiId menunjuk dokumen pertama batch (id terkecil); rentang id ada di keterangan.
+function aggregateMovements(movements: StockMovement[], referensiTabel: string, count: number): StockMovement[] {
+  const totals = new Map<string, number>();
+  let firstId = Infinity;
+  let lastId = 0;
+  for (const movement of movements) {
+    totals.set(movement.jenisItem, (totals.get(movement.jenisItem) || 0) + movement.jumlah);
+    firstId = Math.min(firstId, movement.referensiId!);
+    lastId = Math.max(lastId, movement.referensiId!);
+  }
+
+  return Array.from(totals.entries())
+    .filter(([, jumlah]) => jumlah !== 0)
+    .map(([jenisItem, jumlah]) => ({
+      jenisItem,
+      jumlah,
+      jenisTransaksi: jumlah > 0 ? 'masuk' as const : 'keluar' as const,
+      referensiId: firstId,
+      referensiTabel,
+      keterangan: `Import massal ${referensiTabel} #${firstId}-#${lastId} (${count} transaksi): ${jenisItem} ${jumlah > 0 ? '+' : ''}${jumlah} kg`
+    }));
+}
+
 export interface IStorage {
   // User operations
   getUser(id: number): Promise<User | undefined>;
+  getAuthUser(id: number): Promise<AuthUser | undefined>;
+  getUsersByIds(ids: number[]): Promise<User[]>;
   getUserByUsername(username: string): Promise<User | undefined>;
   getUserByEmail(email: string): Promise<User | undefined>;
   createUser(user: InsertUser): Promise<User>;
@@ -72,7 +305,8 @@ export interface IStorage {
   
   // Activity Log operations
   createActivityLog(log: InsertActivityLog): Promise<ActivityLog>;
-  getAllActivityLogs(): Promise<ActivityLog[]>;
+  createActivityLogs(logs: InsertActivityLog[]): Promise<number>;
+  getAllActivityLogs(options?: ListOptions): Promise<ActivityLog[]>;
   getActivityLogsByUser(userId: number): Promise<ActivityLog[]>;
   
   // Password Reset Token operations
@@ -82,78 +316,81 @@ export interface IStorage {
   cleanupExpiredTokens(): Promise<void>;
 
   // Supplier operations
-  getAllSuppliers(): Promise<Supplier[]>;
+  getAllSuppliers(options?: ListOptions): Promise<Supplier[]>;
   getSupplier(id: number): Promise<Supplier | undefined>;
   createSupplier(supplier: InsertSupplier): Promise<Supplier>;
   updateSupplier(id: number, supplier: Partial<InsertSupplier>): Promise<Supplier>;
   deleteSupplier(id: number): Promise<void>;
 
   // Customer operations
-  getAllCustomers(): Promise<Customer[]>;
+  getAllCustomers(options?: ListOptions): Promise<Customer[]>;
   getCustomer(id: number): Promise<Customer | undefined>;
   createCustomer(customer: InsertCustomer): Promise<Customer>;
   updateCustomer(id: number, customer: Partial<InsertCustomer>): Promise<Customer>;
   deleteCustomer(id: number): Promise<void>;
 
   // Pembelian operations
-  getAllPembelian(): Promise<Pembelian[]>;
+  getAllPembelian(options?: ListOptions): Promise<Pembelian[]>;
   getPembelian(id: number): Promise<Pembelian | undefined>;
   createPembelian(pembelian: InsertPembelian): Promise<Pembelian>;
+  bulkCreatePembelian(rows: InsertPembelian[]): Promise<Pembelian[]>;
   updatePembelian(id: number, pembelian: Partial<InsertPembelian>): Promise<Pembelian>;
   deletePembelian(id: number): Promise<void>;
 
   // Pengeringan operations
-  getAllPengeringan(): Promise<Pengeringan[]>;
+  getAllPengeringan(options?: ListOptions): Promise<Pengeringan[]>;
   getPengeringan(id: number): Promise<Pengeringan | undefined>;
   createPengeringan(pengeringan: InsertPengeringan): Promise<Pengeringan>;
   updatePengeringan(id: number, pengeringan: Partial<InsertPengeringan>): Promise<Pengeringan>;
   deletePengeringan(id: number): Promise<void>;
 
   // Produksi operations
-  getAllProduksi(): Promise<Produksi[]>;
+  getAllProduksi(options?: ListOptions): Promise<Produksi[]>;
   getProduksi(id: number): Promise<Produksi | undefined>;
   createProduksi(produksi: InsertProduksi): Promise<Produksi>;
+  bulkCreateProduksi(rows: InsertProduksi[]): Promise<Produksi[]>;
   updateProduksi(id: number, produksi: Partial<InsertProduksi>): Promise<Produksi>;
   deleteProduksi(id: number): Promise<void>;
 
   // Penjualan operations
-  getAllPenjualan(): Promise<Penjualan[]>;
+  getAllPenjualan(options?: ListOptions): Promise<Penjualan[]>;
   getPenjualan(id: number): Promise<Penjualan | undefined>;
   createPenjualan(penjualan: InsertPenjualan): Promise<Penjualan>;
+  bulkCreatePenjualan(rows: InsertPenjualan[]): Promise<Penjualan[]>;
   updatePenjualan(id: number, penjualan: Partial<InsertPenjualan>): Promise<Penjualan>;
   deletePenjualan(id: number): Promise<void>;
 
   // Pengeluaran operations
-  getAllPengeluaran(): Promise<Pengeluaran[]>;
+  getAllPengeluaran(options?: ListOptions): Promise<Pengeluaran[]>;
   getPengeluaran(id: number): Promise<Pengeluaran | undefined>;
   createPengeluaran(pengeluaran: InsertPengeluaran): Promise<Pengeluaran>;
   updatePengeluaran(id: number, pengeluaran: Partial<InsertPengeluaran>): Promise<Pengeluaran>;
   deletePengeluaran(id: number): Promise<void>;
 
   // Stok operations
-  getAllStok(): Promise<Stok[]>;
+  getAllStok(options?: ListOptions): Promise<Stok[]>;
   getStok(id: number): Promise<Stok | undefined>;
   createStok(stok: InsertStok): Promise<Stok>;
   updateStok(id: number, stok: Partial<InsertStok>): Promise<Stok>;
   deleteStok(id: number): Promise<void>;
 
   // Log Stok operations
-  getAllLogStok(): Promise<LogStok[]>;
+  getAllLogStok(options?: ListOptions): Promise<LogStok[]>;
   getLogStok(id: number): Promise<LogStok | undefined>;
   createLogStok(logStok: InsertLogStok): Promise<LogStok>;
 
   // Dashboard metrics
-  getDashboardMetrics(): Promise<{
-    todayPurchases: number;
-    todayProduction: number;
-    todaySales: number;
-    stockRice: number;
-    stockGabah?: number; // UPDATE INI UNTUK MULTI PRODUK
-    stockKatul?: number; // UPDATE INI UNTUK MULTI PRODUK
-    stockMenir?: number; // UPDATE INI UNTUK MULTI PRODUK
-    stockSekam?: number; // UPDATE INI UNTUK MULTI PRODUK
-    recentTransactions: any[];
-  }>;
+  getRecentTransactions(limit: number): Promise<RecentTransaction[]>;
+  getDashboardMetrics(): Promise<DashboardMetrics>;
+
+  // Rekap harian operations
+  getRekapHarian(from: string, to: string, jenisItem?: string): Promise<RekapHarian[]>;
+  rebuildRekapHarian(): Promise<number>;
+
+  // Snapshot stok point-in-time
+  getStokAt(at: Date, jenisItem?: string): Promise<StokAt[]>;
+  takeStokSnapshots(): Promise<StokSnapshot[]>;
+  rebuildStokSnapshots(): Promise<number>;
 
   // Settings operations
   getSettings(): Promise<Settings | undefined>;
@@ -162,72 +399,131 @@ export interface IStorage {
 }
 
 export class DatabaseStorage implements IStorage {
+  // Jalankan penulisan dokumen dan perubahan stoknya dalam satu transaksi.
+  // Jika salah satu perubahan stok gagal (stok tidak mencukupi), dokumen ikut di-rollback.
+  private async runStockTransaction<T>(
+    write: (tx: DbTransaction) => Promise<{ item: T; movements: StockMovement[]; rekap?: RekapDelta[] }>
+  ): Promise<T> {
+    let changes: StockChange[] = [];
+    const item = await db.transaction(async (tx) => {
+      const { item, movements, rekap } = await write(tx);
+      changes = await this.autoUpdateStok(tx, movements);
+      if (rekap) await applyRekap(tx, rekap);
+      return item;
+    });
+    // Invalidasi dan push setelah commit, agar pembaca bersamaan tidak mengisi ulang cache dengan data lama
+    invalidateDashboard();
+    liveUpdates.publishStock(changes);
+    return item;
+  }
+
   // PRIORITAS AUDIT - FIXED: Helper function untuk auto-update stok dan log perubahan
-  private async autoUpdateStok(jenisItem: string, jumlahPerubahan: number, logData: StockLogData): Promise<StockUpdateResult> {
-    try {
-      // Cari atau buat record stok
-      let [existingStock] = await db.select().from(stok).where(eq(stok.jenisItem, jenisItem));
-      
-      if (!existingStock) {
-        // Jika stok belum ada, buat record baru
-        [existingStock] = await db.insert(stok).values({
-          jenisItem,
-          jumlah: '0',
-          satuan: 'kg',
-          hargaRataRata: '0',
-          batasMinimum: '0',
-          lokasi: 'Gudang Utama'
-        }).returning();
+  // Setiap perubahan memakai satu UPDATE atomik dengan cek stok negatif, lalu semua
+  // baris log_stok ditulis sekaligus dengan satu multi-row insert.
+  private async autoUpdateStok(tx: DbTransaction, movements: StockMovement[]): Promise<StockChange[]> {
+    // Urutkan per jenisItem agar urutan row lock antar transaksi selalu sama (hindari deadlock)
+    const ordered = [...movements].sort((a, b) => a.jenisItem.localeCompare(b.jenisItem));
+    const changes: StockChange[] = [];
+    const logRows: InsertLogStok[] = [];
+
+    for (const movement of ordered) {
+      const { stokId, result } = await this.applyStockDelta(tx, movement.jenisItem, movement.jumlah);
+      if (!result.success) {
+        throw new Error(result.message);
       }
+      changes.push({
+        stokId: stokId!,
+        jenisItem: movement.jenisItem,
+        jumlah: result.newStock!,
+        delta: movement.jumlah,
+        referensi: movement.referensiTabel && movement.referensiId ? [`${movement.referensiTabel}:${movement.referensiId}`] : [],
+      });
+      logRows.push({
+        stokId,
+        jenisTransaksi: movement.jenisTransaksi,
+        jumlah: movement.jumlah.toString(),
+        jumlahSebelum: result.previousStock!.toString(),
+        jumlahSesudah: result.newStock!.toString(),
+        referensiId: movement.referensiId,
+        referensiTabel: movement.referensiTabel,
+        keterangan: movement.keterangan,
+      });
+    }
+
+    if (logRows.length > 0) {
+      await tx.insert(logStok).values(logRows);
+    }
+
+    return changes;
+  }
+
+  private async applyStockDelta(
+    tx: DbTransaction,
+    jenisItem: string,
+    jumlahPerubahan: number
+  ): Promise<{ stokId?: number; result: StockUpdateResult }> {
+    // Stok sebelum dihitung di database (numeric) dari baris yang dikunci UPDATE, bukan di JS
+    const returningStock = {
+      id: stok.id,
+      jumlah: stok.jumlah,
+      sebelum: sql<string>`${stok.jumlah} - ${jumlahPerubahan}::numeric`,
+    };
+    // Cek stok negatif hanya untuk pengurangan; penambahan selalu boleh
+    const atomicUpdate = () => tx.update(stok)
+      .set({ jumlah: sql`${stok.jumlah} + ${jumlahPerubahan}::numeric`, updatedAt: new Date() })
+      .where(and(
+        eq(stok.id, sql`(select ${stok.id} from ${stok} where ${stok.jenisItem} = ${jenisItem} order by ${stok.id} limit 1)`),
+        jumlahPerubahan < 0 ? sql`${stok.jumlah} + ${jumlahPerubahan}::numeric >= 0` : undefined
+      ))
+      .returning(returningStock);
+
+    let [updated] = await atomicUpdate();
 
-      const previousStock = parseFloat(existingStock.jumlah.toString());
-      const newStock = previousStock + jumlahPerubahan;
+    if (!updated) {
+      // Stok belum ada atau tidak mencukupi. Kunci per jenisItem agar pembuatan record baru tidak ganda.
+      await tx.execute(sql`select pg_advisory_xact_lock(hashtext(${jenisItem}))`);
+      [updated] = await atomicUpdate();
+    }
 
-      // Validasi stok tidak boleh negatif
-      if (newStock < 0) {
+    if (!updated) {
+      const [existingStock] = await tx.select().from(stok)
+        .where(eq(stok.jenisItem, jenisItem))
+        .orderBy(stok.id)
+        .limit(1);
+
+      if (existingStock || jumlahPerubahan < 0) {
+        // Validasi stok tidak boleh negatif
+        const previousStock = existingStock ? parseFloat(existingStock.jumlah.toString()) : 0;
         return {
-          success: false,
-          message: `Stok ${jenisItem} tidak mencukupi. Stok saat ini: ${previousStock} kg, dibutuhkan: ${Math.abs(jumlahPerubahan)} kg`,
-          previousStock,
-          newStock: previousStock
+          stokId: existingStock?.id,
+          result: {
+            success: false,
+            message: `Stok ${jenisItem} tidak mencukupi. Stok saat ini: ${previousStock} kg, dibutuhkan: ${Math.abs(jumlahPerubahan)} kg`,
+            previousStock,
+            newStock: previousStock
+          }
         };
       }
 
-      // Update stok
-      const updateData = { 
-        jumlah: newStock.toString(),
-        updatedAt: new Date()
-      };
-      
-      // PRIORITAS AUDIT - FIXED: Update stok dengan jumlah baru
-      await db.update(stok)
-        .set(updateData)
-        .where(eq(stok.id, existingStock.id));
-
-      // Log perubahan stok
-      await db.insert(logStok).values({
-        stokId: existingStock.id,
-        jenisTransaksi: logData.jenisTransaksi,
+      // Jika stok belum ada, buat record baru langsung dengan jumlah masuk
+      [updated] = await tx.insert(stok).values({
+        jenisItem,
         jumlah: jumlahPerubahan.toString(),
-        jumlahSebelum: previousStock.toString(),
-        jumlahSesudah: newStock.toString(),
-        referensiId: logData.referensiId,
-        referensiTabel: logData.referensiTabel,
-        keterangan: logData.keterangan
-      });
+        satuan: 'kg',
+        hargaRataRata: '0',
+        batasMinimum: '0',
+        lokasi: 'Gudang Utama'
+      }).returning(returningStock);
+    }
 
-      return {
+    return {
+      stokId: updated.id,
+      result: {
         success: true,
-        previousStock,
-        newStock
-      };
-    } catch (error) {
-      console.error('Error updating stock:', error);
-      return {
-        success: false,
-        message: 'Gagal memperbarui stok'
-      };
-    }
+        previousStock: parseFloat(updated.sebelum.toString()),
+        newStock: parseFloat(updated.jumlah.toString())
+      }
+    };
   }
 
   // User operations
@@ -236,6 +532,27 @@ export class DatabaseStorage implements IStorage {
     return user || undefined;
   }
 
+  async getAuthUser(id: number): Promise<AuthUser | undefined> {
+    return await userCache.getOrLoad(String(id), async () => {
+      const [user] = await db
+        .select({
+          id: users.id,
+          username: users.username,
+          email: users.email,
+          role: users.role,
+          isActive: users.isActive,
+        })
+        .from(users)
+        .where(eq(users.id, id));
+      return user;
+    });
+  }
+
+  async getUsersByIds(ids: number[]): Promise<User[]> {
+    if (ids.length === 0) return [];
+    return await db.select().from(users).where(inArray(users.id, ids));
+  }
+
   async getUserByUsername(username: string): Promise<User | undefined> {
     const [user] = await db.select().from(users).where(eq(users.username, username));
     return user || undefined;
@@ -257,6 +574,7 @@ export class DatabaseStorage implements IStorage {
       .set({ ...userData, updatedAt: new Date() })
       .where(eq(users.id, id))
       .returning();
+    userCache.invalidate(String(id));
     return user;
   }
 
@@ -268,6 +586,7 @@ export class DatabaseStorage implements IStorage {
     await db.update(users)
       .set({ isActive: false, updatedAt: new Date() })
       .where(eq(users.id, id));
+    userCache.invalidate(String(id));
   }
 
   async updateUserRole(id: number, role: string): Promise<User | undefined> {
@@ -276,6 +595,7 @@ export class DatabaseStorage implements IStorage {
       .set({ role, updatedAt: new Date() })
       .where(eq(users.id, id))
       .returning();
+    userCache.invalidate(String(id));
     return user || undefined;
   }
 
@@ -285,6 +605,7 @@ export class DatabaseStorage implements IStorage {
       .set({ isActive, updatedAt: new Date() })
       .where(eq(users.id, id))
       .returning();
+    userCache.invalidate(String(id));
     return user || undefined;
   }
 
@@ -294,8 +615,18 @@ export class DatabaseStorage implements IStorage {
     return log;
   }
 
-  async getAllActivityLogs(): Promise<ActivityLog[]> {
-    return await db.select().from(activityLog).orderBy(desc(activityLog.createdAt));
+  async createActivityLogs(logs: InsertActivityLog[]): Promise<number> {
+    if (logs.length === 0) return 0;
+    const result = await db.insert(activityLog).values(logs);
+    return result.rowCount ?? logs.length;
+  }
+
+  async getAllActivityLogs(options: ListOptions = {}): Promise<ActivityLog[]> {
+    const query = db.select().from(activityLog)
+      .where(listWhere(activityLog.id, options, activityLog.createdAt))
+      .orderBy(desc(activityLog.id))
+      .$dynamic();
+    return await withLimit(query, options.limit);
   }
 
   async getActivityLogsByUser(userId: number): Promise<ActivityLog[]> {
@@ -329,8 +660,12 @@ export class DatabaseStorage implements IStorage {
   }
 
   // Supplier operations
-  async getAllSuppliers(): Promise<Supplier[]> {
-    return await db.select().from(suppliers).orderBy(desc(suppliers.createdAt));
+  async getAllSuppliers(options: ListOptions = {}): Promise<Supplier[]> {
+    const query = db.select().from(suppliers)
+      .where(listWhere(suppliers.id, options))
+      .orderBy(desc(suppliers.id))
+      .$dynamic();
+    return await withLimit(query, options.limit);
   }
 
   async getSupplier(id: number): Promise<Supplier | undefined> {
@@ -353,8 +688,12 @@ export class DatabaseStorage implements IStorage {
   }
 
   // Customer operations
-  async getAllCustomers(): Promise<Customer[]> {
-    return await db.select().from(customers).orderBy(desc(customers.createdAt));
+  async getAllCustomers(options: ListOptions = {}): Promise<Customer[]> {
+    const query = db.select().from(customers)
+      .where(listWhere(customers.id, options))
+      .orderBy(desc(customers.id))
+      .$dynamic();
+    return await withLimit(query, options.limit);
   }
 
   async getCustomer(id: number): Promise<Customer | undefined> {
@@ -377,8 +716,12 @@ export class DatabaseStorage implements IStorage {
   }
 
   // Pembelian operations
-  async getAllPembelian(): Promise<Pembelian[]> {
-    return await db.select().from(pembelian).orderBy(desc(pembelian.createdAt));
+  async getAllPembelian(options: ListOptions = {}): Promise<Pembelian[]> {
+    const query = db.select().from(pembelian)
+      .where(listWhere(pembelian.id, options, pembelian.tanggal, pembelian.jenisBarang))
+      .orderBy(desc(pembelian.id))
+      .$dynamic();
+    return await withLimit(query, options.limit);
   }
 
   async getPembelian(id: number): Promise<Pembelian | undefined> {
@@ -388,39 +731,53 @@ export class DatabaseStorage implements IStorage {
 
   async createPembelian(insertPembelian: InsertPembelian): Promise<Pembelian> {
     // PRIORITAS AUDIT - FIXED: Auto-update stok saat pembelian
-    const [item] = await db.insert(pembelian).values(insertPembelian).returning();
-    
-    // Update stok setelah pembelian berhasil
-    const jenisBarang = insertPembelian.jenisBarang || 'gabah';
-    const jumlah = parseFloat(insertPembelian.jumlah.toString());
-    
-    const stockResult = await this.autoUpdateStok(jenisBarang, jumlah, {
-      jenisTransaksi: 'masuk',
-      referensiId: item.id,
-      referensiTabel: 'pembelian',
-      keterangan: `Pembelian ${jenisBarang} sebanyak ${jumlah} kg`
+    return await this.runStockTransaction(async (tx) => {
+      const [item] = await tx.insert(pembelian).values(insertPembelian).returning();
+      return { item, movements: pembelianMovements(item), rekap: pembelianRekap(item) };
     });
+  }
 
-    if (!stockResult.success) {
-      console.error('Stock update failed:', stockResult.message);
-      // Note: Tidak menghentikan proses karena ini adalah pembelian (masuk)
-    }
-
-    return item;
+  async bulkCreatePembelian(rows: InsertPembelian[]): Promise<Pembelian[]> {
+    // Satu multi-row insert dan satu perubahan stok per jenisItem untuk seluruh batch
+    return await this.runStockTransaction(async (tx) => {
+      const items = await tx.insert(pembelian).values(rows).returning();
+      return {
+        item: items,
+        movements: aggregateMovements(items.flatMap(pembelianMovements), 'pembelian', items.length),
+        rekap: items.flatMap(pembelianRekap),
+      };
+    });
   }
 
   async updatePembelian(id: number, updatePembelian: Partial<InsertPembelian>): Promise<Pembelian> {
-    const [item] = await db.update(pembelian).set(updatePembelian).where(eq(pembelian.id, id)).returning();
+    // Rekap harian dikoreksi dengan selisih data lama dan baru (tanggal/jenis bisa berubah)
+    const item = await db.transaction(async (tx) => {
+      const [previous] = await tx.select().from(pembelian).where(eq(pembelian.id, id)).for('update');
+      const [item] = await tx.update(pembelian).set(updatePembelian).where(eq(pembelian.id, id)).returning();
+      if (previous && item) {
+        await applyRekap(tx, [...negateRekap(pembelianRekap(previous)), ...pembelianRekap(item)]);
+      }
+      return item;
+    });
+    invalidateDashboard();
     return item;
   }
 
   async deletePembelian(id: number): Promise<void> {
-    await db.delete(pembelian).where(eq(pembelian.id, id));
+    await db.transaction(async (tx) => {
+      const [deleted] = await tx.delete(pembelian).where(eq(pembelian.id, id)).returning();
+      if (deleted) await applyRekap(tx, negateRekap(pembelianRekap(deleted)));
+    });
+    invalidateDashboard();
   }
 
   // Pengeringan operations
-  async getAllPengeringan(): Promise<Pengeringan[]> {
-    return await db.select().from(pengeringan).orderBy(desc(pengeringan.createdAt));
+  async getAllPengeringan(options: ListOptions = {}): Promise<Pengeringan[]> {
+    const query = db.select().from(pengeringan)
+      .where(listWhere(pengeringan.id, options, pengeringan.tanggalMulai))
+      .orderBy(desc(pengeringan.id))
+      .$dynamic();
+    return await withLimit(query, options.limit);
   }
 
   async getPengeringan(id: number): Promise<Pengeringan | undefined> {
@@ -443,8 +800,12 @@ export class DatabaseStorage implements IStorage {
   }
 
   // Produksi operations
-  async getAllProduksi(): Promise<Produksi[]> {
-    return await db.select().from(produksi).orderBy(desc(produksi.createdAt));
+  async getAllProduksi(options: ListOptions = {}): Promise<Produksi[]> {
+    const query = db.select().from(produksi)
+      .where(listWhere(produksi.id, options, produksi.tanggal))
+      .orderBy(desc(produksi.id))
+      .$dynamic();
+    return await withLimit(query, options.limit);
   }
 
   async getProduksi(id: number): Promise<Produksi | undefined> {
@@ -454,94 +815,53 @@ export class DatabaseStorage implements IStorage {
 
   async createProduksi(insertProduksi: InsertProduksi): Promise<Produksi> {
     // PRIORITAS AUDIT - FIXED: Auto-update stok saat produksi (kurangi input, tambah output)
-    const gabahInput = parseFloat(insertProduksi.jumlahGabahInput?.toString() || '0');
-    const berasOutput = parseFloat(insertProduksi.jumlahBerasOutput?.toString() || '0');
-    const katulOutput = parseFloat(insertProduksi.jumlahKatul?.toString() || '0');
-    const menirOutput = parseFloat(insertProduksi.jumlahMenir?.toString() || '0');
-    const sekamOutput = parseFloat(insertProduksi.jumlahSekam?.toString() || '0');
-    
-    // Validasi stok gabah input
-    if (gabahInput > 0) {
-      const stockResult = await this.autoUpdateStok('gabah', -gabahInput, {
-        jenisTransaksi: 'keluar',
-        referensiId: 0, // Temporary
-        referensiTabel: 'produksi',
-        keterangan: `Produksi menggunakan gabah sebanyak ${gabahInput} kg`
-      });
-
-      if (!stockResult.success) {
-        throw new Error(stockResult.message || 'Stok gabah tidak mencukupi untuk produksi');
-      }
-    }
-
-    // Jika validasi berhasil, lanjutkan dengan produksi
-    const [item] = await db.insert(produksi).values(insertProduksi).returning();
-    
-    // Update referensi ID di log stok gabah
-    await db.update(logStok)
-      .set({ referensiId: item.id })
-      .where(and(
-        eq(logStok.referensiTabel, 'produksi'),
-        eq(logStok.referensiId, 0)
-      ));
-
-    // Tambahkan hasil produksi ke stok
-    const updatePromises = [];
-    
-    if (berasOutput > 0) {
-      updatePromises.push(this.autoUpdateStok('beras', berasOutput, {
-        jenisTransaksi: 'masuk',
-        referensiId: item.id,
-        referensiTabel: 'produksi',
-        keterangan: `Produksi menghasilkan beras sebanyak ${berasOutput} kg`
-      }));
-    }
-    
-    if (katulOutput > 0) {
-      updatePromises.push(this.autoUpdateStok('katul', katulOutput, {
-        jenisTransaksi: 'masuk',
-        referensiId: item.id,
-        referensiTabel: 'produksi',
-        keterangan: `Produksi menghasilkan katul sebanyak ${katulOutput} kg`
-      }));
-    }
-    
-    if (menirOutput > 0) {
-      updatePromises.push(this.autoUpdateStok('menir', menirOutput, {
-        jenisTransaksi: 'masuk',
-        referensiId: item.id,
-        referensiTabel: 'produksi',
-        keterangan: `Produksi menghasilkan menir sebanyak ${menirOutput} kg`
-      }));
-    }
-    
-    if (sekamOutput > 0) {
-      updatePromises.push(this.autoUpdateStok('sekam', sekamOutput, {
-        jenisTransaksi: 'masuk',
-        referensiId: item.id,
-        referensiTabel: 'produksi',
-        keterangan: `Produksi menghasilkan sekam sebanyak ${sekamOutput} kg`
-      }));
-    }
-
-    // Tunggu semua update stok selesai
-    await Promise.all(updatePromises);
+    // Produksi, pengurangan gabah dan penambahan hasil produksi di-commit bersama.
+    // Jika stok gabah tidak mencukupi, seluruh produksi di-rollback.
+    return await this.runStockTransaction(async (tx) => {
+      const [item] = await tx.insert(produksi).values(insertProduksi).returning();
+      return { item, movements: produksiMovements(item), rekap: produksiRekap(item) };
+    });
+  }
 
-    return item;
+  async bulkCreateProduksi(rows: InsertProduksi[]): Promise<Produksi[]> {
+    return await this.runStockTransaction(async (tx) => {
+      const items = await tx.insert(produksi).values(rows).returning();
+      return {
+        item: items,
+        movements: aggregateMovements(items.flatMap(produksiMovements), 'produksi', items.length),
+        rekap: items.flatMap(produksiRekap),
+      };
+    });
   }
 
   async updateProduksi(id: number, updateProduksi: Partial<InsertProduksi>): Promise<Produksi> {
-    const [item] = await db.update(produksi).set(updateProduksi).where(eq(produksi.id, id)).returning();
+    const item = await db.transaction(async (tx) => {
+      const [previous] = await tx.select().from(produksi).where(eq(produksi.id, id)).for('update');
+      const [item] = await tx.update(produksi).set(updateProduksi).where(eq(produksi.id, id)).returning();
+      if (previous && item) {
+        await applyRekap(tx, [...negateRekap(produksiRekap(previous)), ...produksiRekap(item)]);
+      }
+      return item;
+    });
+    invalidateDashboard();
     return item;
   }
 
   async deleteProduksi(id: number): Promise<void> {
-    await db.delete(produksi).where(eq(produksi.id, id));
+    await db.transaction(async (tx) => {
+      const [deleted] = await tx.delete(produksi).where(eq(produksi.id, id)).returning();
+      if (deleted) await applyRekap(tx, negateRekap(produksiRekap(deleted)));
+    });
+    invalidateDashboard();
   }
 
   // Penjualan operations
-  async getAllPenjualan(): Promise<Penjualan[]> {
-    return await db.select().from(penjualan).orderBy(desc(penjualan.createdAt));
+  async getAllPenjualan(options: ListOptions = {}): Promise<Penjualan[]> {
+    const query = db.select().from(penjualan)
+      .where(listWhere(penjualan.id, options, penjualan.tanggal, penjualan.jenisBarang))
+      .orderBy(desc(penjualan.id))
+      .$dynamic();
+    return await withLimit(query, options.limit);
   }
 
   async getPenjualan(id: number): Promise<Penjualan | undefined> {
@@ -551,47 +871,52 @@ export class DatabaseStorage implements IStorage {
 
   async createPenjualan(insertPenjualan: InsertPenjualan): Promise<Penjualan> {
     // PRIORITAS AUDIT - FIXED: Auto-update stok saat penjualan dengan validasi
-    const jenisBarang = insertPenjualan.jenisBarang || 'beras';
-    const jumlah = parseFloat(insertPenjualan.jumlah.toString());
-    
-    // Validasi stok sebelum penjualan
-    const stockResult = await this.autoUpdateStok(jenisBarang, -jumlah, {
-      jenisTransaksi: 'keluar',
-      referensiId: 0, // Temporary, akan diupdate setelah insert
-      referensiTabel: 'penjualan',
-      keterangan: `Penjualan ${jenisBarang} sebanyak ${jumlah} kg`
+    // Penjualan hanya ter-commit jika pengurangan stok atomik berhasil
+    return await this.runStockTransaction(async (tx) => {
+      const [item] = await tx.insert(penjualan).values(insertPenjualan).returning();
+      return { item, movements: penjualanMovements(item), rekap: penjualanRekap(item) };
     });
+  }
 
-    if (!stockResult.success) {
-      throw new Error(stockResult.message || 'Stok tidak mencukupi untuk penjualan');
-    }
-
-    // Jika validasi stok berhasil, lanjutkan dengan penjualan
-    const [item] = await db.insert(penjualan).values(insertPenjualan).returning();
-    
-    // Update referensi ID di log stok
-    await db.update(logStok)
-      .set({ referensiId: item.id })
-      .where(and(
-        eq(logStok.referensiTabel, 'penjualan'),
-        eq(logStok.referensiId, 0)
-      ));
-
-    return item;
+  async bulkCreatePenjualan(rows: InsertPenjualan[]): Promise<Penjualan[]> {
+    return await this.runStockTransaction(async (tx) => {
+      const items = await tx.insert(penjualan).values(rows).returning();
+      return {
+        item: items,
+        movements: aggregateMovements(items.flatMap(penjualanMovements), 'penjualan', items.length),
+        rekap: items.flatMap(penjualanRekap),
+      };
+    });
   }
 
   async updatePenjualan(id: number, updatePenjualan: Partial<InsertPenjualan>): Promise<Penjualan> {
-    const [item] = await db.update(penjualan).set(updatePenjualan).where(eq(penjualan.id, id)).returning();
+    const item = await db.transaction(async (tx) => {
+      const [previous] = await tx.select().from(penjualan).where(eq(penjualan.id, id)).for('update');
+      const [item] = await tx.update(penjualan).set(updatePenjualan).where(eq(penjualan.id, id)).returning();
+      if (previous && item) {
+        await applyRekap(tx, [...negateRekap(penjualanRekap(previous)), ...penjualanRekap(item)]);
+      }
+      return item;
+    });
+    invalidateDashboard();
     return item;
   }
 
   async deletePenjualan(id: number): Promise<void> {
-    await db.delete(penjualan).where(eq(penjualan.id, id));
+    await db.transaction(async (tx) => {
+      const [deleted] = await tx.delete(penjualan).where(eq(penjualan.id, id)).returning();
+      if (deleted) await applyRekap(tx, negateRekap(penjualanRekap(deleted)));
+    });
+    invalidateDashboard();
   }
 
   // Pengeluaran operations
-  async getAllPengeluaran(): Promise<Pengeluaran[]> {
-    return await db.select().from(pengeluaran).orderBy(desc(pengeluaran.createdAt));
+  async getAllPengeluaran(options: ListOptions = {}): Promise<Pengeluaran[]> {
+    const query = db.select().from(pengeluaran)
+      .where(listWhere(pengeluaran.id, options, pengeluaran.tanggal))
+      .orderBy(desc(pengeluaran.id))
+      .$dynamic();
+    return await withLimit(query, options.limit);
   }
 
   async getPengeluaran(id: number): Promise<Pengeluaran | undefined> {
@@ -614,8 +939,10 @@ export class DatabaseStorage implements IStorage {
   }
 
   // Stok operations
-  async getAllStok(): Promise<Stok[]> {
-    return await db.select().from(stok).orderBy(desc(stok.updatedAt));
+  async getAllStok(options: ListOptions = {}): Promise<Stok[]> {
+    // Tabel stok kecil (satu baris per jenisItem), cukup filter tanpa cursor
+    const condition = options.jenisItem ? eq(stok.jenisItem, options.jenisItem) : undefined;
+    return await db.select().from(stok).where(condition).orderBy(desc(stok.updatedAt));
   }
 
   async getStok(id: number): Promise<Stok | undefined> {
@@ -625,6 +952,7 @@ export class DatabaseStorage implements IStorage {
 
   async createStok(insertStok: InsertStok): Promise<Stok> {
     const [item] = await db.insert(stok).values(insertStok).returning();
+    invalidateDashboard();
     return item;
   }
 
@@ -642,16 +970,22 @@ export class DatabaseStorage implements IStorage {
     
     // Lakukan update jika ada data
     const [item] = await db.update(stok).set(updateStok).where(eq(stok.id, id)).returning();
+    invalidateDashboard();
     return item;
   }
 
   async deleteStok(id: number): Promise<void> {
     await db.delete(stok).where(eq(stok.id, id));
+    invalidateDashboard();
   }
 
   // Log Stok operations
-  async getAllLogStok(): Promise<LogStok[]> {
-    return await db.select().from(logStok).orderBy(desc(logStok.createdAt));
+  async getAllLogStok(options: ListOptions = {}): Promise<LogStok[]> {
+    const query = db.select().from(logStok)
+      .where(and(listWhere(logStok.id, options, logStok.createdAt), logStokJenisCondition(options.jenisItem)))
+      .orderBy(desc(logStok.id))
+      .$dynamic();
+    return await withLimit(query, options.limit);
   }
 
   async getLogStok(id: number): Promise<LogStok | undefined> {
@@ -665,94 +999,134 @@ export class DatabaseStorage implements IStorage {
   }
 
   // Dashboard metrics
-  async getDashboardMetrics(): Promise<{
-    todayPurchases: number;
-    todayProduction: number;
-    todaySales: number;
-    stockRice: number;
-    stockGabah?: number; // UPDATE INI UNTUK MULTI PRODUK
-    stockKatul?: number; // UPDATE INI UNTUK MULTI PRODUK
-    stockMenir?: number; // UPDATE INI UNTUK MULTI PRODUK
-    stockSekam?: number; // UPDATE INI UNTUK MULTI PRODUK
-    recentTransactions: any[];
-  }> {
+  async getRecentTransactions(limit: number): Promise<RecentTransaction[]> {
+    // Ambil paling banyak `limit` baris terbaru dari tiap tabel, lalu gabungkan
+    const [recentPembelian, recentPenjualan, recentPengeluaran] = await Promise.all([
+      db.select().from(pembelian).orderBy(desc(pembelian.createdAt)).limit(limit),
+      db.select().from(penjualan).orderBy(desc(penjualan.createdAt)).limit(limit),
+      db.select().from(pengeluaran).orderBy(desc(pengeluaran.createdAt)).limit(limit),
+    ]);
+
+    const allTransactions: RecentTransaction[] = [
+      ...recentPembelian.map(p => ({
+        id: `pembelian-${p.id}`,
+        type: 'pembelian',
+        description: `Pembelian ${p.jenisBarang || p.jenisGabah}`,
+        amount: parseFloat(p.jumlah.toString()),
+        value: parseFloat(p.totalHarga.toString()),
+        date: p.createdAt || new Date()
+      })),
+      ...recentPenjualan.map(p => ({
+        id: `penjualan-${p.id}`,
+        type: 'penjualan',
+        description: `Penjualan ${p.jenisBarang || p.jenisBeras}`,
+        amount: parseFloat(p.jumlah.toString()),
+        value: parseFloat(p.totalHarga.toString()),
+        date: p.createdAt || new Date()
+      })),
+      ...recentPengeluaran.map(p => ({
+        id: `pengeluaran-${p.id}`,
+        type: 'pengeluaran',
+        description: p.deskripsi || p.kategori,
+        amount: 0,
+        value: parseFloat(p.jumlah.toString()),
+        date: p.createdAt || new Date()
+      }))
+    ];
+
+    return allTransactions
+      .sort((a, b) => b.date.getTime() - a.date.getTime())
+      .slice(0, limit);
+  }
+
+  async getDashboardMetrics(): Promise<DashboardMetrics> {
+    return await dashboardCache.getOrLoad('metrics', () => this.loadDashboardMetrics());
+  }
+
+  // Semua metrik dashboard dihitung dalam satu query: subquery skalar ke rekap harian
+  // untuk transaksi hari ini, agregat FILTER untuk stok per jenisItem dan json_agg
+  // untuk transaksi terbaru
+  private async loadDashboardMetrics(): Promise<DashboardMetrics> {
     const today = new Date();
-    today.setHours(0, 0, 0, 0);
-    const tomorrow = new Date(today);
-    tomorrow.setDate(tomorrow.getDate() + 1);
-
-    // Today's purchases
-    const todayPurchases = await db
-      .select({ total: sql<number>`sum(${pembelian.jumlah})` })
-      .from(pembelian)
-      .where(and(gte(pembelian.tanggal, today), lte(pembelian.tanggal, tomorrow)));
-
-    // Today's production
-    const todayProduction = await db
-      .select({ total: sql<number>`sum(${produksi.jumlahBerasOutput})` })
-      .from(produksi)
-      .where(and(gte(produksi.tanggal, today), lte(produksi.tanggal, tomorrow)));
-
-    // Today's sales
-    const todaySales = await db
-      .select({ total: sql<number>`sum(${penjualan.jumlah})` })
-      .from(penjualan)
-      .where(and(gte(penjualan.tanggal, today), lte(penjualan.tanggal, tomorrow)));
-
-    // Rice stock
-    const riceStock = await db
-      .select({ total: sql<number>`sum(${stok.jumlah})` })
-      .from(stok)
-      .where(eq(stok.jenisItem, 'beras'));
-
-    // UPDATE INI UNTUK MULTI PRODUK - Stock untuk jenis barang lainnya
-    const gabahStock = await db
-      .select({ total: sql<number>`sum(${stok.jumlah})` })
-      .from(stok)
-      .where(eq(stok.jenisItem, 'gabah'));
-
-    const katulStock = await db
-      .select({ total: sql<number>`sum(${stok.jumlah})` })
-      .from(stok)
-      .where(eq(stok.jenisItem, 'katul'));
-
-    const menirStock = await db
-      .select({ total: sql<number>`sum(${stok.jumlah})` })
-      .from(stok)
-      .where(eq(stok.jenisItem, 'menir'));
-
-    const sekamStock = await db
-      .select({ total: sql<number>`sum(${stok.jumlah})` })
-      .from(stok)
-      .where(eq(stok.jenisItem, 'sekam'));
-
-    // Recent transactions
-    const recentTransactions = await db
+
+    const stockOf = (jenisItem: string) =>
+      sql<number>`sum(${stok.jumlah}) filter (where ${stok.jenisItem} = ${jenisItem})`;
+    // Total hari ini dibaca dari rekap harian (beberapa baris) alih-alih memindai transaksi;
+    // "hari ini" adalah hari bisnis REKAP_TZ, sama dengan tanggal yang ditulis ke rekap
+    const todayTotal = (column: PgColumn, jenisItem?: string) =>
+      sql<number>`(select sum(${column}) from ${rekapHarian} where ${and(
+        eq(rekapHarian.tanggal, rekapDate(today)),
+        jenisItem ? eq(rekapHarian.jenisItem, jenisItem) : undefined,
+      )})`;
+
+    // Bentuk sama seperti select drizzle sebelumnya: decimal sebagai string, tanggal ISO UTC
+    const recentTransactions = sql<any[]>`(
+      select coalesce(json_agg(json_build_object(
+        'id', recent.id,
+        'type', 'pembelian',
+        'description', 'Pembelian Gabah',
+        'amount', recent.jumlah::text,
+        'value', recent.total_harga::text,
+        'date', to_char(recent.created_at, 'YYYY-MM-DD"T"HH24:MI:SS.MS"Z"')
+      ) order by recent.created_at desc), '[]'::json)
+      from (
+        select id, jumlah, total_harga, created_at from ${pembelian}
+        order by created_at desc
+        limit 10
+      ) recent
+    )`;
+
+    const [totals] = await db
       .select({
-        id: pembelian.id,
-        type: sql<string>`'pembelian'`,
-        description: sql<string>`'Pembelian Gabah'`,
-        amount: pembelian.jumlah,
-        value: pembelian.totalHarga,
-        date: pembelian.createdAt,
+        todayPurchases: todayTotal(rekapHarian.pembelianKg),
+        todayProduction: todayTotal(rekapHarian.produksiOutputKg, 'beras'),
+        todaySales: todayTotal(rekapHarian.penjualanKg),
+        stockRice: stockOf('beras'),
+        stockGabah: stockOf('gabah'), // UPDATE INI UNTUK MULTI PRODUK
+        stockKatul: stockOf('katul'), // UPDATE INI UNTUK MULTI PRODUK
+        stockMenir: stockOf('menir'), // UPDATE INI UNTUK MULTI PRODUK
+        stockSekam: stockOf('sekam'), // UPDATE INI UNTUK MULTI PRODUK
+        recentTransactions,
       })
-      .from(pembelian)
-      .orderBy(desc(pembelian.createdAt))
-      .limit(10);
+      .from(stok);
 
     return {
-      todayPurchases: todayPurchases[0]?.total || 0,
-      todayProduction: todayProduction[0]?.total || 0,
-      todaySales: todaySales[0]?.total || 0,
-      stockRice: riceStock[0]?.total || 0,
-      stockGabah: gabahStock[0]?.total || 0, // UPDATE INI UNTUK MULTI PRODUK
-      stockKatul: katulStock[0]?.total || 0, // UPDATE INI UNTUK MULTI PRODUK
-      stockMenir: menirStock[0]?.total || 0, // UPDATE INI UNTUK MULTI PRODUK
-      stockSekam: sekamStock[0]?.total || 0, // UPDATE INI UNTUK MULTI PRODUK
-      recentTransactions,
+      todayPurchases: totals?.todayPurchases || 0,
+      todayProduction: totals?.todayProduction || 0,
+      todaySales: totals?.todaySales || 0,
+      stockRice: totals?.stockRice || 0,
+      stockGabah: totals?.stockGabah || 0, // UPDATE INI UNTUK MULTI PRODUK
+      stockKatul: totals?.stockKatul || 0, // UPDATE INI UNTUK MULTI PRODUK
+      stockMenir: totals?.stockMenir || 0, // UPDATE INI UNTUK MULTI PRODUK
+      stockSekam: totals?.stockSekam || 0, // UPDATE INI UNTUK MULTI PRODUK
+      recentTransactions: totals?.recentTransactions || [],
     };
   }
 
+  // Rekap harian operations
+  async getRekapHarian(from: string, to: string, jenisItem?: string): Promise<RekapHarian[]> {
+    return await getRekapHarian(from, to, jenisItem);
+  }
+
+  async rebuildRekapHarian(): Promise<number> {
+    const rows = await rebuildRekapHarian();
+    invalidateDashboard();
+    return rows;
+  }
+
+  // Snapshot stok operations
+  async getStokAt(at: Date, jenisItem?: string): Promise<StokAt[]> {
+    return await getStokAt(at, jenisItem);
+  }
+
+  async takeStokSnapshots(): Promise<StokSnapshot[]> {
+    return await takeStokSnapshots();
+  }
+
+  async rebuildStokSnapshots(): Promise<number> {
+    return await rebuildStokSnapshots();
+  }
+
   // Settings operations
   async getSettings(): Promise<Settings | undefined> {
     const [settingsRecord] = await db.select().from(settings);
@@ -0,0 +1,83 @@
+import fs from "fs";
+import type { Request, Response, NextFunction } from "express";
+
+// Rekam trafik API ke file NDJSON agar bisa di-replay oleh traffic_replay.py.
+// Aktif hanya jika TRAFFIC_TRACE_FILE diisi. Satu baris per request:
+// { ts, offsetMs, method, path, contentType?, body?, status, durationMs, responseId? }
+export interface TrafficTraceEntry {
+  ts: number; // epoch ms saat request diterima
+  offsetMs: number; // relatif terhadap request pertama dalam trace
+  method: string;
+  path: string; // termasuk query string
+  contentType?: string;
+  body?: unknown;
+  status: number;
+  durationMs: number;
+  responseId?: number; // id dokumen yang dibuat, untuk memetakan ulang id saat replay
+}
+
+// Field rahasia tidak pernah ditulis ke trace
+const REDACTED_FIELDS = new Set(["password", "currentPassword", "newPassword", "token"]);
+const REDACTED = "[redacted]";
+
+function redact(body: unknown): unknown {
+  if (!body || typeof body !== "object" || Array.isArray(body)) return body;
+  const copy: Record<string, unknown> = { ...(body as Record<string, unknown>) };
+  for (const field of Object.keys(copy)) {
+    if (REDACTED_FIELDS.has(field)) copy[field] = REDACTED;
+  }
+  return copy;
+}
+
+function hasBody(body: unknown): boolean {
+  if (body === undefined || body === null) return false;
+  if (typeof body === "string") return body.length > 0;
+  if (typeof body === "object") return Array.isArray(body) || Object.keys(body).length > 0;
+  return true;
+}
+
+export function trafficRecorder(filePath: string) {
+  // Append stream: penulisan trace tidak memblokir request
+  const stream = fs.createWriteStream(filePath, { flags: "a" });
+  stream.on("error", (error) => console.error("Failed to write traffic trace:", error));
+  let firstTs: number | undefined;
+
+  return (req: Request, res: Response, next: NextFunction) => {
+    if (!req.path.startsWith("/api") || req.path.startsWith("/api/internal")) {
+      return next();
+    }
+
+    const ts = Date.now();
+    const started = process.hrtime.bigint();
+    if (firstTs === undefined) firstTs = ts;
+    let responseId: number | undefined;
+
+    const originalResJson = res.json;
+    res.json = function (bodyJson, ...args) {
+      if (bodyJson && typeof bodyJson === "object" && typeof bodyJson.id === "number") {
+        responseId = bodyJson.id;
+      }
+      return originalResJson.apply(res, [bodyJson, ...args]);
+    };
+
+    res.on("finish", () => {
+      // Body dibaca saat selesai karena parser per-route (mis. bulk import) berjalan setelah middleware ini
+      const entry: TrafficTraceEntry = {
+        ts,
+        offsetMs: ts - firstTs!,
+        method: req.method,
+        path: req.originalUrl,
+        status: res.statusCode,
+        durationMs: Number(process.hrtime.bigint() - started) / 1e6,
+      };
+      if (hasBody(req.body)) {
+        entry.body = redact(req.body);
+        entry.contentType = req.get("Content-Type")?.split(";")[0];
+      }
+      if (responseId !== undefined) entry.responseId = responseId;
+      stream.write(JSON.stringify(entry) + "\n");
+    });
+
+    next();
+  };
+}
@@ -0,0 +1,220 @@
+import zlib from "zlib";
+
+// Penulis XLSX streaming minimal: satu sheet, sel inline string/angka, tanpa style.
+// File ZIP ditulis berurutan (local header -> data deflate -> data descriptor) sehingga
+// ukuran dan CRC tidak perlu diketahui di depan; central directory ditulis di akhir.
+// Tanpa ZIP64, jadi total file dibatasi 4 GB (jauh di atas batas baris Excel).
+
+export const XLSX_MAX_ROWS = 1_048_576;
+
+type Sink = (chunk: Buffer) => Promise<void>;
+
+const CRC_TABLE = (() => {
+  const table = new Uint32Array(256);
+  for (let n = 0; n < 256; n++) {
+    let c = n;
+    for (let k = 0; k < 8; k++) c = c & 1 ? 0xedb88320 ^ (c >>> 1) : c >>> 1;
+    table[n] = c >>> 0;
+  }
+  return table;
+})();
+
+function crc32(buffer: Buffer, previous = 0): number {
+  let crc = previous ^ 0xffffffff;
+  for (let i = 0; i < buffer.length; i++) crc = CRC_TABLE[(crc ^ buffer[i]) & 0xff] ^ (crc >>> 8);
+  return (crc ^ 0xffffffff) >>> 0;
+}
+
+interface ZipEntry {
+  name: Buffer;
+  offset: number;
+  crc: number;
+  compressedSize: number;
+  size: number;
+}
+
+// Flag 0x0808: ukuran/CRC di data descriptor (bit 3) dan nama file UTF-8 (bit 11)
+const ZIP_FLAGS = 0x0808;
+const DEFLATE = 8;
+
+class ZipWriter {
+  private offset = 0;
+  private entries: ZipEntry[] = [];
+  private current?: { entry: ZipEntry; deflate: zlib.DeflateRaw; output: Buffer[] };
+
+  constructor(private sink: Sink) {}
+
+  private async emit(chunk: Buffer) {
+    if (chunk.length === 0) return;
+    this.offset += chunk.length;
+    await this.sink(chunk);
+  }
+
+  async begin(name: string) {
+    const entry: ZipEntry = { name: Buffer.from(name, "utf-8"), offset: this.offset, crc: 0, compressedSize: 0, size: 0 };
+    const header = Buffer.alloc(30);
+    header.writeUInt32LE(0x04034b50, 0);
+    header.writeUInt16LE(20, 4); // versi minimum
+    header.writeUInt16LE(ZIP_FLAGS, 6);
+    header.writeUInt16LE(DEFLATE, 8);
+    header.writeUInt16LE(entry.name.length, 26);
+    await this.emit(Buffer.concat([header, entry.name]));
+
+    const deflate = zlib.createDeflateRaw();
+    const output: Buffer[] = [];
+    deflate.on("data", (chunk: Buffer) => output.push(chunk));
+    this.current = { entry, deflate, output };
+  }
+
+  private async drainOutput() {
+    const current = this.current!;
+    const chunk = Buffer.concat(current.output.splice(0));
+    current.entry.compressedSize += chunk.length;
+    await this.emit(chunk);
+  }
+
+  async write(data: string) {
+    const current = this.current!;
+    const buffer = Buffer.from(data, "utf-8");
+    current.entry.crc = crc32(buffer, current.entry.crc);
+    current.entry.size += buffer.length;
+    current.deflate.write(buffer);
+    // Sync flush agar data terkompresi langsung dikirim, bukan ditahan zlib sampai akhir file
+    await new Promise<void>((resolve) => current.deflate.flush(zlib.constants.Z_SYNC_FLUSH, () => resolve()));
+    await this.drainOutput();
+  }
+
+  async end() {
+    const current = this.current!;
+    await new Promise<void>((resolve, reject) => {
+      current.deflate.once("end", resolve);
+      current.deflate.once("error", reject);
+      current.deflate.end();
+    });
+    await this.drainOutput();
+
+    const descriptor = Buffer.alloc(16);
+    descriptor.writeUInt32LE(0x08074b50, 0);
+    descriptor.writeUInt32LE(current.entry.crc, 4);
+    descriptor.writeUInt32LE(current.entry.compressedSize, 8);
+    descriptor.writeUInt32LE(current.entry.size, 12);
+    await this.emit(descriptor);
+    this.entries.push(current.entry);
+    this.current = undefined;
+  }
+
+  async addFile(name: string, content: string) {
+    await this.begin(name);
+    await this.write(content);
+    await this.end();
+  }
+
+  async finish() {
+    const directoryOffset = this.offset;
+    const records = this.entries.map((entry) => {
+      const record = Buffer.alloc(46);
+      record.writeUInt32LE(0x02014b50, 0);
+      record.writeUInt16LE(20, 4);
+      record.writeUInt16LE(20, 6);
+      record.writeUInt16LE(ZIP_FLAGS, 8);
+      record.writeUInt16LE(DEFLATE, 10);
+      record.writeUInt32LE(entry.crc, 16);
+      record.writeUInt32LE(entry.compressedSize, 20);
+      record.writeUInt32LE(entry.size, 24);
+      record.writeUInt16LE(entry.name.length, 28);
+      record.writeUInt32LE(entry.offset, 42);
+      return Buffer.concat([record, entry.name]);
+    });
+    const directory = Buffer.concat(records);
+    const end = Buffer.alloc(22);
+    end.writeUInt32LE(0x06054b50, 0);
+    end.writeUInt16LE(this.entries.length, 8);
+    end.writeUInt16LE(this.entries.length, 10);
+    end.writeUInt32LE(directory.length, 12);
+    end.writeUInt32LE(directoryOffset, 16);
+    await this.emit(Buffer.concat([directory, end]));
+  }
+}
+
+const XML_HEADER = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n';
+
+const STATIC_PARTS: Array<[string, string]> = [
+  ["[Content_Types].xml", XML_HEADER +
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">' +
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>' +
+    '<Default Extension="xml" ContentType="application/xml"/>' +
+    '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>' +
+    '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>' +
+    '</Types>'],
+  ["_rels/.rels", XML_HEADER +
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">' +
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>' +
+    '</Relationships>'],
+  ["xl/_rels/workbook.xml.rels", XML_HEADER +
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">' +
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>' +
+    '</Relationships>'],
+];
+
+function escapeXml(value: string): string {
+  return value
+    // Karakter kontrol tidak valid di XML 1.0
+    .replace(/[\u0000-\u0008\u000b\u000c\u000e-\u001f]/g, "")
+    .replace(/&/g, "&amp;")
+    .replace(/</g, "&lt;")
+    .replace(/>/g, "&gt;")
+    .replace(/"/g, "&quot;");
+}
+
+const NUMERIC = /^-?\d+(\.\d+)?$/;
+
+function cell(value: unknown): string {
+  if (value === null || value === undefined) return "<c/>";
+  if (typeof value === "number" || (typeof value === "string" && NUMERIC.test(value))) {
+    return `<c><v>${value}</v></c>`;
+  }
+  const text = value instanceof Date ? value.toISOString() : String(value);
+  return `<c t="inlineStr"><is><t xml:space="preserve">${escapeXml(text)}</t></is></c>`;
+}
+
+export class XlsxStreamWriter {
+  private zip: ZipWriter;
+  private rows = 0;
+
+  constructor(sink: Sink, private sheetName = "Sheet1") {
+    this.zip = new ZipWriter(sink);
+  }
+
+  get full(): boolean {
+    return this.rows >= XLSX_MAX_ROWS;
+  }
+
+  async begin(header: string[]) {
+    for (const [name, content] of STATIC_PARTS) {
+      await this.zip.addFile(name, content);
+    }
+    await this.zip.addFile("xl/workbook.xml", XML_HEADER +
+      '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" ' +
+      'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">' +
+      `<sheets><sheet name="${escapeXml(this.sheetName.slice(0, 31))}" sheetId="1" r:id="rId1"/></sheets></workbook>`);
+    await this.zip.begin("xl/worksheets/sheet1.xml");
+    await this.zip.write(XML_HEADER +
+      '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>');
+    await this.writeRows([header]);
+  }
+
+  // Mengembalikan jumlah baris yang benar-benar ditulis (dipotong di batas baris Excel)
+  async writeRows(rows: unknown[][]): Promise<number> {
+    const accepted = rows.slice(0, Math.max(0, XLSX_MAX_ROWS - this.rows));
+    if (accepted.length === 0) return 0;
+    this.rows += accepted.length;
+    await this.zip.write(accepted.map((row) => `<row>${row.map(cell).join("")}</row>`).join(""));
+    return accepted.length;
+  }
+
+  async end() {
+    await this.zip.write("</sheetData></worksheet>");
+    await this.zip.end();
+    await this.zip.finish();
+  }
+}
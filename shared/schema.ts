@@ -1,4 +1,4 @@
-import { pgTable, text, serial, integer, boolean, timestamp, decimal, varchar } from "drizzle-orm/pg-core";
+import { pgTable, text, serial, integer, boolean, timestamp, decimal, varchar, date, index, uniqueIndex } from "drizzle-orm/pg-core";
 import { relations } from "drizzle-orm";
 import { createInsertSchema } from "drizzle-zod";
 import { z } from "zod";
@@ -74,7 +74,10 @@ export const pembelian = pgTable("pembelian", {
   metodePembayaran: text("metode_pembayaran").default("cash"), // cash, transfer
   catatan: text("catatan"),
   createdAt: timestamp("created_at").defaultNow(),
-});
+}, (table) => [
+  index("pembelian_tanggal_idx").on(table.tanggal),
+  index("pembelian_created_at_idx").on(table.createdAt),
+]);
 
 // Pengeringan (Drying) table
 export const pengeringan = pgTable("pengeringan", {
@@ -111,7 +114,9 @@ export const produksi = pgTable("produksi", {
   status: text("status").default("completed"),
   catatan: text("catatan"),
   createdAt: timestamp("created_at").defaultNow(),
-});
+}, (table) => [
+  index("produksi_tanggal_idx").on(table.tanggal),
+]);
 
 // Penjualan (Sales) table
 export const penjualan = pgTable("penjualan", {
@@ -129,7 +134,10 @@ export const penjualan = pgTable("penjualan", {
   metodePembayaran: text("metode_pembayaran").default("cash"), // cash, transfer
   catatan: text("catatan"),
   createdAt: timestamp("created_at").defaultNow(),
-});
+}, (table) => [
+  index("penjualan_tanggal_idx").on(table.tanggal),
+  index("penjualan_created_at_idx").on(table.createdAt),
+]);
 
 // Pengeluaran (Expenses) table
 export const pengeluaran = pgTable("pengeluaran", {
@@ -152,7 +160,9 @@ export const stok = pgTable("stok", {
   batasMinimum: decimal("batas_minimum", { precision: 10, scale: 2 }),
   lokasi: text("lokasi"),
   updatedAt: timestamp("updated_at").defaultNow(),
-});
+}, (table) => [
+  index("stok_jenis_item_idx").on(table.jenisItem),
+]);
 
 // Log Stok (Stock Log) table
 export const logStok = pgTable("log_stok", {
@@ -166,7 +176,40 @@ export const logStok = pgTable("log_stok", {
   referensiTabel: text("referensi_tabel"), // Table name of the reference
   keterangan: text("keterangan"),
   createdAt: timestamp("created_at").defaultNow(),
-});
+}, (table) => [
+  index("log_stok_referensi_idx").on(table.referensiTabel, table.referensiId),
+  index("log_stok_stok_id_id_idx").on(table.stokId, table.id), // watermark & delta snapshot stok
+]);
+
+// Stok Snapshot table - posisi stok per jenisItem pada satu titik ledger. Posisi stok di
+// waktu lampau = snapshot terdekat + jumlah log_stok setelah logStokId (bukan replay seluruh ledger)
+export const stokSnapshot = pgTable("stok_snapshot", {
+  id: serial("id").primaryKey(),
+  jenisItem: text("jenis_item").notNull(),
+  jumlah: decimal("jumlah", { precision: 14, scale: 2 }).notNull(),
+  logStokId: integer("log_stok_id").notNull().default(0), // log_stok terakhir yang sudah termasuk dalam jumlah
+  takenAt: timestamp("taken_at").notNull().defaultNow(),
+}, (table) => [
+  index("stok_snapshot_jenis_item_taken_at_idx").on(table.jenisItem, table.takenAt),
+]);
+
+// Rekap Harian (Daily rollup) table - total per hari per jenisItem, diperbarui
+// bersamaan dengan pembelian/produksi/penjualan agar laporan tidak memindai transaksi
+export const rekapHarian = pgTable("rekap_harian", {
+  id: serial("id").primaryKey(),
+  tanggal: date("tanggal").notNull(), // YYYY-MM-DD
+  jenisItem: text("jenis_item").notNull(),
+  pembelianKg: decimal("pembelian_kg", { precision: 14, scale: 2 }).notNull().default("0"),
+  pembelianNilai: decimal("pembelian_nilai", { precision: 16, scale: 2 }).notNull().default("0"),
+  produksiInputKg: decimal("produksi_input_kg", { precision: 14, scale: 2 }).notNull().default("0"), // bahan baku terpakai
+  produksiOutputKg: decimal("produksi_output_kg", { precision: 14, scale: 2 }).notNull().default("0"), // hasil produksi
+  penjualanKg: decimal("penjualan_kg", { precision: 14, scale: 2 }).notNull().default("0"),
+  penjualanNilai: decimal("penjualan_nilai", { precision: 16, scale: 2 }).notNull().default("0"),
+  jumlahTransaksi: integer("jumlah_transaksi").notNull().default(0),
+  updatedAt: timestamp("updated_at").defaultNow(),
+}, (table) => [
+  uniqueIndex("rekap_harian_tanggal_jenis_item_idx").on(table.tanggal, table.jenisItem),
+]);
 
 // Settings table untuk menyimpan informasi perusahaan
 export const settings = pgTable("settings", {
@@ -457,6 +500,8 @@ export type Stok = typeof stok.$inferSelect;
 export type InsertStok = z.infer<typeof insertStokSchema>;
 export type LogStok = typeof logStok.$inferSelect;
 export type InsertLogStok = z.infer<typeof insertLogStokSchema>;
+export type StokSnapshot = typeof stokSnapshot.$inferSelect;
+export type RekapHarian = typeof rekapHarian.$inferSelect;
 export type Settings = typeof settings.$inferSelect;
 export type InsertSettings = z.infer<typeof insertSettingsSchema>;
 export type PasswordResetToken = typeof passwordResetTokens.$inferSelect;
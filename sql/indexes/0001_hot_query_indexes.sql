@@ -0,0 +1,19 @@
+-- Index sekunder untuk filter panas (lihat index di shared/schema.ts).
+-- `npm run db:push` membuat index yang sama dengan CREATE INDEX biasa yang mengunci tulis;
+-- untuk database produksi yang sudah besar jalankan file ini lewat `npm run db:indexes`
+-- agar index dibangun CONCURRENTLY tanpa menghentikan transaksi. Setiap statement diakhiri `;`.
+-- Build CONCURRENTLY yang gagal meninggalkan index INVALID: DROP INDEX dulu sebelum menjalankan ulang.
+
+-- autoUpdateStok: lookup baris stok per jenisItem
+CREATE INDEX CONCURRENTLY IF NOT EXISTS stok_jenis_item_idx ON stok (jenis_item);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS log_stok_referensi_idx ON log_stok (referensi_tabel, referensi_id);
+
+-- Total harian dan filter rentang tanggal
+CREATE INDEX CONCURRENTLY IF NOT EXISTS pembelian_tanggal_idx ON pembelian (tanggal);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS produksi_tanggal_idx ON produksi (tanggal);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS penjualan_tanggal_idx ON penjualan (tanggal);
+
+-- Transaksi terbaru (ORDER BY created_at DESC LIMIT n)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS pembelian_created_at_idx ON pembelian (created_at);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS penjualan_created_at_idx ON penjualan (created_at);
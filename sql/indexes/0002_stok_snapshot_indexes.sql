@@ -0,0 +1,9 @@
+-- Index untuk snapshot stok point-in-time (lihat server/stokSnapshot.ts).
+-- Tabel stok_snapshot sendiri dibuat lewat `npm run db:push`; jalankan `npm run db:indexes`
+-- untuk membangun index log_stok secara CONCURRENTLY pada database yang sudah besar.
+
+-- Watermark log_stok terakhir per baris stok dan replay delta setelah snapshot
+CREATE INDEX CONCURRENTLY IF NOT EXISTS log_stok_stok_id_id_idx ON log_stok (stok_id, id);
+
+-- Snapshot terdekat sebelum waktu yang diminta
+CREATE INDEX CONCURRENTLY IF NOT EXISTS stok_snapshot_jenis_item_taken_at_idx ON stok_snapshot (jenis_item, taken_at);
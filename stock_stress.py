@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+Stock Stress untuk PadiDoc
+Menembakkan penjualan dan produksi paralel pada jenisItem yang sama, lalu
+me-replay /api/log-stok untuk mendeteksi lost update dan stok negatif
+"""
+
+import asyncio
+import json
+import time
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
+
+from load_engine import AsyncHttpPool
+
+
+@dataclass
+class Violation:
+    """Satu pelanggaran konsistensi stok"""
+    kind: str
+    jenis_item: str
+    detail: str
+    log_ids: List[int] = field(default_factory=list)
+
+
+@dataclass
+class StressResult:
+    """Hasil satu run stress stok"""
+    jenis_item: str
+    requests: int
+    accepted: Dict[str, int]
+    rejected: Dict[str, int]
+    failed: int
+    elapsed: float
+    start_stock: Dict[str, Decimal]
+    final_stock: Dict[str, Decimal]
+    violations: List[Violation]
+
+    @property
+    def throughput(self) -> float:
+        return sum(self.accepted.values()) / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def consistent(self) -> bool:
+        return not self.violations
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "jenisItem": self.jenis_item,
+            "requests": self.requests,
+            "accepted": self.accepted,
+            "rejected": self.rejected,
+            "failed": self.failed,
+            "elapsed": round(self.elapsed, 3),
+            "throughput": round(self.throughput, 2),
+            "violations": [{"kind": v.kind, "jenisItem": v.jenis_item, "detail": v.detail}
+                           for v in self.violations],
+        }
+
+
+def _decimal(value: Any) -> Decimal:
+    return Decimal(str(value)) if value not in (None, "") else Decimal("0")
+
+
+class StockRaceDetector:
+    """Deteksi race condition pada autoUpdateStok lewat API publik"""
+
+    def __init__(self, tester, concurrency: int = 50, jenis_item: str = "beras"):
+        self.tester = tester
+        self.concurrency = concurrency
+        self.jenis_item = jenis_item
+
+    async def _snapshot(self, pool: AsyncHttpPool):
+        stok_rows = (await pool.request("GET", "/api/stok?all=1")).json()
+        log_rows = (await pool.request("GET", "/api/log-stok?all=1")).json()
+        return stok_rows, log_rows
+
+    async def _prime(self, pool: AsyncHttpPool, stock: Dict[str, Decimal], produksi_count: int):
+        """Pastikan stok gabah cukup agar produksi tidak ditolak karena bahan baku"""
+        needed = Decimal(1200) * produksi_count - stock.get("gabah", Decimal(0))
+        if needed <= 0:
+            return
+        payload = self.tester.build_pembelian_payload(self.tester.suppliers[0], 0)
+        payload.update({
+            "jumlah": str(needed),
+            "totalHarga": str(needed * Decimal(payload["hargaPerKg"])),
+            "catatan": "Priming stok gabah untuk stress test",
+        })
+        response = await pool.request("POST", "/api/pembelian", payload)
+        if not response.ok:
+            self.tester.log(f"Priming gabah gagal: {response.status} {response.text}", "WARNING")
+
+    def _build_requests(self, count: int, start_item_stock: Decimal) -> List[Dict]:
+        """Campuran penjualan dan produksi dengan total permintaan melebihi stok awal"""
+        requests_ = []
+        sale_size = max(Decimal(1), (start_item_stock / max(1, count // 2)).quantize(Decimal(1)) * 2)
+        for i in range(count):
+            if i % 2 == 0:
+                payload = self.tester.build_penjualan_payload(self.tester.customers[i % len(self.tester.customers)], i + 1)
+                payload.update({
+                    "jenisBarang": self.jenis_item,
+                    "jumlah": str(sale_size),
+                    "totalHarga": str(sale_size * Decimal(payload["hargaPerKg"])),
+                    "catatan": f"Stress penjualan {i + 1}",
+                })
+                requests_.append({"kind": "penjualan", "path": "/api/penjualan", "payload": payload})
+            else:
+                payload = self.tester.build_produksi_payload(i + 1)
+                payload["catatan"] = f"Stress produksi {i + 1}"
+                requests_.append({"kind": "produksi", "path": "/api/produksi", "payload": payload})
+        return requests_
+
+    async def _fire_all(self, pool: AsyncHttpPool, requests_: List[Dict]) -> List[Optional[int]]:
+        gate = asyncio.Event()
+
+        async def fire(item: Dict) -> Optional[int]:
+            await gate.wait()
+            started = time.perf_counter()
+            try:
+                response = await pool.request("POST", item["path"], item["payload"])
+                status: Optional[int] = response.status
+            except (ConnectionError, OSError, asyncio.TimeoutError):
+                status = None
+            self.tester.latency.record("POST", item["path"], time.perf_counter() - started)
+            return status
+
+        tasks = [asyncio.ensure_future(fire(item)) for item in requests_]
+        # Lepas semua request sekaligus agar benar-benar bertabrakan
+        await asyncio.sleep(0)
+        gate.set()
+        return await asyncio.gather(*tasks)
+
+    def check_ledger(self, stok_rows: List[Dict], log_rows: List[Dict], start_log_id: int,
+                     start_stock: Dict[str, Decimal]) -> List[Violation]:
+        """Replay log stok baru dan bandingkan dengan stok akhir"""
+        violations: List[Violation] = []
+        items_by_id = {row["id"]: row["jenisItem"] for row in stok_rows}
+        final_stock = {row["jenisItem"]: _decimal(row["jumlah"]) for row in stok_rows}
+
+        new_logs = sorted((row for row in log_rows if row["id"] > start_log_id), key=lambda row: row["id"])
+        ledger_by_item: Dict[str, List[Dict]] = {}
+        for row in new_logs:
+            ledger_by_item.setdefault(items_by_id.get(row["stokId"], f"stok#{row['stokId']}"), []).append(row)
+
+        for jenis_item in sorted(set(ledger_by_item) | set(final_stock)):
+            rows = ledger_by_item.get(jenis_item, [])
+            start = start_stock.get(jenis_item, Decimal(0))
+            final = final_stock.get(jenis_item, Decimal(0))
+            ledger_delta = sum((_decimal(row["jumlah"]) for row in rows), Decimal(0))
+
+            if start + ledger_delta != final:
+                violations.append(Violation(
+                    "lost_update", jenis_item,
+                    f"stok awal {start} + delta log {ledger_delta} = {start + ledger_delta}, stok akhir {final}",
+                    [row["id"] for row in rows],
+                ))
+
+            # Setiap baris harus dimulai dari jumlahSesudah baris sebelumnya
+            expected_before = start
+            seen_before: Dict[Decimal, int] = {}
+            for row in rows:
+                before = _decimal(row["jumlahSebelum"])
+                after = _decimal(row["jumlahSesudah"])
+                if before != expected_before:
+                    if before in seen_before:
+                        # Dua penulis membaca stok yang sama: salah satu update hilang
+                        violations.append(Violation(
+                            "stale_read", jenis_item,
+                            f"log #{seen_before[before]} dan #{row['id']} sama-sama membaca stok {before}",
+                            [seen_before[before], row["id"]],
+                        ))
+                    else:
+                        violations.append(Violation(
+                            "broken_chain", jenis_item,
+                            f"log #{row['id']} mulai dari {before}, seharusnya {expected_before}",
+                            [row["id"]],
+                        ))
+                seen_before[before] = row["id"]
+                if after < 0:
+                    violations.append(Violation(
+                        "negative_stock", jenis_item, f"log #{row['id']} menghasilkan stok {after}", [row["id"]],
+                    ))
+                if not row.get("referensiId"):
+                    violations.append(Violation(
+                        "orphan_log", jenis_item, f"log #{row['id']} tanpa referensiId", [row["id"]],
+                    ))
+                expected_before = after
+
+            if final < 0:
+                violations.append(Violation("negative_stock", jenis_item, f"stok akhir {final}"))
+
+        return violations
+
+    async def run_async(self, count: int) -> StressResult:
+        pool = AsyncHttpPool(self.tester.base_url, size=self.concurrency)
+        try:
+            stok_rows, _ = await self._snapshot(pool)
+            stock = {row["jenisItem"]: _decimal(row["jumlah"]) for row in stok_rows}
+            await self._prime(pool, stock, count // 2)
+
+            stok_rows, log_rows = await self._snapshot(pool)
+            start_stock = {row["jenisItem"]: _decimal(row["jumlah"]) for row in stok_rows}
+            start_log_id = max((row["id"] for row in log_rows), default=0)
+
+            requests_ = self._build_requests(count, start_stock.get(self.jenis_item, Decimal(0)))
+            started = time.perf_counter()
+            statuses = await self._fire_all(pool, requests_)
+            elapsed = time.perf_counter() - started
+
+            stok_rows, log_rows = await self._snapshot(pool)
+        finally:
+            await pool.close()
+
+        accepted: Dict[str, int] = {}
+        rejected: Dict[str, int] = {}
+        failed = 0
+        for item, status in zip(requests_, statuses):
+            if status is not None and 200 <= status < 300:
+                accepted[item["kind"]] = accepted.get(item["kind"], 0) + 1
+            elif status is not None and 400 <= status < 500:
+                rejected[item["kind"]] = rejected.get(item["kind"], 0) + 1
+            else:
+                failed += 1
+
+        return StressResult(
+            jenis_item=self.jenis_item,
+            requests=count,
+            accepted=accepted,
+            rejected=rejected,
+            failed=failed,
+            elapsed=elapsed,
+            start_stock=start_stock,
+            final_stock={row["jenisItem"]: _decimal(row["jumlah"]) for row in stok_rows},
+            violations=self.check_ledger(stok_rows, log_rows, start_log_id, start_stock),
+        )
+
+    def run(self, count: int) -> StressResult:
+        return asyncio.run(self.run_async(count))
+
+    def report(self, result: StressResult):
+        log = self.tester.log
+        log(f"Stress {result.requests} request pada '{result.jenis_item}' selesai dalam {result.elapsed:.2f}s "
+            f"({result.throughput:.1f} transaksi diterima/s)")
+        log(f"  Diterima: {result.accepted}, ditolak: {result.rejected}, gagal: {result.failed}")
+        for jenis_item in sorted(result.final_stock):
+            log(f"  - {jenis_item}: {result.start_stock.get(jenis_item, 0)} -> {result.final_stock[jenis_item]}")
+        if result.consistent:
+            log("SUCCESS: Stok konsisten dengan log stok", "SUCCESS")
+            return
+        log(f"ALERT: {len(result.violations)} pelanggaran konsistensi stok ditemukan", "ERROR")
+        for violation in result.violations:
+            log(f"  [{violation.kind}] {violation.jenis_item}: {violation.detail}", "ERROR")
+
+
+def compare_throughput(result: StressResult, baseline_path: str, log) -> Optional[float]:
+    """Bandingkan throughput stress dengan ringkasan JSON run sebelumnya (--json-out)"""
+    with open(baseline_path, encoding="utf-8") as handle:
+        baseline = json.load(handle).get("stockStress")
+    if not baseline or not baseline.get("throughput"):
+        log(f"Baseline {baseline_path} tidak berisi hasil stockStress", "WARNING")
+        return None
+    gain = (result.throughput - baseline["throughput"]) / baseline["throughput"] * 100
+    log(f"Throughput stress: {baseline['throughput']:.1f} -> {result.throughput:.1f} transaksi/s ({gain:+.1f}%)")
+    log(f"Pelanggaran: {len(baseline.get('violations', []))} -> {len(result.violations)}")
+    return gain
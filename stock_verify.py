@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+Stock Verify untuk PadiDoc
+Menghitung ulang stok dari ledger log_stok (dibaca streaming lewat /api/export/log-stok)
+per batch, lalu menandai drift antara stok.jumlah dan jumlah ledger, putusnya rantai
+jumlahSebelum/jumlahSesudah, serta selisih hasil /api/laporan/stok (snapshot + delta).
+
+Agregasi batch memakai numpy jika terpasang (bincount per stokId); tanpa numpy dipakai
+jalur Python murni dengan hasil yang sama. Nilai dihitung dalam sen agar penjumlahan eksak.
+"""
+
+import argparse
+import csv
+import io
+import json
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import requests
+
+try:
+    import numpy as np
+except ImportError:  # numpy opsional
+    np = None
+
+MISSING = -(2 ** 62)  # penanda jumlahSebelum/jumlahSesudah kosong (log manual)
+
+LedgerRow = Tuple[int, int, int, int, int]  # id, stokId, jumlah, sebelum, sesudah (sen)
+
+
+def to_cents(value: str) -> int:
+    return int(round(float(value) * 100)) if value not in ("", None) else MISSING
+
+
+def format_kg(cents: int) -> str:
+    return f"{cents / 100:,.2f}"
+
+
+class LedgerAccumulator:
+    """Jumlah ledger per stokId dan cek rantai sebelum/sesudah, diumpan per batch"""
+
+    def __init__(self, vectorized: bool = True, max_examples: int = 10):
+        self.vectorized = vectorized and np is not None
+        self.totals: Dict[int, int] = defaultdict(int)
+        self.counts: Dict[int, int] = defaultdict(int)
+        self.last_after: Dict[int, int] = {}
+        self.rows = 0
+        self.chain_breaks = 0
+        self.bad_rows = 0
+        self.max_examples = max_examples
+        self.examples: List[str] = []
+
+    def _example(self, message: str):
+        if len(self.examples) < self.max_examples:
+            self.examples.append(message)
+
+    def add_batch(self, batch: List[LedgerRow]):
+        if not batch:
+            return
+        self.rows += len(batch)
+        if self.vectorized:
+            self._add_vectorized(batch)
+        else:
+            self._add_python(batch)
+
+    def _add_python(self, batch: List[LedgerRow]):
+        for row_id, stok_id, jumlah, before, after in batch:
+            self.totals[stok_id] += jumlah
+            self.counts[stok_id] += 1
+            if before == MISSING or after == MISSING:
+                continue
+            if after - before != jumlah:
+                self.bad_rows += 1
+                self._example(f"log_stok #{row_id}: sesudah - sebelum != jumlah")
+            previous = self.last_after.get(stok_id)
+            if previous is not None and previous != before:
+                self.chain_breaks += 1
+                self._example(f"log_stok #{row_id} (stok {stok_id}): sebelum {format_kg(before)} "
+                              f"!= sesudah baris sebelumnya {format_kg(previous)}")
+            self.last_after[stok_id] = after
+
+    def _add_vectorized(self, batch: List[LedgerRow]):
+        data = np.array(batch, dtype=np.int64)
+        row_ids, stok_ids, jumlah, before, after = data.T
+
+        unique, inverse = np.unique(stok_ids, return_inverse=True)
+        sums = np.bincount(inverse, weights=jumlah.astype(np.float64))
+        counts = np.bincount(inverse)
+        for stok_id, total, count in zip(unique.tolist(), sums.tolist(), counts.tolist()):
+            self.totals[stok_id] += int(round(total))
+            self.counts[stok_id] += count
+
+        # Baris log manual tanpa sebelum/sesudah tidak ikut cek rantai
+        known = (before != MISSING) & (after != MISSING)
+        bad = known & (after - before != jumlah)
+        self.bad_rows += int(bad.sum())
+        for row_id in row_ids[bad][:self.max_examples].tolist():
+            self._example(f"log_stok #{row_id}: sesudah - sebelum != jumlah")
+
+        # Urutkan per (stokId, id); sebelum baris ke-i harus sama dengan sesudah baris ke-(i-1) di stok yang sama
+        order = np.lexsort((row_ids[known], stok_ids[known]))
+        ids_sorted = row_ids[known][order]
+        stok_sorted = stok_ids[known][order]
+        before_sorted = before[known][order]
+        after_sorted = after[known][order]
+        if len(ids_sorted) == 0:
+            return
+
+        expected = np.empty_like(before_sorted)
+        expected[1:] = after_sorted[:-1]
+        first = np.ones(len(stok_sorted), dtype=bool)
+        first[1:] = stok_sorted[1:] != stok_sorted[:-1]
+        # Baris pertama tiap stok dibandingkan dengan sesudah terakhir dari batch sebelumnya
+        carried = np.array([self.last_after.get(stok_id, MISSING) for stok_id in stok_sorted[first].tolist()],
+                           dtype=np.int64)
+        expected[first] = carried
+        checked = expected != MISSING
+        breaks = checked & (before_sorted != expected)
+        self.chain_breaks += int(breaks.sum())
+        for row_id, stok_id, value, previous in zip(ids_sorted[breaks][:self.max_examples].tolist(),
+                                                    stok_sorted[breaks][:self.max_examples].tolist(),
+                                                    before_sorted[breaks][:self.max_examples].tolist(),
+                                                    expected[breaks][:self.max_examples].tolist()):
+            self._example(f"log_stok #{row_id} (stok {stok_id}): sebelum {format_kg(value)} "
+                          f"!= sesudah baris sebelumnya {format_kg(previous)}")
+
+        last = np.ones(len(stok_sorted), dtype=bool)
+        last[:-1] = stok_sorted[:-1] != stok_sorted[1:]
+        for stok_id, value in zip(stok_sorted[last].tolist(), after_sorted[last].tolist()):
+            self.last_after[stok_id] = value
+
+
+class StockVerifier:
+    """Bandingkan stok.jumlah dan /api/laporan/stok dengan jumlah ulang dari ledger"""
+
+    def __init__(self, base_url: str = "http://localhost:5000", batch_size: int = 50_000,
+                 tolerance_kg: float = 0.01, vectorized: bool = True, session: requests.Session = None):
+        self.base_url = base_url
+        self.batch_size = batch_size
+        self.tolerance = int(round(tolerance_kg * 100))
+        self.vectorized = vectorized
+        self.session = session or requests.Session()
+
+    def log(self, message: str, level: str = "INFO"):
+        """Log message dengan timestamp"""
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        print(f"[{timestamp}] {level}: {message}")
+
+    def read_ledger(self, at: Optional[str] = None) -> LedgerAccumulator:
+        """Baca log_stok (opsional sampai waktu `at`) dan akumulasikan per batch"""
+        accumulator = LedgerAccumulator(self.vectorized)
+        params = {"format": "csv"}
+        if at:
+            params["to"] = at
+        started = time.perf_counter()
+        with self.session.get(f"{self.base_url}/api/export/log-stok", params=params, stream=True) as response:
+            response.raise_for_status()
+            response.raw.decode_content = True
+            reader = csv.reader(io.TextIOWrapper(response.raw, encoding="utf-8", newline=""))
+            header = next(reader, None) or []
+            column = {name: index for index, name in enumerate(header)}
+            batch: List[LedgerRow] = []
+            for record in reader:
+                batch.append((
+                    int(record[column["id"]]),
+                    int(record[column["stokId"]] or 0),
+                    to_cents(record[column["jumlah"]]),
+                    to_cents(record[column["jumlahSebelum"]]),
+                    to_cents(record[column["jumlahSesudah"]]),
+                ))
+                if len(batch) >= self.batch_size:
+                    accumulator.add_batch(batch)
+                    batch = []
+            accumulator.add_batch(batch)
+        elapsed = time.perf_counter() - started
+        self.log(f"Ledger: {accumulator.rows} baris dalam {elapsed:.1f}s "
+                 f"({accumulator.rows / elapsed if elapsed else 0:.0f} baris/s, "
+                 f"{'numpy' if accumulator.vectorized else 'python'})")
+        return accumulator
+
+    def verify(self, at: Optional[str] = None) -> Dict:
+        ledger = self.read_ledger(at)
+        stok_rows = self.session.get(f"{self.base_url}/api/stok").json()
+        jenis_by_stok = {row["id"]: row["jenisItem"] for row in stok_rows}
+
+        drift = []
+        if not at:
+            # stok.jumlah hanya bermakna untuk posisi saat ini
+            for row in stok_rows:
+                actual = to_cents(str(row["jumlah"]))
+                expected = ledger.totals.get(row["id"], 0)
+                if abs(actual - expected) > self.tolerance:
+                    drift.append({"stokId": row["id"], "jenisItem": row["jenisItem"],
+                                  "stok": actual / 100, "ledger": expected / 100,
+                                  "selisih": (actual - expected) / 100})
+        orphan = {stok_id: total for stok_id, total in ledger.totals.items() if stok_id not in jenis_by_stok}
+
+        # Posisi per jenisItem dari ledger vs query point-in-time (snapshot + delta)
+        ledger_by_jenis: Dict[str, int] = defaultdict(int)
+        for stok_id, total in ledger.totals.items():
+            if stok_id in jenis_by_stok:
+                ledger_by_jenis[jenis_by_stok[stok_id]] += total
+        params = {"at": at} if at else {}
+        point_in_time = self.session.get(f"{self.base_url}/api/laporan/stok", params=params)
+        snapshot_drift = []
+        if point_in_time.ok:
+            for item in point_in_time.json():
+                reported = to_cents(str(item["jumlah"]))
+                expected = ledger_by_jenis.get(item["jenisItem"], 0)
+                if abs(reported - expected) > self.tolerance:
+                    snapshot_drift.append({"jenisItem": item["jenisItem"], "pointInTime": reported / 100,
+                                           "ledger": expected / 100, "selisih": (reported - expected) / 100,
+                                           "snapshotAt": item.get("snapshotAt"), "deltaRows": item.get("deltaRows")})
+
+        return {
+            "at": at,
+            "ledgerRows": ledger.rows,
+            "ledgerByJenis": {jenis: total / 100 for jenis, total in sorted(ledger_by_jenis.items())},
+            "stokDrift": drift,
+            "pointInTimeDrift": snapshot_drift,
+            "orphanStokIds": sorted(orphan),
+            "chainBreaks": ledger.chain_breaks,
+            "inconsistentRows": ledger.bad_rows,
+            "examples": ledger.examples,
+        }
+
+    def report(self, result: Dict) -> bool:
+        """Cetak hasil; True jika tidak ada drift"""
+        label = f"per {result['at']}" if result["at"] else "saat ini"
+        for jenis, total in result["ledgerByJenis"].items():
+            self.log(f"  {jenis:<10} ledger {total:>16,.2f} kg")
+        for item in result["stokDrift"]:
+            self.log(f"Drift stok #{item['stokId']} {item['jenisItem']}: stok {item['stok']:,.2f} vs ledger "
+                     f"{item['ledger']:,.2f} (selisih {item['selisih']:+,.2f})", "ERROR")
+        for item in result["pointInTimeDrift"]:
+            self.log(f"Drift point-in-time {item['jenisItem']} {label}: {item['pointInTime']:,.2f} vs ledger "
+                     f"{item['ledger']:,.2f} (snapshot {item['snapshotAt']}, {item['deltaRows']} baris delta)", "ERROR")
+        if result["orphanStokIds"]:
+            self.log(f"Log stok merujuk stokId yang tidak ada: {result['orphanStokIds'][:20]}", "WARNING")
+        if result["chainBreaks"] or result["inconsistentRows"]:
+            self.log(f"Rantai sebelum/sesudah putus {result['chainBreaks']}x, "
+                     f"{result['inconsistentRows']} baris sesudah-sebelum != jumlah", "WARNING")
+            for example in result["examples"]:
+                self.log(f"  {example}", "WARNING")
+        ok = not result["stokDrift"] and not result["pointInTimeDrift"]
+        self.log(f"Verifikasi stok {label}: {'OK' if ok else 'DRIFT'} ({result['ledgerRows']} baris ledger)")
+        return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Verifikasi stok PadiDoc terhadap ledger log_stok")
+    parser.add_argument("--base-url", default="http://localhost:5000")
+    parser.add_argument("--at", help="Verifikasi posisi pada waktu ini (ISO), default saat ini")
+    parser.add_argument("--batch-size", type=int, default=50_000, help="Baris ledger per batch agregasi")
+    parser.add_argument("--tolerance", type=float, default=0.01, help="Toleransi selisih dalam kg")
+    parser.add_argument("--no-numpy", action="store_true", help="Paksa jalur Python murni")
+    parser.add_argument("--json-out", help="Tulis hasil JSON ke file ini")
+    args = parser.parse_args()
+
+    verifier = StockVerifier(args.base_url, args.batch_size, args.tolerance, not args.no_numpy)
+    try:
+        result = verifier.verify(args.at)
+    except requests.exceptions.ConnectionError:
+        print(f"Error: Cannot connect to server. Make sure the application is running on {args.base_url}")
+        sys.exit(1)
+
+    ok = verifier.report(result)
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as handle:
+            json.dump(result, handle, indent=2)
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
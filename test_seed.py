@@ -5,11 +5,24 @@ Simulasi masal untuk menguji sistem stok otomatis dan validasi
 """
 
 import requests
+import argparse
+import asyncio
 import json
 from datetime import datetime, timedelta
+import itertools
 import random
 import time
-from typing import Dict, List, Any
+from dataclasses import asdict
+from typing import Dict, Iterator, List, Any
+
+from latency_histogram import LatencyRecorder
+from list_benchmark import ListEndpointBenchmark, compare_list_baseline
+from live_subscriber import LiveLatencyProbe, LiveLatencyResult
+from load_engine import LoadEngine, Operation, parse_mix
+from metrics_scraper import MetricsScraper, internal_headers
+from stock_stress import StockRaceDetector, StressResult, compare_throughput
+from traffic_replay import TraceReplayer, compare_baseline, parse_speed, read_trace
+from workload_generator import DEFAULT_START_DATE, WorkloadConfig, WorkloadGenerator, WorkloadReplayer, read_workload
 
 class PadiDocTester:
     def __init__(self, base_url: str = "http://localhost:5000"):
@@ -20,6 +33,11 @@ class PadiDocTester:
         self.pembelian_ids = []
         self.penjualan_ids = []
         self.produksi_ids = []
+        self.latency = LatencyRecorder()
+        # Request gagal (non-2xx atau error transport) dicatat terpisah seperti LoadEngine
+        self.error_latency = LatencyRecorder()
+        self.metrics_interval = 1.0
+        self.server_metrics: Dict = {}
         
     def log(self, message: str, level: str = "INFO"):
         """Log message dengan timestamp"""
@@ -29,6 +47,7 @@ class PadiDocTester:
     def make_request(self, method: str, endpoint: str, data: Dict = None) -> Dict:
         """Membuat HTTP request ke API"""
         url = f"{self.base_url}{endpoint}"
+        started = time.perf_counter()
         
         try:
             if method.upper() == "GET":
@@ -42,15 +61,44 @@ class PadiDocTester:
             else:
                 raise ValueError(f"Method {method} not supported")
                 
+            elapsed = time.perf_counter() - started
             response.raise_for_status()
+            self.latency.record(method, endpoint, elapsed)
             return response.json() if response.content else {}
             
         except requests.exceptions.RequestException as e:
+            self.error_latency.record(method, endpoint, time.perf_counter() - started)
             self.log(f"Request error: {e}", "ERROR")
             if hasattr(e, 'response') and e.response is not None:
                 self.log(f"Response: {e.response.text}", "ERROR")
             return {}
     
+    def iter_pages(self, endpoint: str, limit: int = 500, filters: Dict = None) -> Iterator[Dict]:
+        """Iterasi lazy atas endpoint list memakai cursor keyset dari header X-Next-Cursor"""
+        params = {"limit": limit}
+        params.update({key: value for key, value in (filters or {}).items() if value is not None})
+        
+        while True:
+            started = time.perf_counter()
+            response = self.session.get(f"{self.base_url}{endpoint}", params=params)
+            recorder = self.latency if response.ok else self.error_latency
+            recorder.record("GET", endpoint, time.perf_counter() - started)
+            response.raise_for_status()
+            yield from response.json()
+            
+            next_cursor = response.headers.get("X-Next-Cursor")
+            if not next_cursor:
+                return
+            params["after"] = next_cursor
+    
+    def walk_endpoint(self, endpoint: str, limit: int = 500, filters: Dict = None) -> int:
+        """Baca seluruh halaman sebuah endpoint list dan laporkan jumlah baris per detik"""
+        started = time.perf_counter()
+        count = sum(1 for _ in self.iter_pages(endpoint, limit, filters))
+        elapsed = time.perf_counter() - started
+        self.log(f"{endpoint}: {count} rows in {elapsed:.2f}s ({count / elapsed if elapsed else 0:.0f} rows/s)")
+        return count
+    
     def create_sample_suppliers(self) -> List[Dict]:
         """Membuat sample supplier"""
         self.log("Creating sample suppliers...")
@@ -114,6 +162,149 @@ class PadiDocTester:
         
         return self.customers
     
+    def seed_sample_data(self) -> Dict[str, int]:
+        """Isi data contoh (dulu dibuat oleh GET list saat tabel kosong); aman dijalankan berulang"""
+        self.log("Seeding sample data...")
+        created = {"suppliers": 0, "customers": 0, "pembelian": 0, "penjualan": 0}
+        
+        def ensure_by_name(endpoint: str, rows: List[Dict], key: str) -> List[Dict]:
+            existing = {item["name"]: item for item in self.make_request("GET", f"{endpoint}?all=1") or []}
+            for row in rows:
+                if row["name"] not in existing:
+                    result = self.make_request("POST", endpoint, row)
+                    if result:
+                        existing[row["name"]] = result
+                        created[key] += 1
+            return [existing[row["name"]] for row in rows if row["name"] in existing]
+        
+        def ensure_documents(endpoint: str, rows: List[Dict], key: str):
+            # Dokumen contoh dikenali dari tanggal, jumlah dan catatan di rentang tanggalnya saja
+            dates = sorted(row["tanggal"] for row in rows)
+            end = (datetime.fromisoformat(dates[-1]) + timedelta(days=1)).date().isoformat()
+            existing = {
+                (item["tanggal"][:10], str(float(item["jumlah"])), item.get("catatan"))
+                for item in self.make_request("GET", f"{endpoint}?from={dates[0]}&to={end}&all=1") or []
+            }
+            for row in rows:
+                if (row["tanggal"], str(float(row["jumlah"])), row["catatan"]) in existing:
+                    continue
+                if self.make_request("POST", endpoint, row):
+                    created[key] += 1
+                else:
+                    self.log(f"Sample {key} {row['tanggal']} gagal dibuat (cek stok)", "WARNING")
+        
+        suppliers = ensure_by_name("/api/suppliers", [
+            {"name": "Toko Tani Sejahtera", "address": "Jl. Sawah No. 123, Desa Padi", "phone": "081234567890"},
+            {"name": "CV. Gabah Makmur", "address": "Jl. Pertanian No. 456, Kec. Subur", "phone": "081234567891"},
+        ], "suppliers")
+        customers = ensure_by_name("/api/customers", [
+            {"name": "Warung Pak Budi", "address": "Jl. Pasar No. 789, Kelurahan Ramai", "phone": "081234567892"},
+            {"name": "Toko Beras Sari", "address": "Jl. Beras No. 101, Kota Sejahtera", "phone": "081234567893"},
+        ], "customers")
+        
+        if suppliers:
+            ensure_documents("/api/pembelian", [
+                {"supplierId": suppliers[0]["id"], "tanggal": "2024-01-15", "jenisGabah": "Gabah Premium",
+                 "jenisBarang": "gabah", "jumlah": "1000", "hargaPerKg": "8000", "totalHarga": "8000000",
+                 "kadarAir": "12", "kualitas": "A", "status": "completed", "metodePembayaran": "cash",
+                 "catatan": "Kualitas bagus, pengiriman tepat waktu"},
+                {"supplierId": suppliers[-1]["id"], "tanggal": "2024-01-14", "jenisGabah": "Gabah Medium",
+                 "jenisBarang": "gabah", "jumlah": "500", "hargaPerKg": "7500", "totalHarga": "3750000",
+                 "kadarAir": "14", "kualitas": "B", "status": "completed", "metodePembayaran": "transfer",
+                 "catatan": "Standar"},
+            ], "pembelian")
+        if customers:
+            ensure_documents("/api/penjualan", [
+                {"customerId": customers[0]["id"], "tanggal": "2024-01-16", "jenisBeras": "Beras Premium",
+                 "jenisBarang": "beras", "jumlah": "50", "hargaPerKg": "15000", "totalHarga": "750000",
+                 "status": "completed", "metodePembayaran": "cash", "catatan": "Pelanggan reguler"},
+                {"customerId": customers[-1]["id"], "tanggal": "2024-01-15", "jenisBeras": "Beras Medium",
+                 "jenisBarang": "beras", "jumlah": "100", "hargaPerKg": "12000", "totalHarga": "1200000",
+                 "status": "completed", "metodePembayaran": "transfer", "catatan": "Pesanan besar"},
+            ], "penjualan")
+        
+        self.log(f"Sample data: {created} baru dibuat")
+        return created
+    
+    def build_pembelian_payload(self, supplier: Dict, batch: int) -> Dict:
+        """Membuat payload pembelian gabah acak"""
+        jumlah = random.randint(500, 2000)  # 500-2000 kg
+        harga_per_kg = random.randint(7000, 12000)  # 7000-12000 per kg
+        total_harga = jumlah * harga_per_kg
+        
+        # Tanggal dalam rentang 30 hari terakhir
+        days_ago = random.randint(0, 30)
+        tanggal = (datetime.now() - timedelta(days=days_ago)).isoformat()
+        
+        return {
+            "supplierId": supplier["id"],
+            "tanggal": tanggal,
+            "jenisGabah": random.choice(["Gabah Kering Premium", "Gabah Basah", "Gabah Super", "Gabah Lokal"]),
+            "jenisBarang": "gabah",
+            "jumlah": str(jumlah),
+            "hargaPerKg": str(harga_per_kg),
+            "totalHarga": str(total_harga),
+            "kadarAir": str(random.randint(12, 16)),
+            "kualitas": random.choice(["A", "B", "C"]),
+            "status": "completed",
+            "metodePembayaran": random.choice(["cash", "transfer"]),
+            "catatan": f"Pembelian batch {batch} - Testing"
+        }
+    
+    def build_produksi_payload(self, batch: int) -> Dict:
+        """Membuat payload produksi gabah menjadi beras dan produk sampingan"""
+        # Input gabah untuk produksi
+        gabah_input = random.randint(800, 1200)  # 800-1200 kg
+        
+        # Rendemen rata-rata 60-70%
+        rendemen = random.uniform(60, 70)
+        beras_output = int(gabah_input * rendemen / 100)
+        
+        # Produk sampingan
+        katul_output = int(gabah_input * 0.10)  # 10% katul
+        menir_output = int(gabah_input * 0.05)  # 5% menir
+        sekam_output = int(gabah_input * 0.15)  # 15% sekam
+        
+        # Tanggal produksi
+        days_ago = random.randint(0, 15)
+        tanggal = (datetime.now() - timedelta(days=days_ago)).isoformat()
+        
+        return {
+            "tanggal": tanggal,
+            "jenisBerasProduced": random.choice(["Beras Premium", "Beras Medium", "Beras Lokal"]),
+            "jumlahGabahInput": str(gabah_input),
+            "jumlahBerasOutput": str(beras_output),
+            "jumlahKatul": str(katul_output),
+            "jumlahMenir": str(menir_output),
+            "jumlahSekam": str(sekam_output),
+            "rendemen": str(round(rendemen, 2)),
+            "status": "completed",
+            "catatan": f"Produksi batch {batch} - Testing"
+        }
+    
+    def build_penjualan_payload(self, customer: Dict, batch: int) -> Dict:
+        """Membuat payload penjualan beras acak"""
+        jumlah = random.randint(200, 800)  # 200-800 kg
+        harga_per_kg = random.randint(12000, 18000)  # 12000-18000 per kg
+        total_harga = jumlah * harga_per_kg
+        
+        # Tanggal penjualan
+        days_ago = random.randint(0, 10)
+        tanggal = (datetime.now() - timedelta(days=days_ago)).isoformat()
+        
+        return {
+            "customerId": customer["id"],
+            "tanggal": tanggal,
+            "jenisBeras": random.choice(["Beras Premium", "Beras Medium", "Beras Lokal"]),
+            "jenisBarang": "beras",
+            "jumlah": str(jumlah),
+            "hargaPerKg": str(harga_per_kg),
+            "totalHarga": str(total_harga),
+            "status": "completed",
+            "metodePembayaran": random.choice(["cash", "transfer"]),
+            "catatan": f"Penjualan batch {batch} - Testing"
+        }
+    
     def create_mass_pembelian(self, count: int = 10) -> List[Dict]:
         """Membuat pembelian masal untuk menambah stok"""
         self.log(f"Creating {count} mass purchases...")
@@ -123,33 +314,11 @@ class PadiDocTester:
             self.create_sample_suppliers()
         
         pembelian_list = []
-        jenis_gabah_options = ["Gabah Kering Premium", "Gabah Basah", "Gabah Super", "Gabah Lokal"]
         
         for i in range(count):
-            # Variasi data pembelian
             supplier = random.choice(self.suppliers)
-            jumlah = random.randint(500, 2000)  # 500-2000 kg
-            harga_per_kg = random.randint(7000, 12000)  # 7000-12000 per kg
-            total_harga = jumlah * harga_per_kg
-            
-            # Tanggal dalam rentang 30 hari terakhir
-            days_ago = random.randint(0, 30)
-            tanggal = (datetime.now() - timedelta(days=days_ago)).isoformat()
-            
-            pembelian_data = {
-                "supplierId": supplier["id"],
-                "tanggal": tanggal,
-                "jenisGabah": random.choice(jenis_gabah_options),
-                "jenisBarang": "gabah",
-                "jumlah": str(jumlah),
-                "hargaPerKg": str(harga_per_kg),
-                "totalHarga": str(total_harga),
-                "kadarAir": str(random.randint(12, 16)),
-                "kualitas": random.choice(["A", "B", "C"]),
-                "status": "completed",
-                "metodePembayaran": random.choice(["cash", "transfer"]),
-                "catatan": f"Pembelian batch {i+1} - Testing"
-            }
+            pembelian_data = self.build_pembelian_payload(supplier, i + 1)
+            jumlah = pembelian_data["jumlah"]
             
             result = self.make_request("POST", "/api/pembelian", pembelian_data)
             if result:
@@ -170,34 +339,9 @@ class PadiDocTester:
         produksi_list = []
         
         for i in range(count):
-            # Input gabah untuk produksi
-            gabah_input = random.randint(800, 1200)  # 800-1200 kg
-            
-            # Rendemen rata-rata 60-70%
-            rendemen = random.uniform(60, 70)
-            beras_output = int(gabah_input * rendemen / 100)
-            
-            # Produk sampingan
-            katul_output = int(gabah_input * 0.10)  # 10% katul
-            menir_output = int(gabah_input * 0.05)  # 5% menir
-            sekam_output = int(gabah_input * 0.15)  # 15% sekam
-            
-            # Tanggal produksi
-            days_ago = random.randint(0, 15)
-            tanggal = (datetime.now() - timedelta(days=days_ago)).isoformat()
-            
-            produksi_data = {
-                "tanggal": tanggal,
-                "jenisBerasProduced": random.choice(["Beras Premium", "Beras Medium", "Beras Lokal"]),
-                "jumlahGabahInput": str(gabah_input),
-                "jumlahBerasOutput": str(beras_output),
-                "jumlahKatul": str(katul_output),
-                "jumlahMenir": str(menir_output),
-                "jumlahSekam": str(sekam_output),
-                "rendemen": str(round(rendemen, 2)),
-                "status": "completed",
-                "catatan": f"Produksi batch {i+1} - Testing"
-            }
+            produksi_data = self.build_produksi_payload(i + 1)
+            gabah_input = produksi_data["jumlahGabahInput"]
+            beras_output = produksi_data["jumlahBerasOutput"]
             
             result = self.make_request("POST", "/api/produksi", produksi_data)
             if result:
@@ -220,30 +364,11 @@ class PadiDocTester:
             self.create_sample_customers()
         
         penjualan_list = []
-        jenis_beras_options = ["Beras Premium", "Beras Medium", "Beras Lokal"]
         
         for i in range(count):
             customer = random.choice(self.customers)
-            jumlah = random.randint(200, 800)  # 200-800 kg
-            harga_per_kg = random.randint(12000, 18000)  # 12000-18000 per kg
-            total_harga = jumlah * harga_per_kg
-            
-            # Tanggal penjualan
-            days_ago = random.randint(0, 10)
-            tanggal = (datetime.now() - timedelta(days=days_ago)).isoformat()
-            
-            penjualan_data = {
-                "customerId": customer["id"],
-                "tanggal": tanggal,
-                "jenisBeras": random.choice(jenis_beras_options),
-                "jenisBarang": "beras",
-                "jumlah": str(jumlah),
-                "hargaPerKg": str(harga_per_kg),
-                "totalHarga": str(total_harga),
-                "status": "completed",
-                "metodePembayaran": random.choice(["cash", "transfer"]),
-                "catatan": f"Penjualan batch {i+1} - Testing"
-            }
+            penjualan_data = self.build_penjualan_payload(customer, i + 1)
+            jumlah = penjualan_data["jumlah"]
             
             result = self.make_request("POST", "/api/penjualan", penjualan_data)
             if result:
@@ -288,7 +413,7 @@ class PadiDocTester:
         """Cek level stok setelah semua transaksi"""
         self.log("Checking stock levels...")
         
-        stock_data = self.make_request("GET", "/api/stok")
+        stock_data = self.make_request("GET", "/api/stok?all=1")
         if stock_data:
             self.log("Current stock levels:")
             for item in stock_data:
@@ -311,6 +436,282 @@ class PadiDocTester:
         else:
             self.log("Failed to retrieve dashboard metrics", "ERROR")
     
+    def build_load_operations(self, mix: Dict[str, float]) -> List[Operation]:
+        """Membuat daftar operasi load engine dari campuran transaksi"""
+        if not self.suppliers:
+            self.create_sample_suppliers()
+        if not self.customers:
+            self.create_sample_customers()
+        
+        counter = itertools.count(1)
+        catalog = {
+            "pembelian": ("POST", "/api/pembelian",
+                          lambda: self.build_pembelian_payload(random.choice(self.suppliers), next(counter))),
+            "produksi": ("POST", "/api/produksi", lambda: self.build_produksi_payload(next(counter))),
+            "penjualan": ("POST", "/api/penjualan",
+                          lambda: self.build_penjualan_payload(random.choice(self.customers), next(counter))),
+            "stok": ("GET", "/api/stok", lambda: None),
+            "dashboard": ("GET", "/api/dashboard/metrics", lambda: None),
+        }
+        
+        operations = []
+        for name, weight in mix.items():
+            if name not in catalog:
+                raise ValueError(f"Jenis transaksi tidak dikenal: {name}")
+            method, endpoint, payload = catalog[name]
+            operations.append(Operation(f"{method} {endpoint}", method, endpoint, payload, weight))
+        return operations
+    
+    def run_load(self, concurrency: int, rate: float, duration: float,
+                 mix: str = "pembelian=5,produksi=1,penjualan=4") -> LoadEngine:
+        """Jalankan beban open-loop asyncio dan laporkan throughput per endpoint"""
+        self.log(f"=== Starting load: {rate:.0f} req/s, {concurrency} connections, {duration:.0f}s ===")
+        
+        operations = self.build_load_operations(parse_mix(mix))
+        engine = LoadEngine(self.base_url, operations, rate=rate, duration=duration,
+                            concurrency=concurrency, log=self.log)
+        cache_before = self.fetch_cache_stats()
+        self.run_with_metrics(engine.run())
+        engine.report()
+        self.latency.merge(engine.latency)
+        self.error_latency.merge(engine.error_latency)
+        self.report_cache_stats(cache_before, self.fetch_cache_stats())
+        
+        self.log("=== Load Completed ===")
+        return engine
+    
+    def run_stock_stress(self, count: int, jenis_item: str = "beras", concurrency: int = 50) -> StressResult:
+        """Tembakkan penjualan dan produksi paralel lalu cek konsistensi stok dengan log stok"""
+        self.log(f"=== Starting stock stress: {count} parallel requests on '{jenis_item}' ===")
+        
+        if not self.suppliers:
+            self.create_sample_suppliers()
+        if not self.customers:
+            self.create_sample_customers()
+        
+        detector = StockRaceDetector(self, concurrency=concurrency, jenis_item=jenis_item)
+        result = detector.run(count)
+        detector.report(result)
+        
+        self.log("=== Stock Stress Completed ===")
+        return result
+    
+    def run_live_latency(self, clients: int, writes: int, rate: float, concurrency: int = 16) -> LiveLatencyResult:
+        """Buka N klien /api/live lalu ukur latensi pembelian sampai notifikasi stok diterima"""
+        self.log(f"=== Starting live latency: {clients} clients, {writes} writes at {rate:.0f}/s ===")
+        
+        if not self.suppliers:
+            self.create_sample_suppliers()
+        
+        probe = LiveLatencyProbe(self, clients=clients, writes=writes, rate=rate, concurrency=concurrency)
+        result = probe.run()
+        probe.report(result)
+        
+        self.log("=== Live Latency Completed ===")
+        return result
+    
+    def run_list_benchmark(self, endpoints: List[str] = None, repeats: int = 200) -> Dict[str, Dict[str, Any]]:
+        """Latensi cold-start dan steady-state endpoint GET list beserta query per request"""
+        self.log(f"=== Starting list benchmark: {repeats} requests per endpoint ===")
+        
+        benchmark = ListEndpointBenchmark(self, endpoints, repeats)
+        results = benchmark.run()
+        benchmark.report(results)
+        
+        self.log("=== List Benchmark Completed ===")
+        return results
+    
+    def fetch_internal_stats(self, endpoint: str) -> Any:
+        """Ambil counter internal server; kosong jika server belum menyediakan endpoint-nya"""
+        try:
+            response = self.session.get(f"{self.base_url}{endpoint}", headers=internal_headers())
+            return response.json() if response.ok else {}
+        except (requests.exceptions.RequestException, ValueError):
+            return {}
+    
+    def run_with_metrics(self, coroutine):
+        """Jalankan coroutine beban sambil men-scrape /api/internal/metrics setiap metrics_interval detik"""
+        if self.metrics_interval <= 0:
+            return asyncio.run(coroutine)
+        with MetricsScraper(self.base_url, self.metrics_interval, self.log) as scraper:
+            result = asyncio.run(coroutine)
+        self.server_metrics = scraper.summary()
+        return result
+    
+    def fetch_cache_stats(self) -> Dict[str, Dict]:
+        caches = self.fetch_internal_stats("/api/internal/cache-stats")
+        return {cache["name"]: cache for cache in caches} if isinstance(caches, list) else {}
+    
+    def report_cache_stats(self, before: Dict[str, Dict], after: Dict[str, Dict]):
+        """Cetak hit/miss cache selama satu run beban"""
+        for name, stats in sorted(after.items()):
+            previous = before.get(name, {})
+            hits = stats["hits"] - previous.get("hits", 0)
+            misses = stats["misses"] - previous.get("misses", 0)
+            invalidations = stats["invalidations"] - previous.get("invalidations", 0)
+            lookups = hits + misses
+            hit_rate = hits / lookups * 100 if lookups else 0.0
+            self.log(f"Cache {name}: {hits} hit, {misses} miss ({hit_rate:.1f}% hit), "
+                     f"{invalidations} invalidasi")
+    
+    def run_workload(self, config: WorkloadConfig = None, path: str = None, bulk_size: int = 0) -> Dict:
+        """Replay aliran workload deterministik, dari generator atau dari file dump"""
+        if path:
+            header, events = read_workload(path)
+            suppliers, customers = header["suppliers"], header["customers"]
+            self.log(f"=== Replaying workload {path} (seed {header['config']['seed']}) ===")
+        else:
+            generator = WorkloadGenerator(config)
+            suppliers, customers = generator.supplier_payloads(), generator.customer_payloads()
+            events = generator.events()
+            self.log(f"=== Replaying workload seed {config.seed}: {config.days} hari mulai {config.start_date}, "
+                     f"~{config.transactions_per_day:.0f} transaksi/hari, profil {config.profile} ===")
+        
+        replayer = WorkloadReplayer(self, bulk_size=bulk_size, log=self.log)
+        result = replayer.replay(suppliers, customers, events)
+        # Konfigurasi (termasuk start_date) ikut ke --json-out agar run dapat diulang persis
+        result["config"] = header["config"] if path else asdict(config)
+        self.log(f"Workload selesai: {result['events']} transaksi dalam {result['elapsed']}s "
+                 f"({result['eventsPerSecond']}/s)")
+        for kind, sent in result["sent"].items():
+            self.log(f"  - {kind}: {sent} terkirim, {result['failed'][kind]} gagal")
+        return result
+    
+    def run_login_load(self, email: str, password: str, concurrency: int, rate: float,
+                       duration: float) -> LoadEngine:
+        """Beban open-loop pada /api/auth/login untuk mengukur biaya log aktivitas di jalur request"""
+        self.log(f"=== Starting login load: {rate:.0f} req/s, {concurrency} connections, {duration:.0f}s ===")
+        
+        credentials = {"email": email, "password": password}
+        operations = [Operation("POST /api/auth/login", "POST", "/api/auth/login", lambda: credentials)]
+        engine = LoadEngine(self.base_url, operations, rate=rate, duration=duration,
+                            concurrency=concurrency, log=self.log)
+        before = self.fetch_internal_stats("/api/internal/activity-log-stats")
+        self.run_with_metrics(engine.run())
+        engine.report()
+        self.latency.merge(engine.latency)
+        self.error_latency.merge(engine.error_latency)
+        
+        after = self.fetch_internal_stats("/api/internal/activity-log-stats")
+        if isinstance(after, dict) and "enqueued" in after:
+            self.log(f"Activity log buffer: {after['enqueued'] - before.get('enqueued', 0)} masuk, "
+                     f"{after['written'] - before.get('written', 0)} tertulis, "
+                     f"{after['dropped'] - before.get('dropped', 0)} terbuang, {after['pending']} antre")
+        
+        self.log("=== Login Load Completed ===")
+        return engine
+    
+    def run_login_storm(self, email: str, password: str, concurrency: int, rate: float, duration: float,
+                        login_rate: float, mix: str = "pembelian=5,produksi=1,penjualan=4") -> Dict:
+        """Transaksi stabil, lalu transaksi yang sama ditemani badai login; bandingkan p99 penjualan"""
+        operations = self.build_load_operations(parse_mix(mix))
+        credentials = {"email": email, "password": password}
+        login_ops = [Operation("POST /api/auth/login", "POST", "/api/auth/login", lambda: credentials)]
+        
+        quiet = LoadEngine(self.base_url, operations, rate=rate, duration=duration,
+                           concurrency=concurrency, log=self.log)
+        busy = LoadEngine(self.base_url, operations, rate=rate, duration=duration,
+                          concurrency=concurrency, log=self.log)
+        storm = LoadEngine(self.base_url, login_ops, rate=login_rate, duration=duration,
+                           concurrency=concurrency, log=self.log)
+        
+        self.log(f"=== Phase 1: transaksi {rate:.0f} req/s tanpa login, {duration:.0f}s ===")
+        asyncio.run(quiet.run())
+        quiet.report()
+        
+        self.log(f"=== Phase 2: transaksi {rate:.0f} req/s + login {login_rate:.0f} req/s, {duration:.0f}s ===")
+        
+        async def run_storm():
+            await asyncio.gather(busy.run(), storm.run())
+        
+        self.run_with_metrics(run_storm())
+        busy.report()
+        storm.report()
+        for engine in (quiet, busy, storm):
+            self.latency.merge(engine.latency)
+            self.error_latency.merge(engine.error_latency)
+        
+        def p99(engine: LoadEngine, method: str, path: str) -> float:
+            return engine.latency.histogram(method, path).summary().get("p99", 0.0)
+        
+        login_statuses = storm.stats["POST /api/auth/login"].status_counts
+        result = {
+            "penjualanP99Quiet": p99(quiet, "POST", "/api/penjualan"),
+            "penjualanP99Storm": p99(busy, "POST", "/api/penjualan"),
+            "loginP99": p99(storm, "POST", "/api/auth/login"),
+            "loginAccepted": login_statuses.get(200, 0),
+            "loginRejected429": login_statuses.get(429, 0),
+        }
+        self.log(f"p99 POST /api/penjualan: {result['penjualanP99Quiet']:.2f} ms tanpa login -> "
+                 f"{result['penjualanP99Storm']:.2f} ms saat badai login")
+        self.log(f"Login: {result['loginAccepted']} berhasil, {result['loginRejected429']} ditolak 429, "
+                 f"p99 {result['loginP99']:.2f} ms")
+        pool = self.fetch_internal_stats("/api/internal/password-pool-stats")
+        if isinstance(pool, dict) and "size" in pool:
+            self.log(f"Password pool: {pool['size']} worker, {pool['completed']} selesai, {pool['rejected']} ditolak")
+        
+        self.log("=== Login Storm Completed ===")
+        return result
+    
+    def login(self, email: str, password: str) -> str:
+        """Login sekali dan kembalikan bearer token"""
+        result = self.make_request("POST", "/api/auth/login", {"email": email, "password": password})
+        if not result.get("token"):
+            raise RuntimeError(f"Login gagal untuk {email}")
+        return result["token"]
+    
+    def run_auth_load(self, email: str, password: str, concurrency: int, rate: float, duration: float,
+                      endpoints: str = "/api/auth/me,/api/users,/api/activity-logs?limit=50") -> LoadEngine:
+        """Login sekali lalu bebani endpoint terproteksi dengan token yang sama"""
+        token = self.login(email, password)
+        headers = {"Authorization": f"Bearer {token}"}
+        self.log(f"=== Starting authenticated load: {rate:.0f} req/s, {concurrency} connections, {duration:.0f}s ===")
+        
+        operations = [Operation(f"GET {endpoint}", "GET", endpoint, lambda: None, headers=headers)
+                      for endpoint in endpoints.split(",") if endpoint]
+        engine = LoadEngine(self.base_url, operations, rate=rate, duration=duration,
+                            concurrency=concurrency, log=self.log)
+        cache_before = self.fetch_cache_stats()
+        self.run_with_metrics(engine.run())
+        engine.report()
+        self.latency.merge(engine.latency)
+        self.error_latency.merge(engine.error_latency)
+        self.report_cache_stats(cache_before, self.fetch_cache_stats())
+        
+        self.log("=== Authenticated Load Completed ===")
+        return engine
+    
+    def replay_trace(self, path: str, speed: str = "1x", concurrency: int = 64,
+                     token: str = None, password: str = None) -> TraceReplayer:
+        """Replay trace trafik terekam; urutan per resource dipertahankan"""
+        entries = read_trace(path)
+        self.log(f"=== Replaying trace {path}: {len(entries)} request at {speed} ===")
+        
+        headers = {"Authorization": f"Bearer {token}"} if token else None
+        replayer = TraceReplayer(self.base_url, parse_speed(speed), concurrency,
+                                 headers=headers, password=password, log=self.log)
+        self.run_with_metrics(replayer.run(entries))
+        replayer.report()
+        self.latency.merge(replayer.latency)
+        
+        self.log("=== Trace Replay Completed ===")
+        return replayer
+    
+    def report_latency(self):
+        """Cetak persentil latensi per endpoint"""
+        self.log("Latency per endpoint (ms):")
+        self.latency.report(self.log)
+        if self.error_latency.histograms:
+            self.log("Latensi request gagal (non-2xx dan error transport):")
+            self.error_latency.report(self.log)
+    
+    def write_latency_json(self, path: str, label: str = "", extra: Dict = None):
+        """Simpan ringkasan latensi JSON untuk dibandingkan antar build"""
+        if self.error_latency.histograms:
+            extra = {**(extra or {}), "errorLatency": self.error_latency.summary()}
+        self.latency.write_json(path, label, extra)
+        self.log(f"Latency summary written to {path}")
+    
     def run_full_test(self):
         """Jalankan test lengkap"""
         self.log("=== Starting PadiDoc Mass Testing ===")
@@ -339,25 +740,164 @@ class PadiDocTester:
             self.get_dashboard_metrics()
             
             self.log("=== Mass Testing Completed ===")
+            self.report_latency()
             
         except Exception as e:
             self.log(f"Test failed with error: {e}", "ERROR")
             raise
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Test seed dan load generator PadiDoc")
+    parser.add_argument("--base-url", default="http://localhost:5000", help="URL server PadiDoc")
+    parser.add_argument("--concurrency", type=int, default=0,
+                        help="Jalankan mode load asyncio dengan N koneksi keep-alive")
+    parser.add_argument("--rate", type=float, default=500.0,
+                        help="Laju kedatangan open-loop dalam request/detik")
+    parser.add_argument("--duration", type=float, default=30.0, help="Durasi load dalam detik")
+    parser.add_argument("--mix", default="pembelian=5,produksi=1,penjualan=4",
+                        help="Bobot campuran transaksi (pembelian, produksi, penjualan, stok, dashboard)")
+    parser.add_argument("--stress-stock", type=int, default=0,
+                        help="Jalankan N penjualan/produksi paralel dan cek race condition stok")
+    parser.add_argument("--item", default="beras", help="jenisItem yang diperebutkan pada stress stok")
+    parser.add_argument("--baseline", help="Ringkasan JSON run sebelumnya (--json-out) untuk stress, replay trace atau --list-bench")
+    parser.add_argument("--live-clients", type=int, default=0,
+                        help="Buka N klien SSE /api/live dan ukur latensi tulis -> notifikasi")
+    parser.add_argument("--live-writes", type=int, default=200,
+                        help="Jumlah pembelian yang ditembakkan pada --live-clients (laju --rate)")
+    parser.add_argument("--seed-data", action="store_true",
+                        help="Isi supplier, customer, pembelian dan penjualan contoh (idempoten)")
+    parser.add_argument("--list-bench", action="store_true",
+                        help="Ukur cold-start dan steady-state GET list; jalankan tepat setelah server start")
+    parser.add_argument("--repeats", type=int, default=200, help="Request steady-state per endpoint untuk --list-bench")
+    parser.add_argument("--walk", help="Baca seluruh halaman endpoint list, contoh /api/log-stok")
+    parser.add_argument("--page-size", type=int, default=500, help="Ukuran halaman untuk --walk")
+    parser.add_argument("--from", dest="date_from", help="Filter tanggal awal (inklusif) untuk --walk")
+    parser.add_argument("--to", dest="date_to", help="Filter tanggal akhir (eksklusif) untuk --walk")
+    parser.add_argument("--jenis-item", help="Filter jenisItem untuk --walk")
+    parser.add_argument("--seed", type=int, help="Seed random agar run dapat dibandingkan")
+    parser.add_argument("--workload", action="store_true",
+                        help="Replay workload deterministik dari generator (lihat --days, --tx-per-day)")
+    parser.add_argument("--dump", help="Simpan aliran workload ke file NDJSON tanpa mengirim ke server")
+    parser.add_argument("--replay", help="Replay file workload hasil --dump")
+    parser.add_argument("--suppliers", type=int, default=3, help="Jumlah supplier workload")
+    parser.add_argument("--customers", type=int, default=3, help="Jumlah customer workload")
+    parser.add_argument("--days", type=int, default=30, help="Jumlah hari workload")
+    parser.add_argument("--tx-per-day", type=float, default=33.0, help="Rata-rata transaksi per hari")
+    parser.add_argument("--profile", default="panen", choices=["flat", "panen"],
+                        help="Profil musiman: panen = lonjakan pembelian saat panen raya dan gadu")
+    parser.add_argument("--start-date", default=DEFAULT_START_DATE,
+                        help=f"Tanggal awal workload (YYYY-MM-DD), default {DEFAULT_START_DATE}")
+    parser.add_argument("--bulk-size", type=int, default=0,
+                        help="Kirim workload lewat endpoint /bulk dengan N transaksi per request")
+    parser.add_argument("--trace", help="Replay trace NDJSON dari TRAFFIC_TRACE_FILE server")
+    parser.add_argument("--speed", default="1x", help="Kecepatan replay trace: 1x, 10x atau max")
+    parser.add_argument("--token", help="Bearer token untuk endpoint terproteksi saat replay")
+    parser.add_argument("--login-load", action="store_true",
+                        help="Beban open-loop pada /api/auth/login (pakai --rate, --duration, --concurrency)")
+    parser.add_argument("--auth-load", action="store_true",
+                        help="Login sekali lalu bebani endpoint terproteksi (lihat --endpoints)")
+    parser.add_argument("--endpoints", default="/api/auth/me,/api/users,/api/activity-logs?limit=50",
+                        help="Daftar endpoint GET terproteksi untuk --auth-load, dipisah koma")
+    parser.add_argument("--login-storm", type=float, default=0,
+                        help="Laju login/detik yang ditembakkan bersamaan dengan transaksi --rate (mix --mix)")
+    parser.add_argument("--email", default="admin@padidoc.com", help="Email login untuk --login-load/--auth-load")
+    parser.add_argument("--password", help="Password login (default admin123) / pengganti password di trace")
+    parser.add_argument("--metrics-interval", type=float, default=1.0,
+                        help="Interval scrape /api/internal/metrics selama run beban (detik, 0 = mati, "
+                             "token dari env METRICS_TOKEN)")
+    parser.add_argument("--json-out", help="Tulis ringkasan latensi JSON ke file ini")
+    parser.add_argument("--label", default="", help="Label build untuk ringkasan JSON")
+    return parser.parse_args()
+
+def workload_config(args) -> WorkloadConfig:
+    return WorkloadConfig(
+        seed=args.seed if args.seed is not None else 42,
+        suppliers=args.suppliers,
+        customers=args.customers,
+        days=args.days,
+        transactions_per_day=args.tx_per_day,
+        profile=args.profile,
+        start_date=args.start_date,
+    )
+
 def main():
     """Main function untuk menjalankan test"""
-    tester = PadiDocTester()
+    args = parse_args()
+    if args.seed is not None:
+        random.seed(args.seed)
+    
+    if args.dump:
+        generator = WorkloadGenerator(workload_config(args))
+        count = generator.dump(args.dump)
+        print(f"Workload seed {generator.config.seed}: {count} transaksi disimpan ke {args.dump}")
+        return
+    
+    tester = PadiDocTester(args.base_url)
+    tester.metrics_interval = args.metrics_interval
     
     # Cek apakah server berjalan
     try:
-        response = requests.get("http://localhost:5000/api/dashboard/metrics")
+        response = requests.get(f"{args.base_url}/api/dashboard/metrics")
         if response.status_code == 200:
             print("Server is running. Starting tests...")
-            tester.run_full_test()
+            extra = None
+            if args.login_storm > 0:
+                result = tester.run_login_storm(args.email, args.password or "admin123", args.concurrency or 64,
+                                                args.rate, args.duration, args.login_storm, args.mix)
+                extra = {"loginStorm": result}
+            elif args.auth_load:
+                engine = tester.run_auth_load(args.email, args.password or "admin123", args.concurrency or 64,
+                                              args.rate, args.duration, args.endpoints)
+                extra = {"load": engine.summary()}
+                if args.baseline:
+                    compare_baseline(tester.latency.to_json(args.label, extra), args.baseline, tester.log)
+            elif args.login_load:
+                engine = tester.run_login_load(args.email, args.password or "admin123",
+                                               args.concurrency or 64, args.rate, args.duration)
+                extra = {"load": engine.summary()}
+                if args.baseline:
+                    compare_baseline(tester.latency.to_json(args.label, extra), args.baseline, tester.log)
+            elif args.trace:
+                replayer = tester.replay_trace(args.trace, args.speed, args.concurrency or 64,
+                                               args.token, args.password)
+                extra = {"traceReplay": replayer.summary()}
+                if args.baseline:
+                    compare_baseline(tester.latency.to_json(args.label, extra), args.baseline, tester.log)
+            elif args.workload or args.replay:
+                result = tester.run_workload(workload_config(args), args.replay, args.bulk_size)
+                extra = {"workload": result}
+            elif args.walk:
+                filters = {"from": args.date_from, "to": args.date_to, "jenisItem": args.jenis_item}
+                tester.walk_endpoint(args.walk, args.page_size, filters)
+            elif args.seed_data:
+                extra = {"seed": tester.seed_sample_data()}
+            elif args.list_bench:
+                results = tester.run_list_benchmark(repeats=args.repeats)
+                extra = {"listBenchmark": results}
+                if args.baseline:
+                    compare_list_baseline(results, args.baseline, tester.log)
+            elif args.live_clients > 0:
+                result = tester.run_live_latency(args.live_clients, args.live_writes, args.rate,
+                                                 args.concurrency or 16)
+                extra = {"liveLatency": result.to_dict()}
+            elif args.stress_stock > 0:
+                result = tester.run_stock_stress(args.stress_stock, args.item, args.concurrency or 50)
+                extra = {"stockStress": result.to_dict()}
+                if args.baseline:
+                    compare_throughput(result, args.baseline, tester.log)
+            elif args.concurrency > 0:
+                engine = tester.run_load(args.concurrency, args.rate, args.duration, args.mix)
+                extra = {"load": engine.summary()}
+            else:
+                tester.run_full_test()
+            if tester.server_metrics:
+                extra = {**(extra or {}), "serverMetrics": tester.server_metrics}
+            if args.json_out:
+                tester.write_latency_json(args.json_out, args.label, extra)
         else:
             print(f"Server returned status code: {response.status_code}")
     except requests.exceptions.ConnectionError:
-        print("Error: Cannot connect to server. Make sure the application is running on localhost:5000")
+        print(f"Error: Cannot connect to server. Make sure the application is running on {args.base_url}")
     except Exception as e:
         print(f"Error: {e}")
 
@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+Traffic Replay untuk PadiDoc
+Me-replay trace NDJSON dari middleware server/trafficRecorder.ts pada kecepatan 1x, Nx
+atau maksimum. Urutan request per resource dipertahankan, antar resource berjalan paralel;
+request yang merujuk id dokumen dari lane lain menunggu sampai dokumen itu selesai dibuat.
+"""
+
+import asyncio
+import json
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from latency_histogram import LatencyRecorder, normalize_endpoint
+from load_engine import AsyncHttpPool
+
+REDACTED = "[redacted]"
+
+# Field foreign key -> resource yang id-nya dipetakan ulang saat replay
+ID_FIELDS = {
+    "supplierId": "/api/suppliers",
+    "customerId": "/api/customers",
+    "pembelianId": "/api/pembelian",
+    "pengeringanId": "/api/pengeringan",
+    "stokId": "/api/stok",
+}
+
+
+@dataclass
+class TraceEntry:
+    """Satu request yang terekam"""
+    offset_ms: float
+    method: str
+    path: str
+    status: int
+    duration_ms: float
+    body: Any = None
+    content_type: Optional[str] = None
+    response_id: Optional[int] = None
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "TraceEntry":
+        return cls(
+            offset_ms=float(data["offsetMs"]),
+            method=data["method"],
+            path=data["path"],
+            status=int(data.get("status", 0)),
+            duration_ms=float(data.get("durationMs", 0)),
+            body=data.get("body"),
+            content_type=data.get("contentType"),
+            response_id=data.get("responseId"),
+        )
+
+    @property
+    def resource(self) -> str:
+        """Dua segmen pertama path, contoh /api/pembelian/12?x=1 -> /api/pembelian"""
+        segments = self.path.split("?", 1)[0].strip("/").split("/")
+        return "/" + "/".join(segments[:2])
+
+
+def read_trace(path: str) -> List[TraceEntry]:
+    with open(path, encoding="utf-8") as handle:
+        entries = [TraceEntry.from_dict(json.loads(line)) for line in handle if line.strip()]
+    # Trace dari beberapa proses bisa tidak terurut sempurna
+    entries.sort(key=lambda entry: entry.offset_ms)
+    return entries
+
+
+def parse_speed(value: str) -> float:
+    """'1x', '10x', '2.5' atau 'max' (0 = tanpa jeda)"""
+    value = value.strip().lower()
+    if value == "max":
+        return 0.0
+    speed = float(value.rstrip("x"))
+    if speed <= 0:
+        raise ValueError("Kecepatan replay harus > 0 atau 'max'")
+    return speed
+
+
+class TraceReplayer:
+    """Replay trace dengan satu antrean berurutan per resource"""
+
+    def __init__(self, base_url: str, speed: float = 1.0, concurrency: int = 64,
+                 headers: Optional[Dict[str, str]] = None, password: Optional[str] = None,
+                 log: Callable[..., None] = print):
+        self.base_url = base_url
+        self.speed = speed
+        self.concurrency = concurrency
+        self.headers = headers or {}
+        self.password = password
+        self.log = log
+        self.latency = LatencyRecorder()
+        self.id_map: Dict[Tuple[str, int], int] = {}
+        # (resource, id trace) -> event yang di-set setelah request pembuatnya selesai
+        self.created: Dict[Tuple[str, int], asyncio.Event] = {}
+        self.created_at: Dict[Tuple[str, int], float] = {}
+        self.dependency_waits = 0
+        self.status_counts: Counter = Counter()
+        self.mismatches: Counter = Counter()
+        self.transport_errors = 0
+        self.max_lag = 0.0
+        self.elapsed = 0.0
+        self.requests = 0
+        self.trace_span = 0.0
+
+    def path_reference(self, path: str) -> Optional[Tuple[str, int]]:
+        """(resource, id) dari /api/<resource>/<id>"""
+        segments = path.partition("?")[0].split("/")
+        if len(segments) >= 4 and segments[3].isdigit():
+            return "/".join(segments[:3]), int(segments[3])
+        return None
+
+    def body_references(self, body: Any) -> List[Tuple[str, int]]:
+        if isinstance(body, list):
+            return [ref for item in body for ref in self.body_references(item)]
+        if not isinstance(body, dict):
+            return []
+        return [(ID_FIELDS[key], value) for key, value in body.items()
+                if key in ID_FIELDS and isinstance(value, int)]
+
+    def dependencies(self, entry: TraceEntry) -> List[asyncio.Event]:
+        """Event pembuatan dokumen yang id-nya akan dipetakan ulang oleh request ini"""
+        refs = self.body_references(entry.body)
+        path_ref = self.path_reference(entry.path)
+        if path_ref:
+            refs.append(path_ref)
+        # Hanya pembuat yang terekam lebih dulu; id yang sudah ada sebelum trace tidak ditunggu
+        return [self.created[ref] for ref in set(refs)
+                if ref in self.created and self.created_at[ref] <= entry.offset_ms]
+
+    def remap_path(self, path: str) -> str:
+        base, _, query = path.partition("?")
+        segments = base.split("/")
+        # /api/<resource>/<id>
+        if len(segments) >= 4 and segments[3].isdigit():
+            resource = "/".join(segments[:3])
+            segments[3] = str(self.id_map.get((resource, int(segments[3])), segments[3]))
+        remapped = "/".join(segments)
+        return f"{remapped}?{query}" if query else remapped
+
+    def remap_body(self, body: Any) -> Any:
+        if isinstance(body, list):
+            return [self.remap_body(item) for item in body]
+        if not isinstance(body, dict):
+            return body
+        remapped = {}
+        for key, value in body.items():
+            if key in ID_FIELDS and isinstance(value, int):
+                value = self.id_map.get((ID_FIELDS[key], value), value)
+            elif value == REDACTED and self.password is not None:
+                value = self.password
+            remapped[key] = value
+        return remapped
+
+    async def _send(self, pool: AsyncHttpPool, entry: TraceEntry):
+        try:
+            await self._request(pool, entry)
+        finally:
+            # Gagal pun tetap di-set agar lane yang menunggu tidak macet (id asli yang dikirim)
+            if entry.response_id is not None and (entry.resource, entry.response_id) in self.created:
+                self.created[(entry.resource, entry.response_id)].set()
+
+    async def _request(self, pool: AsyncHttpPool, entry: TraceEntry):
+        headers = dict(self.headers)
+        body = self.remap_body(entry.body)
+        if entry.content_type and entry.content_type != "application/json":
+            headers["Content-Type"] = entry.content_type
+        endpoint = self.remap_path(entry.path)
+
+        started = time.perf_counter()
+        try:
+            response = await pool.request(entry.method, endpoint, body, headers)
+        except (ConnectionError, OSError, asyncio.TimeoutError):
+            self.transport_errors += 1
+            return
+        self.latency.record(entry.method, entry.path, time.perf_counter() - started)
+        self.status_counts[response.status] += 1
+        if response.status != entry.status:
+            self.mismatches[f"{entry.method} {normalize_endpoint(entry.path)} {entry.status}->{response.status}"] += 1
+
+        # Dokumen baru mendapat id berbeda di instance lokal; catat untuk request berikutnya
+        if entry.response_id is not None and response.ok:
+            try:
+                created = response.json()
+            except ValueError:
+                created = None
+            if isinstance(created, dict) and isinstance(created.get("id"), int):
+                self.id_map[(entry.resource, entry.response_id)] = created["id"]
+
+    async def _lane(self, pool: AsyncHttpPool, entries: List[TraceEntry], start: float):
+        for entry in entries:
+            if self.speed > 0:
+                due = start + entry.offset_ms / 1000 / self.speed
+                delay = due - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                else:
+                    self.max_lag = max(self.max_lag, -delay)
+            pending = [event for event in self.dependencies(entry) if not event.is_set()]
+            if pending:
+                self.dependency_waits += 1
+                await asyncio.gather(*(event.wait() for event in pending))
+            await self._send(pool, entry)
+
+    async def run(self, entries: List[TraceEntry]):
+        lanes: Dict[str, List[TraceEntry]] = defaultdict(list)
+        for entry in entries:
+            lanes[entry.resource].append(entry)
+            if entry.response_id is not None and entry.method == "POST":
+                key = (entry.resource, entry.response_id)
+                if key not in self.created:
+                    self.created[key] = asyncio.Event()
+                    self.created_at[key] = entry.offset_ms
+        self.requests = len(entries)
+        self.trace_span = entries[-1].offset_ms / 1000 if entries else 0.0
+
+        pool = AsyncHttpPool(self.base_url, size=self.concurrency)
+        start = time.perf_counter()
+        try:
+            await asyncio.gather(*(self._lane(pool, lane, start) for lane in lanes.values()))
+        finally:
+            self.elapsed = time.perf_counter() - start
+            await pool.close()
+
+    @property
+    def throughput(self) -> float:
+        return self.requests / self.elapsed if self.elapsed else 0.0
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "speed": "max" if self.speed == 0 else f"{self.speed:g}x",
+            "requests": self.requests,
+            "elapsed": round(self.elapsed, 3),
+            "traceSpan": round(self.trace_span, 3),
+            "throughput": round(self.throughput, 2),
+            "maxLag": round(self.max_lag, 3),
+            "transportErrors": self.transport_errors,
+            "dependencyWaits": self.dependency_waits,
+            "statusCounts": {str(status): count for status, count in sorted(self.status_counts.items())},
+            "statusMismatches": dict(self.mismatches.most_common()),
+        }
+
+    def report(self):
+        summary = self.summary()
+        self.log(f"Replay {summary['speed']}: {summary['requests']} request dalam {summary['elapsed']}s "
+                 f"(trace asli {summary['traceSpan']}s), {summary['throughput']} req/s")
+        if self.speed > 0 and self.max_lag > 0.1:
+            self.log(f"Replay tertinggal dari jadwal hingga {self.max_lag:.2f}s", "WARNING")
+        for name, count in list(self.mismatches.most_common())[:10]:
+            self.log(f"  Status berbeda dari trace: {name} x{count}", "WARNING")
+        self.latency.report(self.log)
+
+
+def compare_baseline(current: Dict[str, Any], baseline_path: str, log) -> Dict[str, Dict[str, float]]:
+    """Selisih p50/p99 per endpoint dan throughput terhadap ringkasan JSON run sebelumnya"""
+    with open(baseline_path, encoding="utf-8") as handle:
+        baseline = json.load(handle)
+
+    def delta(new: float, old: float) -> float:
+        return (new - old) / old * 100 if old else 0.0
+
+    deltas: Dict[str, Dict[str, float]] = {}
+    log(f"{'endpoint':<36}{'p50 base':>10}{'p50':>10}{'Δ%':>8}{'p99 base':>10}{'p99':>10}{'Δ%':>8}")
+    for name, stats in current.get("endpoints", {}).items():
+        old = baseline.get("endpoints", {}).get(name)
+        if not old:
+            log(f"{name:<36} (tidak ada di baseline)")
+            continue
+        deltas[name] = {"p50": delta(stats["p50"], old["p50"]), "p99": delta(stats["p99"], old["p99"])}
+        log(f"{name:<36}{old['p50']:>10.2f}{stats['p50']:>10.2f}{deltas[name]['p50']:>+8.1f}"
+            f"{old['p99']:>10.2f}{stats['p99']:>10.2f}{deltas[name]['p99']:>+8.1f}")
+
+    old_replay = baseline.get("traceReplay", {})
+    new_replay = current.get("traceReplay", {})
+    if old_replay.get("throughput") and new_replay.get("throughput"):
+        change = delta(new_replay["throughput"], old_replay["throughput"])
+        deltas["throughput"] = {"delta": change}
+        log(f"Throughput replay: {old_replay['throughput']:.1f} -> {new_replay['throughput']:.1f} req/s ({change:+.1f}%)")
+    return deltas
@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+"""
+Workload Generator untuk PadiDoc
+Menghasilkan aliran transaksi deterministik (seed yang sama = aliran yang sama)
+dengan profil musim panen, distribusi rendemen dan hasil gabah→beras/katul/menir/sekam.
+Aliran bisa di-replay ke API atau disimpan ke file NDJSON.
+"""
+
+import json
+import math
+import random
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+# Proporsi hasil produksi per kg gabah, sama dengan create_mass_produksi
+YIELD_KATUL = 0.10
+YIELD_MENIR = 0.05
+YIELD_SEKAM = 0.15
+
+# Bobot default mengikuti volume run_full_test (15 pembelian, 8 produksi, 10 penjualan)
+DEFAULT_MIX = {"pembelian": 15, "produksi": 8, "penjualan": 10}
+
+# Puncak panen raya (akhir Maret) dan panen gadu (pertengahan Agustus) sebagai hari ke-n dalam tahun
+HARVEST_PEAKS = ((84, 20.0, 1.6), (228, 18.0, 0.9))
+# Tanggal awal tetap: season_factor bergantung pada hari dalam tahun, jadi default relatif
+# terhadap hari ini membuat seed yang sama menghasilkan aliran berbeda di hari lain
+DEFAULT_START_DATE = "2025-01-01"
+
+PROFILES = ("flat", "panen")
+
+SUPPLIER_PREFIX = ["CV", "UD", "PT", "KUD", "Poktan"]
+SUPPLIER_NAMES = ["Tani Makmur", "Gabah Sejahtera", "Hasil Panen", "Sri Rejeki", "Padi Mulya",
+                  "Sawah Subur", "Bumi Tani", "Lumbung Jaya"]
+CUSTOMER_PREFIX = ["Toko Beras", "Warung Nasi", "Distributor Pangan", "Koperasi", "Rumah Makan"]
+CUSTOMER_NAMES = ["Berkah", "Jaya", "Barokah", "Sentosa", "Makmur", "Sejahtera", "Abadi", "Mandiri"]
+REGIONS = ["Subang", "Karawang", "Indramayu", "Cianjur", "Bekasi", "Bogor", "Jakarta", "Purwakarta"]
+
+PENJUALAN_ITEMS = (("beras", 0.80), ("katul", 0.10), ("menir", 0.06), ("sekam", 0.04))
+HARGA_JUAL = {"beras": (12000, 18000), "katul": (3000, 4500), "menir": (6000, 8000), "sekam": (300, 800)}
+
+
+@dataclass
+class WorkloadConfig:
+    """Parameter workload; seluruh isi aliran hanya bergantung pada nilai-nilai ini"""
+    seed: int = 42
+    suppliers: int = 3
+    customers: int = 3
+    days: int = 30
+    transactions_per_day: float = 33.0
+    profile: str = "panen"
+    start_date: str = DEFAULT_START_DATE  # YYYY-MM-DD, ikut ditulis ke header dump
+    mix: Dict[str, float] = field(default_factory=lambda: dict(DEFAULT_MIX))
+    rendemen_mean: float = 64.0
+    rendemen_sd: float = 2.5
+    rendemen_min: float = 55.0
+    rendemen_max: float = 72.0
+
+    def __post_init__(self):
+        if self.profile not in PROFILES:
+            raise ValueError(f"Profil harus salah satu dari {', '.join(PROFILES)}")
+        if self.start + timedelta(days=self.days) > date.today():
+            # API menolak tanggal di masa depan; hari ini juga ditolak agar aliran tidak bergantung jam
+            raise ValueError("Rentang workload harus berakhir paling lambat kemarin")
+
+    @property
+    def start(self) -> date:
+        return date.fromisoformat(self.start_date)
+
+
+@dataclass
+class WorkloadEvent:
+    """Satu transaksi dalam aliran; referensi supplier/customer berupa indeks"""
+    seq: int
+    kind: str
+    day: int
+    payload: Dict[str, Any]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class WorkloadGenerator:
+    """Simulasi harian penggilingan: stok disimulasikan agar aliran valid terhadap database kosong"""
+
+    def __init__(self, config: WorkloadConfig):
+        self.config = config
+        self.rng = random.Random(config.seed)
+        self.stock = {"gabah": 0.0, "beras": 0.0, "katul": 0.0, "menir": 0.0, "sekam": 0.0}
+        total = sum(config.mix.values()) or 1.0
+        self.weights = {kind: config.mix.get(kind, 0.0) / total for kind in DEFAULT_MIX}
+
+    def season_factor(self, day: date) -> float:
+        """Pengali volume pembelian gabah; profil panen memiliki lonjakan di sekitar musim panen"""
+        if self.config.profile == "flat":
+            return 1.0
+        doy = day.timetuple().tm_yday
+        factor = 0.4
+        for peak, width, height in HARVEST_PEAKS:
+            factor += height * math.exp(-((doy - peak) / width) ** 2)
+        return factor
+
+    def poisson(self, lam: float) -> int:
+        if lam <= 0:
+            return 0
+        if lam > 30:
+            return max(0, int(round(self.rng.gauss(lam, math.sqrt(lam)))))
+        # Knuth untuk lambda kecil
+        threshold = math.exp(-lam)
+        count, product = 0, self.rng.random()
+        while product > threshold:
+            count += 1
+            product *= self.rng.random()
+        return count
+
+    def rendemen(self) -> float:
+        """Rendemen normal terpotong di [min, max]"""
+        cfg = self.config
+        value = self.rng.gauss(cfg.rendemen_mean, cfg.rendemen_sd)
+        return min(max(value, cfg.rendemen_min), cfg.rendemen_max)
+
+    def supplier_payloads(self) -> List[Dict[str, Any]]:
+        return [{
+            "name": f"{SUPPLIER_PREFIX[i % len(SUPPLIER_PREFIX)]} "
+                    f"{SUPPLIER_NAMES[(i // len(SUPPLIER_PREFIX)) % len(SUPPLIER_NAMES)]} {i + 1}",
+            "address": f"Jl. Sawah Raya No. {i + 1}, {REGIONS[i % len(REGIONS)]}",
+            "phone": f"0812{i:08d}",
+        } for i in range(self.config.suppliers)]
+
+    def customer_payloads(self) -> List[Dict[str, Any]]:
+        return [{
+            "name": f"{CUSTOMER_PREFIX[i % len(CUSTOMER_PREFIX)]} "
+                    f"{CUSTOMER_NAMES[(i // len(CUSTOMER_PREFIX)) % len(CUSTOMER_NAMES)]} {i + 1}",
+            "address": f"Jl. Pasar Baru No. {i + 1}, {REGIONS[(i + 3) % len(REGIONS)]}",
+            "phone": f"0813{i:08d}",
+        } for i in range(self.config.customers)]
+
+    def _timestamp(self, day: date, start_hour: int, end_hour: int) -> datetime:
+        seconds = self.rng.randint(start_hour * 3600, end_hour * 3600 - 1)
+        return datetime.combine(day, datetime.min.time()) + timedelta(seconds=seconds)
+
+    def _pembelian(self, day: date, when: datetime, season: float) -> Dict[str, Any]:
+        # Saat panen raya gabah melimpah: volume naik, harga turun, kadar air lebih tinggi
+        peak = min(max(season - 1.0, 0.0), 1.0)
+        jumlah = self.rng.randint(500, 2000)
+        harga_per_kg = int(self.rng.randint(7000, 12000) * (1 - 0.12 * peak))
+        return {
+            "supplierRef": self.rng.randrange(self.config.suppliers),
+            "tanggal": when.isoformat(),
+            "jenisGabah": self.rng.choice(["Gabah Kering Premium", "Gabah Basah", "Gabah Super", "Gabah Lokal"]),
+            "jenisBarang": "gabah",
+            "jumlah": str(jumlah),
+            "hargaPerKg": str(harga_per_kg),
+            "totalHarga": str(jumlah * harga_per_kg),
+            "kadarAir": str(self.rng.randint(12, 16) + (2 if peak > 0.5 else 0)),
+            "kualitas": self.rng.choice(["A", "B", "C"]),
+            "status": "completed",
+            "metodePembayaran": self.rng.choice(["cash", "transfer"]),
+            "catatan": f"Workload seed {self.config.seed} hari {day.isoformat()}",
+        }
+
+    def _produksi(self, day: date, when: datetime) -> Optional[Dict[str, Any]]:
+        gabah_input = min(self.rng.randint(800, 1200), int(self.stock["gabah"]))
+        rendemen = self.rendemen()
+        if gabah_input < 100:
+            return None
+        return {
+            "tanggal": when.isoformat(),
+            "jenisBerasProduced": self.rng.choice(["Beras Premium", "Beras Medium", "Beras Lokal"]),
+            "jumlahGabahInput": str(gabah_input),
+            "jumlahBerasOutput": str(int(gabah_input * rendemen / 100)),
+            "jumlahKatul": str(int(gabah_input * YIELD_KATUL)),
+            "jumlahMenir": str(int(gabah_input * YIELD_MENIR)),
+            "jumlahSekam": str(int(gabah_input * YIELD_SEKAM)),
+            "rendemen": str(round(rendemen, 2)),
+            "status": "completed",
+            "catatan": f"Workload seed {self.config.seed} hari {day.isoformat()}",
+        }
+
+    def _penjualan(self, day: date, when: datetime) -> Optional[Dict[str, Any]]:
+        roll, jenis = self.rng.random(), PENJUALAN_ITEMS[0][0]
+        for item, weight in PENJUALAN_ITEMS:
+            if roll < weight:
+                jenis = item
+                break
+            roll -= weight
+        low, high = HARGA_JUAL[jenis]
+        jumlah = min(self.rng.randint(200, 800), int(self.stock[jenis]))
+        harga_per_kg = self.rng.randint(low, high)
+        customer = self.rng.randrange(self.config.customers)
+        if jumlah < 50:
+            return None
+        return {
+            "customerRef": customer,
+            "tanggal": when.isoformat(),
+            "jenisBeras": "Beras Medium" if jenis == "beras" else jenis.capitalize(),
+            "jenisBarang": jenis,
+            "jumlah": str(jumlah),
+            "hargaPerKg": str(harga_per_kg),
+            "totalHarga": str(jumlah * harga_per_kg),
+            "status": "completed",
+            "metodePembayaran": self.rng.choice(["cash", "transfer"]),
+            "catatan": f"Workload seed {self.config.seed} hari {day.isoformat()}",
+        }
+
+    def _apply(self, kind: str, payload: Dict[str, Any]):
+        if kind == "pembelian":
+            self.stock["gabah"] += float(payload["jumlah"])
+        elif kind == "produksi":
+            self.stock["gabah"] -= float(payload["jumlahGabahInput"])
+            self.stock["beras"] += float(payload["jumlahBerasOutput"])
+            self.stock["katul"] += float(payload["jumlahKatul"])
+            self.stock["menir"] += float(payload["jumlahMenir"])
+            self.stock["sekam"] += float(payload["jumlahSekam"])
+        elif kind == "penjualan":
+            self.stock[payload["jenisBarang"]] -= float(payload["jumlah"])
+
+    def events(self) -> Iterator[WorkloadEvent]:
+        """Aliran transaksi lazy, hari demi hari, terurut waktu"""
+        cfg = self.config
+        seq = 0
+        # Jam operasional per jenis transaksi: gabah datang pagi, penggilingan siang, penjualan sore
+        hours = {"pembelian": (6, 12), "produksi": (8, 17), "penjualan": (9, 20)}
+
+        for offset in range(cfg.days):
+            day = cfg.start + timedelta(days=offset)
+            season = self.season_factor(day)
+            weekend = 0.6 if day.weekday() == 6 else 1.0
+            # Penggilingan menambah shift saat gudang gabah menumpuk (mis. setelah panen raya)
+            backlog = self.stock["gabah"] / max(cfg.transactions_per_day * self.weights["pembelian"] * 1250, 1.0)
+            mill = min(max(backlog, 0.5), 3.0)
+            # Begitu pula penjualan saat stok beras berlebih (harga turun, distributor menyerap)
+            surplus = self.stock["beras"] / max(cfg.transactions_per_day * self.weights["penjualan"] * 500, 1.0)
+            demand = min(max(surplus, 0.5), 3.0)
+            counts = {
+                "pembelian": self.poisson(cfg.transactions_per_day * self.weights["pembelian"] * season),
+                "produksi": self.poisson(cfg.transactions_per_day * self.weights["produksi"] * weekend * mill),
+                "penjualan": self.poisson(cfg.transactions_per_day * self.weights["penjualan"] * weekend * demand),
+            }
+            slots: List[Tuple[datetime, str]] = []
+            for kind, count in counts.items():
+                slots.extend((self._timestamp(day, *hours[kind]), kind) for _ in range(count))
+            slots.sort()
+
+            for when, kind in slots:
+                if kind == "pembelian":
+                    payload = self._pembelian(day, when, season)
+                elif kind == "produksi":
+                    payload = self._produksi(day, when)
+                else:
+                    payload = self._penjualan(day, when)
+                if payload is None:
+                    continue
+                self._apply(kind, payload)
+                seq += 1
+                yield WorkloadEvent(seq, kind, offset, payload)
+
+    def dump(self, path: str) -> int:
+        """Simpan header konfigurasi, master data dan seluruh aliran ke file NDJSON"""
+        count = 0
+        with open(path, "w", encoding="utf-8") as handle:
+            header = {"type": "workload", "config": asdict(self.config),
+                      "suppliers": self.supplier_payloads(), "customers": self.customer_payloads()}
+            handle.write(json.dumps(header) + "\n")
+            for event in self.events():
+                handle.write(json.dumps(event.to_dict()) + "\n")
+                count += 1
+        return count
+
+
+def read_workload(path: str) -> Tuple[Dict[str, Any], Iterator[WorkloadEvent]]:
+    """Baca file hasil dump: (header, iterator event)"""
+    handle = open(path, encoding="utf-8")
+    header = json.loads(handle.readline())
+    if header.get("type") != "workload":
+        handle.close()
+        raise ValueError(f"{path} bukan file workload")
+
+    def iterate() -> Iterator[WorkloadEvent]:
+        with handle:
+            for line in handle:
+                if line.strip():
+                    yield WorkloadEvent(**json.loads(line))
+
+    return header, iterate()
+
+
+class WorkloadReplayer:
+    """Kirim aliran ke API secara berurutan; opsional dikelompokkan ke endpoint /bulk"""
+
+    ENDPOINTS = {"pembelian": "/api/pembelian", "produksi": "/api/produksi", "penjualan": "/api/penjualan"}
+
+    def __init__(self, tester, bulk_size: int = 0, log: Callable[..., None] = print):
+        self.tester = tester
+        self.bulk_size = bulk_size
+        self.log = log
+        self.supplier_ids: List[int] = []
+        self.customer_ids: List[int] = []
+        self.sent = {kind: 0 for kind in self.ENDPOINTS}
+        self.failed = {kind: 0 for kind in self.ENDPOINTS}
+
+    def create_master_data(self, suppliers: List[Dict], customers: List[Dict]):
+        for data in suppliers:
+            result = self.tester.make_request("POST", "/api/suppliers", data)
+            self.supplier_ids.append(result.get("id"))
+        for data in customers:
+            result = self.tester.make_request("POST", "/api/customers", data)
+            self.customer_ids.append(result.get("id"))
+        self.log(f"Created {len(self.supplier_ids)} suppliers and {len(self.customer_ids)} customers")
+
+    def resolve(self, event: WorkloadEvent) -> Dict[str, Any]:
+        payload = dict(event.payload)
+        if "supplierRef" in payload:
+            payload["supplierId"] = self.supplier_ids[payload.pop("supplierRef")]
+        if "customerRef" in payload:
+            payload["customerId"] = self.customer_ids[payload.pop("customerRef")]
+        return payload
+
+    def _send_single(self, event: WorkloadEvent):
+        result = self.tester.make_request("POST", self.ENDPOINTS[event.kind], self.resolve(event))
+        self.sent[event.kind] += 1
+        if not result:
+            self.failed[event.kind] += 1
+
+    def _send_bulk(self, kind: str, events: List[WorkloadEvent]):
+        # NDJSON agar tidak terbentur batas body express.json
+        body = "\n".join(json.dumps(self.resolve(event)) for event in events)
+        endpoint = f"{self.ENDPOINTS[kind]}/bulk"
+        started = time.perf_counter()
+        response = self.tester.session.post(f"{self.tester.base_url}{endpoint}", data=body.encode("utf-8"),
+                                            headers={"Content-Type": "application/x-ndjson"})
+        self.tester.latency.record("POST", endpoint, time.perf_counter() - started)
+        self.sent[kind] += len(events)
+        try:
+            inserted = response.json().get("inserted", 0)
+        except ValueError:
+            inserted = 0
+        self.failed[kind] += len(events) - inserted
+
+    def replay(self, suppliers: List[Dict], customers: List[Dict], events: Iterator[WorkloadEvent]) -> Dict:
+        self.create_master_data(suppliers, customers)
+        started = time.perf_counter()
+        pending: List[WorkloadEvent] = []
+        total = 0
+
+        # Event berurutan dengan jenis yang sama dikirim sebagai satu batch, urutan stok tetap terjaga
+        for event in events:
+            total += 1
+            if self.bulk_size <= 0:
+                self._send_single(event)
+            else:
+                if pending and (pending[0].kind != event.kind or len(pending) >= self.bulk_size):
+                    self._send_bulk(pending[0].kind, pending)
+                    pending = []
+                pending.append(event)
+            if total % 1000 == 0:
+                elapsed = time.perf_counter() - started
+                self.log(f"{total} transaksi terkirim ({total / elapsed:.0f}/s)")
+        if pending:
+            self._send_bulk(pending[0].kind, pending)
+
+        elapsed = time.perf_counter() - started
+        return {
+            "events": total,
+            "sent": self.sent,
+            "failed": self.failed,
+            "elapsed": round(elapsed, 3),
+            "eventsPerSecond": round(total / elapsed, 1) if elapsed else 0,
+        }